@@ -0,0 +1,148 @@
+"""
+Compute-once cache for analysis results.
+
+Results are keyed by (analysis name, dataset content hash) so every callback
+that reads the same dataset shares a single computation. Entries are evicted
+in least-recently-used order once the estimated size exceeds the budget.
+"""
+import hashlib
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Content hashes memoized per DataFrame object (attrs would leak into slices)
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def dataset_fingerprint(df):
+    """Content hash of a timing DataFrame, computed once per object"""
+    if df is None:
+        return None
+
+    with _fingerprints_lock:
+        entry = _fingerprints.get(id(df))
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    fingerprint = digest.hexdigest()
+
+    remember_fingerprint(df, fingerprint)
+    return fingerprint
+
+
+def remember_fingerprint(df, fingerprint):
+    """Record a known content hash for a DataFrame (e.g. one loaded by handle)"""
+    key = id(df)
+    with _fingerprints_lock:
+        _fingerprints[key] = (weakref.ref(df, lambda _: _fingerprints.pop(key, None)), fingerprint)
+
+
+def estimate_nbytes(obj, _sample=64):
+    """Approximate memory footprint of an analysis result"""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(index=False)))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            sys.getsizeof(key) + estimate_nbytes(value) for key, value in obj.items()
+        )
+    if isinstance(obj, (list, tuple)):
+        # Long execution lists are sized from a sample of their items
+        if len(obj) > _sample:
+            sampled = sum(estimate_nbytes(item) for item in obj[:_sample])
+            return sys.getsizeof(obj) + sampled * len(obj) // _sample
+        return sys.getsizeof(obj) + sum(estimate_nbytes(item) for item in obj)
+    return sys.getsizeof(obj)
+
+
+class AnalysisCache:
+    """Bounded LRU cache of analysis results with hit/miss counters"""
+
+    def __init__(self, max_bytes=512 * 1024 ** 2, max_entries=64):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing it at most once"""
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+
+                pending = self._pending.get(key)
+                if pending is None:
+                    # This caller computes; concurrent callers wait for it
+                    pending = self._pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            pending.wait()
+
+        try:
+            value = compute()
+            self.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.set()
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries over budget"""
+        nbytes = estimate_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -1,301 +1,134 @@
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 import dash
-from dash import dcc, html, Input, Output, callback, State
+from dash import dcc, html, ClientsideFunction, Input, Output, State
 import dash_bootstrap_components as dbc
-import base64
-import io
-import json
-from itertools import combinations
-import networkx as nx
-import json
-from itertools import combinations
-
-# Set seaborn style
-sns.set_style("whitegrid")
-plt.style.use('seaborn-v0_8')
+import hashlib
+import multiprocessing
+import uuid
+import weakref
+
+from flask import jsonify, request
+
+import parallel_analysis
+from analysis_cache import AnalysisCache, dataset_fingerprint, remember_fingerprint
+from chart_stats import box_statistics, histogram_counts, histogram_edges
+from dataset_store import DatasetStore
+from figure_cache import FigureCache
+from downsample import minmax_buckets, visible_slice
+from event_stream import DEFAULT_COLUMNS, EventStream
+from ingest import (TraceFormatError, UnsupportedEncodingError, encoding_for_filename, iter_base64_chunks,
+                    iter_decompressed, iter_file_chunks)
+from jobs import JobManager
+from live_tail import LIVE_HISTORY, MAX_POLL_BYTES, get_live_tail, release_live_tail
+from time_index import build_time_index
+from timeline_pyramid import build_timeline_pyramid
+from trace_analysis import (LATENCY_PERCENTILES, analyze_communication_time, analyze_execution_timing,
+                            analyze_synchronicity, executions_starting_within, format_percentiles, merged_sketch,
+                            sync_pulse_pairs)
+from snapshot import load_snapshot
+from trace_cache import ingest_trace_stream, load_trace_file
 
 # Initialize Dash app with Bootstrap theme
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "Hardware Timing Analytics Dashboard"
 
-# Global variable to store uploaded data
-timing_data = None
+# Uploaded datasets live in a store shared by all workers, bound to session tokens. The
+# default is in the user's own cache directory: a shared temp path could be planted by another user
+user_cache_dir = os.environ.get('XDG_CACHE_HOME', os.path.expanduser(os.path.join('~', '.cache')))
+dataset_store = DatasetStore(
+    os.environ.get('DATASET_STORE_DIR', os.path.join(user_cache_dir, 'hardware-timing-dashboard')),
+    max_bytes=int(os.environ.get('DATASET_STORE_MAX_BYTES', 2 * 1024 ** 3)),
+    idle_timeout=float(os.environ.get('DATASET_STORE_IDLE_SECONDS', 4 * 3600))
+)
 
-def parse_csv_contents(contents, filename):
-    """Parse uploaded CSV file"""
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    
-    try:
-        if 'csv' in filename.lower():
-            # Read the CSV file into a string
-            csv_string = decoded.decode('utf-8')
-            
-            # Remove comment lines that start with // or #
-            cleaned_lines = [line for line in csv_string.splitlines() if not line.strip().startswith('//') and not line.strip().startswith('#')]
-            cleaned_csv = '\n'.join(cleaned_lines)
-            
-            # Parse the cleaned CSV content
-            df = pd.read_csv(io.StringIO(cleaned_csv))
-            
-            # Validate required columns
-            required_columns = ['Event', 'Time', 'Toggled']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            
-            if missing_columns:
-                return None, f"Missing required columns: {', '.join(missing_columns)}"
-            
-            # Convert Time to numeric (nanoseconds)
-            df['Time'] = pd.to_numeric(df['Time'], errors='coerce')
-            
-            # Convert Toggled to boolean
-            df['Toggled'] = df['Toggled'].astype(bool)
-            
-            # Handle optional columns for device topology
-            if 'Device_ID' in df.columns:
-                # Convert Position to numeric if it exists
-                if 'Position' in df.columns:
-                    df['Position'] = pd.to_numeric(df['Position'], errors='coerce')
-            
-            return df, None
-        else:
-            return None, "Please upload a CSV file"
-            
-    except Exception as e:
-        return None, f"Error processing file: {str(e)}"
+# Analysis results shared by every callback that reads the same dataset
+analysis_cache = AnalysisCache(
+    max_bytes=int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', 512 * 1024 ** 2)),
+    max_entries=int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 64))
+)
 
-def analyze_execution_timing(df):
-    """Analyze execution timing from hardware data"""
-    if df is None or df.empty:
-        return {}
-    
-    # Calculate execution times for each event, per device if device info exists
-    execution_stats = {}
-    
-    # Check if the DataFrame has Device_ID column
-    has_device_info = 'Device_ID' in df.columns
-    
-    if has_device_info:
-        # Process each device separately
-        for device in df['Device_ID'].unique():
-            device_df = df[df['Device_ID'] == device]
-            device_stats = {}
-            
-            for event in device_df['Event'].unique():
-                event_data = device_df[device_df['Event'] == event].copy()
-                event_data = event_data.sort_values('Time')
-                
-                # Find pairs of toggle on/off to calculate execution time
-                executions = []
-                start_time = None
-                message_id = None
-                
-                for _, row in event_data.iterrows():
-                    if row['Toggled'] and start_time is None:
-                        # Event started
-                        start_time = row['Time']
-                        message_id = row.get('Message_ID', None)
-                    elif not row['Toggled'] and start_time is not None:
-                        # Only pair events with the same Message_ID if available
-                        # Handle NaN values properly
-                        row_message_id = row.get('Message_ID', None)
-                        if (pd.isna(message_id) and pd.isna(row_message_id)) or (message_id == row_message_id):
-                            # Event ended
-                            execution_time = row['Time'] - start_time
-                            executions.append({
-                                'time': execution_time,
-                                'start': start_time,
-                                'end': row['Time'],
-                                'message_id': message_id
-                            })
-                            start_time = None
-                            message_id = None
-                
-                if executions:
-                    execution_times = [ex['time'] for ex in executions]
-                    device_stats[event] = {
-                        'count': len(executions),
-                        'mean_ns': np.mean(execution_times),
-                        'std_ns': np.std(execution_times),
-                        'min_ns': np.min(execution_times),
-                        'max_ns': np.max(execution_times),
-                        'executions': executions
-                    }
-            
-            if device_stats:
-                execution_stats[device] = device_stats
-    else:
-        # Original processing when no device info
-        for event in df['Event'].unique():
-            event_data = df[df['Event'] == event].copy()
-            event_data = event_data.sort_values('Time')
-            
-            # Find pairs of toggle on/off to calculate execution time
-            executions = []
-            start_time = None
-            
-            for _, row in event_data.iterrows():
-                if row['Toggled'] and start_time is None:
-                    # Event started
-                    start_time = row['Time']
-                elif not row['Toggled'] and start_time is not None:
-                    # Event ended
-                    execution_time = row['Time'] - start_time
-                    executions.append({
-                        'time': execution_time,
-                        'start': start_time,
-                        'end': row['Time'],
-                        'message_id': None
-                    })
-                    start_time = None
-            
-            if executions:
-                execution_times = [ex['time'] for ex in executions]
-                execution_stats[event] = {
-                    'count': len(executions),
-                    'mean_ns': np.mean(execution_times),
-                    'std_ns': np.std(execution_times),
-                    'min_ns': np.min(execution_times),
-                    'max_ns': np.max(execution_times),
-                    'executions': executions
-                }
-    
-    return execution_stats
-
-def analyze_synchronicity(df):
-    """Analyze the synchronicity of events across devices"""
-    if df is None or df.empty or 'Device_ID' not in df.columns:
-        return {}
-    
-    sync_stats = {}
-    
-    # Focus on sync events specifically
-    sync_df = df[df['Event'] == 'Sync_Pulse'].copy()
-    
-    if sync_df.empty:
-        return {}
-    
-    # Group by Message_ID to analyze each sync pulse across devices
-    for message_id in sync_df['Message_ID'].unique():
-        if not message_id or not str(message_id).startswith('SYNC_'):
-            continue
-            
-        message_df = sync_df[sync_df['Message_ID'] == message_id]
-        
-        # Group by device and get start times (Toggled = True)
-        device_start_times = {}
-        for _, row in message_df[message_df['Toggled']].iterrows():
-            device_start_times[row['Device_ID']] = row['Time']
-        
-        if len(device_start_times) <= 1:
-            continue
-            
-        # Calculate time differences between devices
-        time_diffs = []
-        devices = list(device_start_times.keys())
-        
-        for dev1, dev2 in combinations(devices, 2):
-            time_diff = abs(device_start_times[dev1] - device_start_times[dev2])
-            time_diffs.append({
-                'device1': dev1,
-                'device2': dev2,
-                'time_diff_ns': time_diff
-            })
-        
-        # Calculate statistics for this sync pulse
-        time_diff_values = [td['time_diff_ns'] for td in time_diffs]
-        
-        sync_stats[message_id] = {
-            'device_count': len(devices),
-            'max_diff_ns': np.max(time_diff_values),
-            'min_diff_ns': np.min(time_diff_values),
-            'mean_diff_ns': np.mean(time_diff_values),
-            'std_diff_ns': np.std(time_diff_values),
-            'details': time_diffs
-        }
-    
-    return sync_stats
-
-def analyze_communication_time(df):
-    """Analyze the communication time between devices in a chain"""
-    if df is None or df.empty or 'Device_ID' not in df.columns:
-        return {}
-    
-    comm_stats = {}
-    
-    # Focus on communication events (UART_Send and UART_Receive)
-    comm_df = df[(df['Event'] == 'UART_Send') | (df['Event'] == 'UART_Receive')].copy()
-    
-    if comm_df.empty:
-        return {}
-    
-    # Group by Message_ID to track message propagation through the chain
-    for message_id in comm_df['Message_ID'].unique():
-        if not message_id or message_id is None or str(message_id).startswith('SYNC_'):
-            continue
-            
-        message_df = comm_df[comm_df['Message_ID'] == message_id]
-        
-        # Track when the message starts in the sending device
-        send_row = message_df[(message_df['Event'] == 'UART_Send') & (message_df['Toggled'])].iloc[0] if not message_df[(message_df['Event'] == 'UART_Send') & (message_df['Toggled'])].empty else None
-        
-        if send_row is None:
-            continue
-            
-        send_device = send_row['Device_ID']
-        send_position = send_row['Position']
-        send_time = send_row['Time']
-        
-        # Track when the message is received by each device
-        propagation_times = []
-        
-        for device in message_df['Device_ID'].unique():
-            if device == send_device:
-                continue
-                
-            # Find when this device received the message
-            receive_row = message_df[(message_df['Device_ID'] == device) & 
-                                     (message_df['Event'] == 'UART_Receive') & 
-                                     (message_df['Toggled'])].iloc[0] if not message_df[(message_df['Device_ID'] == device) & 
-                                                                               (message_df['Event'] == 'UART_Receive') & 
-                                                                               (message_df['Toggled'])].empty else None
-            
-            if receive_row is None:
-                continue
-                
-            receive_position = receive_row['Position']
-            receive_time = receive_row['Time']
-            
-            # Calculate propagation time and hops
-            prop_time = receive_time - send_time
-            hops = abs(receive_position - send_position)
-            
-            propagation_times.append({
-                'from_device': send_device,
-                'to_device': device,
-                'from_position': send_position,
-                'to_position': receive_position,
-                'hops': hops,
-                'time_ns': prop_time,
-                'time_per_hop_ns': prop_time / hops if hops > 0 else 0
-            })
-        
-        if propagation_times:
-            # Calculate statistics for this message
-            comm_stats[str(message_id)] = {
-                'source_device': send_device,
-                'destination_count': len(propagation_times),
-                'propagation_details': propagation_times
-            }
+# Parsing and the heavy analyses of uploads run as background jobs on a process pool
+job_manager = JobManager(
+    dataset_store,
+    max_workers=int(os.environ.get('JOB_WORKERS', min(4, os.cpu_count() or 1))),
+    max_age=float(os.environ.get('DATASET_STORE_IDLE_SECONDS', 4 * 3600))
+)
+# The server's own analyses get the same share of analysis processes as each job worker
+parallel_analysis.ANALYSIS_WORKERS = job_manager.analysis_workers
+JOB_POLL_INTERVAL_MS = 500
+
+# Analyses whose in-process results are also kept in the dataset store, like a job's
+PERSISTED_ANALYSES = {'build_timeline_pyramid'}
+# Precomputed results of the sample data, from its snapshot (see build_snapshot.py)
+snapshot_results = {}
+# Time window DataFrames' (whole trace, start, end), by object (see load_window_data)
+window_sources = {}
+
+def cached_analysis(analysis, df, *args):
+    """Run an analysis function at most once per dataset content.
     
-    return comm_stats
+    Extra arguments are passed on to the analysis; they must be derived from
+    df (e.g. the results of an earlier analysis), as they are not part of the key.
+    """
+    if df is None or df.empty:
+        return analysis(df, *args)
+    key = (analysis.__name__, dataset_fingerprint(df))
+    
+    source = window_sources.get(id(df))
+    if analysis is analyze_execution_timing and source is not None and source[0]() is df:
+        # A window's executions are the whole trace's executions that start in it,
+        # not a re-pairing of its rows, which would lose those crossing its ends
+        _, timing_data, start, end = source
+        return analysis_cache.get_or_compute(key, lambda: executions_starting_within(
+            cached_analysis(analyze_execution_timing, timing_data), 'Device_ID' in timing_data.columns, start, end))
+    
+    def compute():
+        # Results shipped in the snapshot or computed by a background job (shared
+        # through the dataset store) are reused
+        result = snapshot_results.get(key)
+        if result is None:
+            result = job_manager.load_result(*key)
+        if result is not None:
+            return result
+        result = analysis(df, *args)
+        if key[0] in PERSISTED_ANALYSES and dataset_store.has_dataset(key[1]):
+            job_manager.save_result(*key, result)
+        return result
+    
+    return analysis_cache.get_or_compute(key, compute)
+
+# Capture files that may be followed in live tail mode must live under this directory
+LIVE_TAIL_DIR = os.environ.get('LIVE_TAIL_DIR', 'data')
+LIVE_TAIL_INTERVAL_MS = int(os.environ.get('LIVE_TAIL_INTERVAL_MS', 1000))
+
+# Point budget for the execution trends chart (~16 bytes per point in the figure)
+TRENDS_MAX_POINTS = int(os.environ.get('TRENDS_MAX_POINTS', 40000))
+TRENDS_MIN_POINTS_PER_TRACE = 500
+# Time buckets across the device utilization heatmap
+UTILIZATION_MAX_BUCKETS = int(os.environ.get('UTILIZATION_MAX_BUCKETS', 500))
+# Scatter charts with at least this many points are drawn with WebGL instead of SVG
+WEBGL_MIN_POINTS = int(os.environ.get('WEBGL_MIN_POINTS', 10000))
+MAX_HISTOGRAM_BINS = 1000
+BOX_MAX_OUTLIERS = 50
+
+def scatter_type(num_points):
+    """Scatter trace class for a chart of num_points points (SVG grinds to a halt on large ones)"""
+    return go.Scattergl if num_points >= WEBGL_MIN_POINTS else go.Scatter
+
+@app.server.route('/healthz')
+def healthz():
+    """Liveness probe for container health checks; touches no dataset or analysis"""
+    return jsonify({'status': 'ok'})
+
+@app.server.route('/api/analysis-cache')
+def analysis_cache_stats():
+    """Expose analysis cache hit/miss counters"""
+    return jsonify(analysis_cache.stats())
 
 def generate_sample_data():
     """Generate sample hardware timing data for demonstration"""
@@ -434,21 +267,178 @@ sample_file = 'data/sample_data.csv'
 if not os.path.exists(sample_file):
     sample_file = 'sample_data.csv'  # Fallback to current directory
 
-try:
-    with open(sample_file, 'r') as f:
-        # Skip comment lines that start with // or #
-        cleaned_lines = [line for line in f if not line.strip().startswith('//') and not line.strip().startswith('#')]
-        cleaned_csv = '\n'.join(cleaned_lines)
+# The snapshot holds the parsed sample and its analysis results; boot memory-maps it
+# so neither startup nor the first page render parses or analyzes anything
+SAMPLE_SNAPSHOT_DIR = os.environ.get('SAMPLE_SNAPSHOT_DIR', 'data/sample_snapshot')
+sample_snapshot = load_snapshot(SAMPLE_SNAPSHOT_DIR, sample_file) if SAMPLE_SNAPSHOT_DIR else None
+
+if sample_snapshot is not None:
+    sample_data, sample_handle, results = sample_snapshot
+    for name, result in results.items():
+        snapshot_results[(name, sample_handle)] = result
+        analysis_cache.put((name, sample_handle), result)
+else:
+    try:
+        # Parsed once into the columnar cache; later starts memory-map the cached copy
+        sample_data, sample_handle = load_trace_file(dataset_store, sample_file)
+    except FileNotFoundError:
+        print(f"Warning: Sample data file not found at {sample_file}")
+        sample_data = None
+        sample_handle = None
+
+# Callbacks whose responses depend only on the dataset and their inputs
+FIGURE_CACHE_CALLBACKS = [
+    'update_summary_stats', 'update_execution_time_chart', 'update_event_distribution', 'update_execution_trends',
+    'update_utilization', 'update_time_distribution', 'update_detailed_timing', 'update_device_topology',
+    'update_device_comparison', 'update_synchronicity_analysis', 'show_sync_pulse_details',
+    'update_communication_analysis'
+]
+
+def figure_cache_dataset(dataset_handle):
+    """Content hash behind a dataset handle, or None while its figures must not be cached"""
+    if not dataset_handle or dataset_handle == sample_handle:
+        return sample_handle
+    # Handles are content hashes; an expired dataset renders "no data", which is not kept
+    return dataset_handle if dataset_store.has_dataset(dataset_handle) else None
+
+# Serialized responses of the dataset panels, served again for the same dataset and inputs
+figure_cache = FigureCache(
+    app, FIGURE_CACHE_CALLBACKS, figure_cache_dataset,
+    max_bytes=int(os.environ.get('FIGURE_CACHE_MAX_BYTES', 128 * 1024 ** 2)),
+    max_entries=int(os.environ.get('FIGURE_CACHE_MAX_ENTRIES', 1024))
+)
+
+@app.server.route('/api/figure-cache')
+def figure_cache_stats():
+    """Expose figure cache hit/miss counters"""
+    return jsonify(figure_cache.stats())
+
+def load_timing_data(dataset_handle):
+    """Resolve a dataset handle to its DataFrame (the sample data when unset)"""
+    if not dataset_handle or dataset_handle == sample_handle:
+        return sample_data
+    return dataset_store.get_dataset(dataset_handle)
+
+def load_window_data(dataset_handle, time_window):
+    """The dataset limited to the global time window ([start, end] in ns, or None for all of it).
+    
+    The window holds the rows timed within it. Its execution timing analysis
+    holds the executions that start within it, each complete with its end.
+    """
+    timing_data = load_timing_data(dataset_handle)
+    if not time_window or timing_data is None or timing_data.empty:
+        return timing_data
+    
+    # Rows in the window come from the time index, not a scan of the whole trace
+    index = cached_analysis(build_time_index, timing_data)
+    start, end = time_window
+    if index.covers(start, end):
+        return timing_data
+    
+    # Every panel reads the same window, so the slice is taken once and shared
+    key = ('time_window', dataset_fingerprint(timing_data), start, end)
+    
+    def compute():
+        window_data = timing_data.take(index.rows(start, end)).reset_index(drop=True)
+        # A derived content hash, so analyses of the window are cached like any dataset
+        remember_fingerprint(window_data, hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest())
+        source = id(window_data)
+        window_sources[source] = (weakref.ref(window_data, lambda _: window_sources.pop(source, None)),
+                                  timing_data, start, end)
+        return window_data
+    
+    return analysis_cache.get_or_compute(key, compute)
+
+@app.server.route('/api/upload', methods=['POST'])
+def upload_trace():
+    """Stream a CSV trace (raw body or multipart, optionally gzip/zstd) into the dataset store"""
+    # Only multipart bodies are parsed as forms; anything else is the raw file
+    if request.mimetype == 'multipart/form-data' and request.files:
+        upload = request.files.get('file') or next(iter(request.files.values()))
+        filename = upload.filename or 'upload.csv'
+        stream = upload.stream
+        encoding = encoding_for_filename(filename)
+    else:
+        # Raw body: the file is read straight off the socket, never buffered whole
+        filename = request.args.get('filename', 'upload.csv')
+        stream = request.stream
+        encoding = request.headers.get('Content-Encoding') or encoding_for_filename(filename)
+    
+    try:
+        chunks = iter_decompressed(iter_file_chunks(stream), encoding)
+        # Hashed while it is parsed, so the stream is only read once
+        df, dataset_handle = ingest_trace_stream(dataset_store, chunks, total_bytes=request.content_length)
+    except UnsupportedEncodingError as e:
+        return jsonify({'error': str(e), 'filename': filename}), 415
+    except TraceFormatError as e:
+        return jsonify({'error': str(e), 'filename': filename}), 400
+    except Exception as e:
+        return jsonify({'error': f"Error processing file: {str(e)}", 'filename': filename}), 400
+    
+    # Scripted uploads may bind the dataset to a browser session directly
+    session_id = request.args.get('session') or request.headers.get('X-Session-Id')
+    if session_id:
+        try:
+            dataset_store.bind(session_id, dataset_handle, filename)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'filename': filename}), 400
+    
+    return jsonify({'handle': dataset_handle, 'filename': filename, 'rows': len(df)})
+
+def start_event_stream():
+    """Listen for live events on LIVE_TCP_PORT / LIVE_UDP_PORT, if configured"""
+    tcp_port = int(os.environ.get('LIVE_TCP_PORT') or 0)
+    udp_port = int(os.environ.get('LIVE_UDP_PORT') or 0)
+    if not (tcp_port or udp_port):
+        return None
+    # The debug reloader imports the app twice, and job pool workers import it
+    # too; only the serving process listens
+    if multiprocessing.parent_process() is not None or (__name__ == '__main__' and not os.environ.get('WERKZEUG_RUN_MAIN')):
+        return None
+    
+    stream = EventStream(
+        capacity=int(os.environ.get('LIVE_BUFFER_ROWS', 1_000_000)),
+        max_batches=int(os.environ.get('LIVE_QUEUE_BATCHES', 1024)),
+        columns=os.environ.get('LIVE_STREAM_COLUMNS', DEFAULT_COLUMNS)
+    )
+    try:
+        return stream.start(os.environ.get('LIVE_STREAM_HOST', '127.0.0.1'), tcp_port, udp_port)
+    except OSError as e:
+        # With several workers only the first one can bind the ports
+        print(f"Live stream disabled in this process: {e}")
+        return None
+
+event_stream = start_event_stream()
 
-    # Parse the cleaned CSV content
-    sample_df = pd.read_csv(io.StringIO(cleaned_csv))
-    timing_data = sample_df  # Initialize with sample data
-except FileNotFoundError:
-    print(f"Warning: Sample data file not found at {sample_file}")
-    timing_data = None
+@app.server.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Progress and partial results of a background job"""
+    status = job_manager.status(job_id)
+    if status is None:
+        return jsonify({'error': "Unknown job"}), 404
+    return jsonify(status)
+
+@app.server.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Ask a queued or running job to stop"""
+    return jsonify({'cancelled': job_manager.cancel(job_id)})
+
+@app.server.route('/api/live-stream')
+def live_stream_stats():
+    """Live stream ingest and overload counters"""
+    if event_stream is None:
+        return jsonify({'error': "Live stream is not enabled in this process"}), 404
+    return jsonify(event_stream.stats())
+
+# Rolling windows offered for the live stream view, in nanoseconds of trace time
+LIVE_WINDOWS = [("1 ms", 1e6), ("10 ms", 1e7), ("100 ms", 1e8), ("1 s", 1e9), ("10 s", 1e10)]
+# Most recent buffered rows any live stream window analyzes
+LIVE_ANALYSIS_ROWS = int(os.environ.get('LIVE_ANALYSIS_ROWS', 200_000))
+# Live stream analyses per (rows written, window): ticks without new rows, and other tabs, reuse them
+live_stream_cache = AnalysisCache(max_bytes=64 * 1024 ** 2, max_entries=2 * (len(LIVE_WINDOWS) + 1))
 
 # Define the layout
-app.layout = dbc.Container([
+dashboard_layout = dbc.Container([
     dbc.Row([
         dbc.Col([
             html.H1("⚡ Hardware Timing Analytics Dashboard", 
@@ -481,7 +471,20 @@ app.layout = dbc.Container([
                         },
                         multiple=False
                     ),
+                    html.Div([
+                        dbc.Button("📤 Streamed Upload", id="stream-upload-btn",
+                                   color="secondary", size="sm", outline=True, className="me-2"),
+                        html.Span("For large traces (.csv, .csv.gz, .csv.zst); sent straight to the server",
+                                  className="text-muted small")
+                    ], className='mt-2'),
                     html.Div(id='upload-status', className='mt-3'),
+                    # Progress of the background job processing the latest upload
+                    html.Div([
+                        html.Div(id='job-details', className="small mb-2"),
+                        dbc.Progress(id='job-progress', value=0, striped=True, animated=True, className="mb-2"),
+                        dbc.Button("✖️ Cancel", id="job-cancel-btn", color="secondary", size="sm", outline=True)
+                    ], id='job-panel', style={'display': 'none'}),
+                    dcc.Interval(id='job-interval', interval=JOB_POLL_INTERVAL_MS, disabled=True),
                     html.Hr(),
                     html.P("Expected CSV format: Event, Time (nanoseconds), Toggled (True/False), Device_ID, Position, Message_ID", 
                            className="text-muted small")
@@ -490,6 +493,29 @@ app.layout = dbc.Container([
         ])
     ], className="mb-4"),
     
+    # Global time window, respected by every dataset panel
+    dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardHeader("🕒 Time Window"),
+                dbc.CardBody([
+                    dbc.Row([
+                        dbc.Col([
+                            dcc.RangeSlider(id='time-range-slider', min=0, max=1, value=[0, 1],
+                                            allowCross=False, updatemode='mouseup')
+                        ], width=10),
+                        dbc.Col([
+                            dbc.Button("↔️ Whole Trace", id="time-window-reset", color="secondary", size="sm", outline=True)
+                        ], width=2)
+                    ]),
+                    html.Div(id="time-window-label", className="small text-muted mt-2"),
+                    # [start, end] in trace nanoseconds, or None for the whole trace
+                    dcc.Store(id='time-window')
+                ])
+            ])
+        ])
+    ], className="mb-4"),
+    
     # Device Topology Section
     dbc.Row([
         dbc.Col([
@@ -574,7 +600,11 @@ app.layout = dbc.Container([
                                     )
                                 ], width=6)
                             ], className="mb-3"),
-                            html.Div(id="current-connections-display")
+                            html.Div([
+                                html.H6("Current Connections:"),
+                                html.Div(id="current-connections-list", className="small",
+                                         style={'whiteSpace': 'pre-line', 'maxHeight': '300px', 'overflowY': 'auto'})
+                            ], id="current-connections-display")
                         ]),
                         dbc.ModalFooter([
                             dbc.Button("Add Connection", id="confirm-add-connection", 
@@ -587,8 +617,11 @@ app.layout = dbc.Container([
                     html.Div(id="topology-status", className="mb-2"),
                     # Interactive topology chart
                     dcc.Graph(id='device-topology-chart'),
-                    # Store for topology state
+                    # Store for topology state; the connections are kept apart so that edits need not send them
                     dcc.Store(id='topology-store', data={}),
+                    dcc.Store(id='topology-connections', data=[]),
+                    dcc.Store(id='topology-edit'),
+                    dcc.Store(id='topology-redraw'),
                     dcc.Store(id='custom-positions-store', data={})
                 ])
             ])
@@ -609,7 +642,8 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardBody([
                     html.H4("⚡ Avg Execution Time", className="card-title"),
-                    html.H2(id="avg-exec-time", className="text-success")
+                    html.H2(id="avg-exec-time", className="text-success"),
+                    html.P(id="tail-latency", className="text-muted small mb-0")
                 ])
             ])
         ], width=3),
@@ -665,12 +699,103 @@ app.layout = dbc.Container([
             dbc.Card([
                 dbc.CardHeader("📦 Execution Time Distribution"),
                 dbc.CardBody([
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.InputGroup([
+                                dbc.InputGroupText("Bins"),
+                                dbc.Input(id='distribution-bins', type='number', value=30,
+                                          min=5, max=MAX_HISTOGRAM_BINS, step=1, debounce=True)
+                            ], size="sm")
+                        ], width=5),
+                        dbc.Col([
+                            dbc.Checklist(
+                                id='distribution-options',
+                                options=[{"label": "Log-spaced bins", "value": "log"}],
+                                value=[],
+                                switch=True,
+                                className="small mt-1"
+                            )
+                        ], width=7)
+                    ], className="mb-2"),
                     dcc.Graph(id='time-distribution-chart')
                 ])
             ])
         ], width=6),
     ], className="mb-4"),
     
+    # Device Utilization
+    dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardHeader("🔥 Device Utilization"),
+                dbc.CardBody([
+                    dcc.Graph(id='utilization-chart')
+                ])
+            ])
+        ])
+    ], className="mb-4"),
+    
+    # Live Tail
+    dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardHeader("📡 Live Tail"),
+                dbc.CardBody([
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.InputGroup([
+                                dbc.InputGroupText(f"{LIVE_TAIL_DIR}/"),
+                                dbc.Input(id='live-tail-path', type='text', placeholder="capture.csv")
+                            ], size="sm")
+                        ], width=8),
+                        dbc.Col([
+                            dbc.Button("▶️ Start", id="live-tail-start", color="success", size="sm", className="me-2"),
+                            dbc.Button("⏹️ Stop", id="live-tail-stop", color="secondary", size="sm")
+                        ], width=4)
+                    ], className="mb-2"),
+                    html.Div(id="live-tail-status"),
+                    html.Div(id="live-tail-stats"),
+                    dcc.Graph(id='live-trends-chart'),
+                    dcc.Interval(id='live-tail-interval', interval=LIVE_TAIL_INTERVAL_MS, disabled=True),
+                    dcc.Store(id='live-tail-file'),
+                    # Events shown in the live chart and how many executions of each it already has
+                    dcc.Store(id='live-tail-cursors')
+                ])
+            ])
+        ])
+    ], className="mb-4"),
+    
+    # Live Stream
+    dbc.Row([
+        dbc.Col([
+            dbc.Card([
+                dbc.CardHeader("🛰️ Live Stream"),
+                dbc.CardBody([
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.InputGroup([
+                                dbc.InputGroupText("Window"),
+                                dbc.Select(
+                                    id='live-stream-window',
+                                    options=[{"label": f"Last {label}", "value": str(window)}
+                                             for label, window in LIVE_WINDOWS]
+                                            + [{"label": f"Latest {LIVE_ANALYSIS_ROWS:,} rows", "value": "all"}],
+                                    value=str(1e9)
+                                )
+                            ], size="sm")
+                        ], width=4),
+                        dbc.Col([
+                            html.Div(id="live-stream-counters", className="small text-muted mt-1")
+                        ], width=8)
+                    ], className="mb-2"),
+                    html.Div(id="live-stream-stats"),
+                    dcc.Interval(id='live-stream-interval', interval=LIVE_TAIL_INTERVAL_MS,
+                                 disabled=event_stream is None)
+                ])
+            ])
+        ])
+    ], className="mb-4"),
+    
     # Device Selector for Analysis
     dbc.Row([
         dbc.Col([
@@ -697,7 +822,8 @@ app.layout = dbc.Container([
                 dbc.CardHeader("⏱️ Device Synchronicity Analysis"),
                 dbc.CardBody([
                     html.Div(id="sync-stats"),
-                    dcc.Graph(id='sync-chart')
+                    dcc.Graph(id='sync-chart'),
+                    html.Div(id="sync-pulse-details", className="mt-3")
                 ])
             ])
         ], width=6),
@@ -725,44 +851,217 @@ app.layout = dbc.Container([
     ])
 ], fluid=True)
 
+def serve_layout():
+    """Page layout with a fresh session token for each new browser session"""
+    return html.Div([
+        # The token survives page reloads, so a session keeps its uploaded dataset
+        dcc.Store(id='session-id', data=uuid.uuid4().hex, storage_type='session'),
+        dcc.Store(id='dataset-handle'),
+        # Result of the latest upload, written by dcc.Upload or the streamed upload script
+        dcc.Store(id='upload-result'),
+        # Background job currently processing an upload for this page
+        dcc.Store(id='active-job'),
+        dashboard_layout
+    ])
+
+app.layout = serve_layout
+
+@app.callback(
+    Output('upload-result', 'data'),
+    Input('upload-data', 'contents'),
+    State('upload-data', 'filename'),
+    prevent_initial_call=True
+)
+def store_uploaded_file(contents, filename):
+    """Hand a dcc.Upload file to a background job for parsing and analysis"""
+    if 'csv' not in filename.lower():
+        return {'error': "Please upload a CSV file", 'filename': filename}
+    
+    try:
+        # The data URL is decoded slice by slice into the job's input file
+        chunks = iter_base64_chunks(contents, contents.index(',') + 1)
+        return {'job': job_manager.submit_upload(chunks, filename), 'filename': filename}
+    except Exception as e:
+        return {'error': f"Error processing file: {str(e)}", 'filename': filename}
+
 @app.callback(
     [Output('upload-status', 'children'),
-     Output('total-events', 'children'),
+     Output('dataset-handle', 'data'),
+     Output('active-job', 'data'),
+     Output('job-interval', 'disabled')],
+    Input('upload-result', 'data'),
+    State('session-id', 'data')
+)
+def update_upload_status(upload_result, session_id):
+    """Bind the uploaded dataset (dcc.Upload or streamed) to this session"""
+    if upload_result:
+        filename = upload_result['filename']
+        if upload_result.get('error'):
+            return dbc.Alert(f"Error: {upload_result['error']}", color="danger"), dash.no_update, None, True
+        
+        # Show the dataset only once its heavy analyses are done, so no panel blocks on them
+        dataset_handle = upload_result.get('handle')
+        if dataset_handle is None or not job_manager.has_results(dataset_handle):
+            job_id = upload_result.get('job') or job_manager.submit_analysis(dataset_handle, filename)
+            return (dbc.Alert(f"Processing {filename}…", color="info"), dash.no_update,
+                    {'job': job_id, 'filename': filename}, False)
+        
+        # Bind the dataset so any worker can serve this session from now on
+        if session_id:
+            dataset_store.bind(session_id, dataset_handle, filename)
+        status_msg = dbc.Alert(f"Successfully loaded {filename} with {upload_result['rows']} records",
+                               color="success")
+        return status_msg, dataset_handle, None, True
+    
+    # Restore a dataset this session uploaded earlier, possibly on another worker
+    timing_data, session_info = dataset_store.load(session_id)
+    if timing_data is not None:
+        status_msg = dbc.Alert(f"Using {session_info['filename']} with {len(timing_data)} records", color="info")
+        return status_msg, session_info['handle'], dash.no_update, dash.no_update
+    
+    return dbc.Alert("Using sample data", color="info"), sample_handle, dash.no_update, dash.no_update
+
+JOB_STAGE_LABELS = {
+    'parse': "Parsing CSV",
+    'build_time_index': "Indexing timestamps",
+    'analyze_execution_timing': "Analyzing execution timing",
+    'build_timeline_pyramid': "Building timeline rollups",
+    'analyze_synchronicity': "Analyzing synchronicity",
+    'analyze_communication_time': "Analyzing communication time"
+}
+
+def job_partial_results(partial):
+    """Summary lines for the results a job has produced so far"""
+    lines = []
+    if 'rows' in partial:
+        lines.append(f"{partial['rows']:,} records parsed")
+    if 'executions' in partial:
+        lines.append(f"{partial['executions']:,} executions of {partial['events']} events")
+    if 'sync_pulses' in partial:
+        lines.append(f"{partial['sync_pulses']:,} sync pulses, max spread {partial['max_sync_diff_ns']:,.0f} ns")
+    if 'messages' in partial:
+        lines.append(f"{partial['messages']:,} messages traced")
+    return [html.Li(line) for line in lines]
+
+@app.callback(
+    [Output('upload-result', 'data', allow_duplicate=True),
+     Output('upload-status', 'children', allow_duplicate=True),
+     Output('active-job', 'data', allow_duplicate=True),
+     Output('job-interval', 'disabled', allow_duplicate=True),
+     Output('job-panel', 'style'),
+     Output('job-progress', 'value'),
+     Output('job-progress', 'label'),
+     Output('job-details', 'children')],
+    [Input('job-interval', 'n_intervals'),
+     Input('job-cancel-btn', 'n_clicks')],
+    State('active-job', 'data'),
+    prevent_initial_call=True
+)
+def poll_job(n_intervals, cancel_clicks, active_job):
+    """Report a background job's progress and pass on its dataset once done"""
+    hidden = {'display': 'none'}
+    if not active_job:
+        return dash.no_update, dash.no_update, None, True, hidden, 0, "", None
+    
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    if triggered_id == 'job-cancel-btn':
+        job_manager.cancel(active_job['job'])
+    
+    filename = active_job['filename']
+    status = job_manager.status(active_job['job'])
+    if status is None or status['state'] == 'failed':
+        error = status.get('error') if status else "Job not found"
+        return (dash.no_update, dbc.Alert(f"Error: {error}", color="danger"), None, True, hidden, 0, "", None)
+    if status['state'] == 'cancelled':
+        return (dash.no_update, dbc.Alert(f"Processing of {filename} was cancelled", color="secondary"),
+                None, True, hidden, 0, "", None)
+    if status['state'] == 'done':
+        # Hand over to update_upload_status, which binds the dataset to the session
+        result = {'handle': status['handle'], 'filename': filename, 'rows': status['rows']}
+        return result, dash.no_update, None, True, hidden, 100, "", None
+    
+    stage = JOB_STAGE_LABELS.get(status['stage'], "Waiting for a worker")
+    details = [html.Strong(f"{stage}…"), html.Ul(job_partial_results(status['partial']), className="mb-0")]
+    return (dash.no_update, dash.no_update, dash.no_update, dash.no_update, {'display': 'block'},
+            status['progress'], f"{status['progress']:.0f}%", details)
+
+TIME_WINDOW_STEPS = 1000
+
+def format_trace_time(ns):
+    """Trace timestamp in the largest unit that keeps it above 1"""
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("µs", 1e3)):
+        if abs(ns) >= scale:
+            return f"{ns / scale:,.3f} {unit}"
+    return f"{ns:,.0f} ns"
+
+@app.callback(
+    [Output('time-range-slider', 'min'),
+     Output('time-range-slider', 'max'),
+     Output('time-range-slider', 'step'),
+     Output('time-range-slider', 'marks'),
+     Output('time-range-slider', 'value'),
+     Output('time-window', 'data'),
+     Output('time-window-label', 'children')],
+    [Input('dataset-handle', 'data'),
+     Input('time-range-slider', 'value'),
+     Input('time-window-reset', 'n_clicks')]
+)
+def update_time_window(dataset_handle, slider_value, reset_clicks):
+    """Global time window; a new dataset or the reset button selects the whole trace"""
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    
+    timing_data = load_timing_data(dataset_handle)
+    index = cached_analysis(build_time_index, timing_data) if timing_data is not None and not timing_data.empty else None
+    if index is None or index.span is None:
+        return 0, 1, 1, {}, [0, 1], None, "No timestamps available"
+    
+    low, high = float(index.span[0]), float(index.span[1])
+    total = f"{len(timing_data):,} records from {format_trace_time(low)} to {format_trace_time(high)}"
+    
+    if triggered_id == 'time-range-slider' and slider_value:
+        start, end = slider_value
+        if not index.covers(start, end):
+            # Counting needs only the binary searches, not the rows themselves
+            label = (f"{index.count(start, end):,} records from {format_trace_time(start)} "
+                     f"to {format_trace_time(end)} (of {total}); executions that start in this range are "
+                     "analyzed whole")
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, [start, end], label
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, None, f"Whole trace: {total}"
+    
+    high = max(high, low + 1)
+    marks = {float(value): format_trace_time(value) for value in np.linspace(low, high, 5)}
+    return low, high, (high - low) / TIME_WINDOW_STEPS, marks, [low, high], None, f"Whole trace: {total}"
+
+@app.callback(
+    [Output('total-events', 'children'),
      Output('avg-exec-time', 'children'),
      Output('fastest-event', 'children'),
-     Output('slowest-event', 'children')],
-    [Input('upload-data', 'contents')],
-    [State('upload-data', 'filename')]
+     Output('slowest-event', 'children'),
+     Output('tail-latency', 'children')],
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data')
 )
-def update_upload_status_and_stats(contents, filename):
-    global timing_data
-    
-    if contents is not None:
-        # Parse uploaded file
-        df, error = parse_csv_contents(contents, filename)
-        
-        if error or df is None:
-            return (
-                dbc.Alert(f"Error: {error}", color="danger"),
-                "N/A", "N/A", "N/A", "N/A"
-            )
-        
-        timing_data = df
-        status_msg = dbc.Alert(f"Successfully loaded {filename} with {len(df)} records", color="success")
-    else:
-        status_msg = dbc.Alert("Using sample data", color="info")
+def update_summary_stats(dataset_handle, time_window):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     # Calculate stats
     if timing_data is None or timing_data.empty:
-        return status_msg, "0", "N/A", "N/A", "N/A"
+        return "0", "N/A", "N/A", "N/A", ""
     
     # Check if the DataFrame has device information
     has_device_info = 'Device_ID' in timing_data.columns
     
-    stats = analyze_execution_timing(timing_data)
+    stats = cached_analysis(analyze_execution_timing, timing_data)
     
     if not stats:
-        return status_msg, "0", "N/A", "N/A", "N/A"
+        return "0", "N/A", "N/A", "N/A", ""
+    
+    # Tail latency over every execution, from the merged per-group sketches
+    all_event_stats = ([event_stats for device_stats in stats.values() for event_stats in device_stats.values()]
+                       if has_device_info else list(stats.values()))
+    tail_latency = format_percentiles(merged_sketch(all_event_stats))
     
     if has_device_info:
         # Aggregate stats across all devices
@@ -803,24 +1102,25 @@ def update_upload_status_and_stats(contents, filename):
         slowest_time = f"{stats[slowest_event]['mean_ns']:.1f} ns"
     
     return (
-        status_msg,
         f"{total_events:,}",
         avg_exec_time,
         f"{fastest_event}: {fastest_time}",
-        f"{slowest_event}: {slowest_time}"
+        f"{slowest_event}: {slowest_time}",
+        tail_latency
     )
 
 @app.callback(
     Output('execution-time-chart', 'figure'),
-    Input('upload-data', 'contents')
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data')
 )
-def update_execution_time_chart(contents):
-    global timing_data
+def update_execution_time_chart(dataset_handle, time_window):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     if timing_data is None or timing_data.empty:
         return px.bar(title="No data available")
     
-    stats = analyze_execution_timing(timing_data)
+    stats = cached_analysis(analyze_execution_timing, timing_data)
     
     if not stats:
         return px.bar(title="No execution data found")
@@ -842,13 +1142,14 @@ def update_execution_time_chart(contents):
                         'count': 0
                     }
                 
-                event_stats[event]['times'].extend([ex['time'] for ex in event_data['executions']])
+                event_stats[event]['times'].append(event_data['executions']['time'])
                 event_stats[event]['count'] += event_data['count']
         
         # Create comparison chart
         events = list(event_stats.keys())
-        mean_times = [np.mean(event_stats[event]['times']) for event in events]  # Keep as nanoseconds
-        std_times = [np.std(event_stats[event]['times']) for event in events]
+        event_times = {event: np.concatenate(event_stats[event]['times']) for event in events}
+        mean_times = [np.mean(event_times[event]) for event in events]  # Keep as nanoseconds
+        std_times = [np.std(event_times[event]) for event in events]
         
         fig.add_trace(go.Bar(
             x=events,
@@ -883,15 +1184,16 @@ def update_execution_time_chart(contents):
 
 @app.callback(
     Output('event-distribution-chart', 'figure'),
-    Input('upload-data', 'contents')
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data')
 )
-def update_event_distribution(contents):
-    global timing_data
+def update_event_distribution(dataset_handle, time_window):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     if timing_data is None or timing_data.empty:
         return px.pie(title="No data available")
     
-    stats = analyze_execution_timing(timing_data)
+    stats = cached_analysis(analyze_execution_timing, timing_data)
     
     if not stats:
         return px.pie(title="No execution data found")
@@ -927,208 +1229,547 @@ def update_event_distribution(contents):
     
     return fig
 
+def analyze_execution_trends(df):
+    """Executions per event in start time order, merged across devices"""
+    stats = cached_analysis(analyze_execution_timing, df)
+    if not stats or 'Device_ID' not in df.columns:
+        return {event: data['executions'] for event, data in stats.items()}
+    
+    # Collect all executions for each event type
+    event_executions = {}
+    for device, device_stats in stats.items():
+        for event, event_data in device_stats.items():
+            event_executions.setdefault(event, []).append(event_data['executions'])
+    
+    # Each device's executions are in start time order; sort once after merging
+    trends = {}
+    for event, executions in event_executions.items():
+        executions = np.concatenate(executions)
+        trends[event] = executions[np.argsort(executions['start'], kind='stable')]
+    return trends
+
+def timeline_pyramid(df):
+    """Timeline pyramid of a dataset, built from its cached execution timing"""
+    return cached_analysis(build_timeline_pyramid, df, cached_analysis(analyze_execution_timing, df))
+
+def relayout_x_range(relayout_data):
+    """Visible x-axis range from a Graph's relayoutData, or None when autoscaled"""
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+    return None
+
+def timeline_range(time_window, x_range):
+    """Visible [start, end] of a timeline chart: the zoomed range within the time window (None for all)"""
+    if not time_window:
+        return x_range
+    if not x_range:
+        return tuple(time_window)
+    return max(x_range[0], time_window[0]), min(x_range[1], time_window[1])
+
 @app.callback(
     Output('execution-trends-chart', 'figure'),
-    Input('upload-data', 'contents')
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data'),
+    Input('execution-trends-chart', 'relayoutData')
 )
-def update_execution_trends(contents):
-    global timing_data
+def update_execution_trends(dataset_handle, time_window, relayout_data):
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    
+    # A zoom re-queries only the visible range; a new dataset or time window starts unzoomed
+    x_range = None
+    if triggered_id == 'execution-trends-chart':
+        if not relayout_data or not any(key.startswith('xaxis.') for key in relayout_data):
+            return dash.no_update
+        x_range = relayout_x_range(relayout_data)
+    
+    # The timeline is drawn from the whole trace; the time window only limits the visible range
+    timing_data = load_timing_data(dataset_handle)
     
     if timing_data is None or timing_data.empty:
         return px.line(title="No data available")
     
-    stats = analyze_execution_timing(timing_data)
+    trends = cached_analysis(analyze_execution_trends, timing_data)
     
-    if not stats:
+    if not trends:
         return px.line(title="No execution data found")
     
-    # Check if the DataFrame has device information
-    has_device_info = 'Device_ID' in timing_data.columns
+    pyramid = timeline_pyramid(timing_data)
+    x_range = timeline_range(time_window, x_range)
+    
+    # Every trace shares the point budget so the figure stays small for any trace size
+    points_per_trace = max(TRENDS_MIN_POINTS_PER_TRACE, TRENDS_MAX_POINTS // len(trends))
+    colors = px.colors.qualitative.Plotly
+    
+    visible = [(event, executions[visible_slice(executions['start'], x_range)]) for event, executions in trends.items()]
+    # All traces use one renderer: a band's fill only reaches the previous trace of its own kind
+    Scatter = scatter_type(sum(min(len(executions), points_per_trace) for _, executions in visible))
     
     fig = go.Figure()
+    bucket_width = None
     
-    if has_device_info:
-        # For device data, we can either:
-        # 1. Show trends for one event across all devices
-        # 2. Aggregate across all devices for each event
-        # Let's do #2 for simplicity
-        
-        # Collect all executions for each event type
-        event_executions = {}
-        
-        for device, device_stats in stats.items():
-            for event, event_data in device_stats.items():
-                if event not in event_executions:
-                    event_executions[event] = []
-                
-                # Sort executions by start time to maintain chronological order
-                sorted_execs = sorted(event_data['executions'], key=lambda x: x['start'])
-                event_executions[event].extend(sorted_execs)
+    for i, (event, executions) in enumerate(visible):
+        color = colors[i % len(colors)]
         
-        # Now plot the trends for each event type
-        for event, executions in event_executions.items():
-            # Sort one more time to ensure chronological order after merging from all devices
-            sorted_execs = sorted(executions, key=lambda x: x['start'])
-            x_values = list(range(len(sorted_execs)))
-            y_values = [ex['time'] for ex in sorted_execs]  # Keep in nanoseconds
-            
-            fig.add_trace(go.Scatter(
-                x=x_values,
-                y=y_values,
+        if len(executions) <= points_per_trace or not pyramid.levels:
+            fig.add_trace(Scatter(
+                x=executions['start'],
+                y=executions['time'],  # Keep in nanoseconds
                 mode='lines+markers',
                 name=event,
-                line=dict(width=2)
-            ))
-    else:
-        # Original processing when no device info
-        for event, data in stats.items():
-            executions = [ex['time'] for ex in data['executions']]
-            x_values = list(range(len(executions)))
-            y_values = executions  # Keep in nanoseconds
-            
-            fig.add_trace(go.Scatter(
-                x=x_values,
-                y=y_values,
-                mode='lines+markers',
-                name=event,
-                line=dict(width=2)
+                legendgroup=event,
+                line=dict(width=2, color=color)
             ))
+            continue
+        
+        # Too many executions to draw: one point per time bucket (mean line, min-max band),
+        # read from the pyramid level whose buckets fit the budget. Ranges narrower than
+        # its finest buckets are bucketed from the visible executions themselves
+        start, end = x_range or pyramid.span
+        max_buckets = points_per_trace // 3
+        if pyramid.width(0) * max_buckets > end - start:
+            bucket_width = (end - start) / max_buckets
+            buckets = minmax_buckets(executions['start'], executions['time'], start, end, max_buckets,
+                                     quantiles=[0.99])
+        else:
+            bucket_level = pyramid.level_for(start, end, max_buckets)
+            bucket_width = pyramid.width(bucket_level)
+            buckets = pyramid.query(bucket_level, start, end, groups=pyramid.group_codes(events=[event]),
+                                    quantiles=[0.99])
+        x_values = buckets['start'] + bucket_width / 2
+        band = 'rgba({}, {}, {}, 0.2)'.format(*px.colors.hex_to_rgb(color))
+        
+        fig.add_trace(Scatter(x=x_values, y=buckets['max'], mode='lines', line=dict(width=0),
+                              legendgroup=event, showlegend=False, hoverinfo='skip'))
+        fig.add_trace(Scatter(x=x_values, y=buckets['min'], mode='lines', line=dict(width=0),
+                              fill='tonexty', fillcolor=band, legendgroup=event, showlegend=False,
+                              hoverinfo='skip'))
+        fig.add_trace(Scatter(
+            x=x_values,
+            y=buckets['mean'],
+            mode='lines',
+            name=event,
+            legendgroup=event,
+            line=dict(width=2, color=color),
+            customdata=np.column_stack([buckets['count'], buckets['min'], buckets['max'], buckets['p99']]),
+            hovertemplate=("%{x:.4s} ns<br>Mean: %{y:,.0f} ns<br>Min – max: %{customdata[1]:,.0f} – "
+                           "%{customdata[2]:,.0f} ns<br>p99: %{customdata[3]:,.0f} ns<br>"
+                           "%{customdata[0]:,} executions<extra>%{fullData.name}</extra>")
+        ))
+    
+    if bucket_width is not None:
+        fig.add_annotation(
+            text=f"Executions summarized per {format_trace_time(bucket_width)} bucket "
+                 f"(mean, min–max band) — zoom in for individual executions",
+            xref='paper', yref='paper', x=1, y=1.08, showarrow=False, font=dict(size=10)
+        )
     
     fig.update_layout(
         title='Execution Time Trends Over Time',
-        xaxis_title='Execution Instance',
+        xaxis_title='Start Time (ns)',
         yaxis_title='Execution Time (ns)',  # Changed from μs to ns
+        xaxis_range=list(x_range) if x_range else None,
         height=400,
-        template='plotly_white'
+        template='plotly_white',
+        # Keep the user's zoom when the figure is re-queried for it
+        uirevision=f"{dataset_handle or 'sample'}:{time_window}"
     )
     
     return fig
 
+@app.callback(
+    Output('utilization-chart', 'figure'),
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data'),
+    Input('utilization-chart', 'relayoutData')
+)
+def update_utilization(dataset_handle, time_window, relayout_data):
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    
+    # Zooming re-reads the pyramid at the level that fits the visible range
+    x_range = None
+    if triggered_id == 'utilization-chart':
+        if not relayout_data or not any(key.startswith('xaxis.') for key in relayout_data):
+            return dash.no_update
+        x_range = relayout_x_range(relayout_data)
+    
+    timing_data = load_timing_data(dataset_handle)
+    
+    if timing_data is None or timing_data.empty:
+        return px.density_heatmap(title="No data available")
+    
+    pyramid = timeline_pyramid(timing_data)
+    
+    if pyramid is None or not pyramid.levels:
+        return px.density_heatmap(title="No execution data found")
+    
+    x_range = timeline_range(time_window, x_range)
+    start, end = x_range or pyramid.span
+    level = pyramid.level_for(start, end, UTILIZATION_MAX_BUCKETS)
+    width = pyramid.width(level)
+    
+    # One column per bucket of the level across the visible range, empty buckets included
+    first = max(int((start - pyramid.origin) // width), 0)
+    last = max(min(int((end - pyramid.origin) // width), (pyramid.buckets >> level) - 1), first)
+    x_values = pyramid.origin + (np.arange(first, last + 1) + 0.5) * width
+    
+    devices = list(dict.fromkeys(device for device, _ in pyramid.groups))
+    busy = np.zeros((len(devices), len(x_values)))
+    for row, device in enumerate(devices):
+        # Each execution's time is spread over the buckets it runs in
+        bucket_starts, busy_ns = pyramid.busy(level, start, end, groups=pyramid.group_codes(devices=[device]))
+        busy[row, (bucket_starts - pyramid.origin) // width - first] = 100 * busy_ns / width
+    
+    fig = go.Figure(go.Heatmap(
+        x=x_values,
+        y=[str(device) if device is not None else "All events" for device in devices],
+        z=busy,
+        zmin=0,
+        zmax=100,
+        colorscale='YlOrRd',
+        colorbar=dict(title="Busy %"),
+        hovertemplate="%{y}<br>%{x:.4s} ns<br>Busy: %{z:.1f}%<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        title=f'Device Utilization per {format_trace_time(width)} Bucket',
+        xaxis_title='Time (ns)',
+        yaxis_title='Device',
+        xaxis_range=list(x_range) if x_range else None,
+        height=max(300, 40 * len(devices) + 150),
+        template='plotly_white',
+        uirevision=f"{dataset_handle or 'sample'}:{time_window}"
+    )
+    
+    return fig
+
+def resolve_live_tail_path(name):
+    """Absolute path of a capture file under LIVE_TAIL_DIR, or None if it points elsewhere"""
+    root = os.path.realpath(LIVE_TAIL_DIR)
+    path = os.path.realpath(os.path.join(root, (name or '').strip()))
+    if os.path.commonpath([root, path]) != root or os.path.isdir(path):
+        return None
+    return path
+
+@app.callback(
+    [Output('live-tail-file', 'data'),
+     Output('live-tail-interval', 'disabled'),
+     Output('live-tail-status', 'children')],
+    [Input('live-tail-start', 'n_clicks'),
+     Input('live-tail-stop', 'n_clicks')],
+    [State('live-tail-path', 'value'),
+     State('live-tail-file', 'data')],
+    prevent_initial_call=True
+)
+def toggle_live_tail(start_clicks, stop_clicks, name, following):
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    
+    if triggered_id == 'live-tail-stop':
+        # Its state is dropped; another tab still following the file starts over on its next tick
+        if following:
+            release_live_tail(following)
+        return None, True, dbc.Alert("Live tail stopped", color="secondary")
+    
+    path = resolve_live_tail_path(name)
+    if path is None:
+        return None, True, dbc.Alert(f"Capture files must be inside {LIVE_TAIL_DIR}/", color="danger")
+    
+    status = "Following" if os.path.exists(path) else "Waiting for"
+    return path, False, dbc.Alert(f"{status} {os.path.relpath(path, os.path.realpath(LIVE_TAIL_DIR))}", color="info")
+
+def live_tail_stats_table(tail):
+    """Running per-event statistics of a live tail"""
+    summary = tail.event_summary()
+    table = dbc.Table([
+        html.Thead(html.Tr([html.Th("Event"), html.Th("Count"), html.Th("Mean (ns)"), html.Th("Std (ns)"),
+                            html.Th("Min (ns)"), html.Th("Max (ns)"), html.Th("Percentiles")])),
+        html.Tbody([
+            html.Tr([html.Td(event), html.Td(f"{stats.count:,}"), html.Td(f"{stats.mean:.1f}"),
+                     html.Td(f"{stats.std:.1f}"), html.Td(f"{stats.min:.0f}"), html.Td(f"{stats.max:.0f}"),
+                     html.Td(format_percentiles(stats.sketch))])
+            for event, stats in summary.items()
+        ])
+    ], bordered=True, size='sm', striped=True) if summary else html.P(f"{tail.rows:,} rows, no completed executions yet")
+    if not tail.skipped_lines:
+        return table
+    return html.Div([
+        html.P(f"⚠️ {tail.skipped_lines:,} lines longer than {MAX_POLL_BYTES // 1024 ** 2} MB skipped",
+               className="text-warning small"),
+        table
+    ])
+
+@app.callback(
+    [Output('live-trends-chart', 'figure'),
+     Output('live-trends-chart', 'extendData'),
+     Output('live-tail-cursors', 'data'),
+     Output('live-tail-stats', 'children')],
+    [Input('live-tail-interval', 'n_intervals'),
+     Input('live-tail-file', 'data')],
+    State('live-tail-cursors', 'data')
+)
+def update_live_tail(n_intervals, path, cursors):
+    if not path:
+        return px.line(title="Live tail not running"), dash.no_update, None, None
+    
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+    
+    # Only the bytes appended since the last tick are parsed
+    tail = get_live_tail(path)
+    tail.poll()
+    events = tail.events()
+    
+    # A new or truncated file, a new event type or a restarted tail redraws the chart;
+    # otherwise only new points are sent
+    if (triggered_id == 'live-tail-file' or not cursors or cursors['events'] != events
+            or cursors['restarts'] != tail.restarts or cursors.get('tail') != tail.generation):
+        fig = go.Figure()
+        counts = []
+        for event in events:
+            first, times = tail.recent(event)
+            fig.add_trace(go.Scatter(
+                x=np.arange(first, first + len(times)),
+                y=times,
+                mode='lines',
+                name=event
+            ))
+            counts.append(first + len(times))
+        fig.update_layout(
+            title='Live Execution Time Trends',
+            xaxis_title='Execution Instance',
+            yaxis_title='Execution Time (ns)',
+            height=350,
+            template='plotly_white',
+            uirevision=path
+        )
+        cursors = {'events': events, 'counts': counts, 'restarts': tail.restarts, 'tail': tail.generation}
+        return fig, dash.no_update, cursors, live_tail_stats_table(tail)
+    
+    x_values, y_values, trace_indices, counts = [], [], [], []
+    for index, (event, since) in enumerate(zip(events, cursors['counts'])):
+        first, times = tail.recent(event, since=since)
+        counts.append(first + len(times))
+        if len(times):
+            x_values.append(list(range(first, first + len(times))))
+            y_values.append(times.tolist())
+            trace_indices.append(index)
+    
+    if not trace_indices:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+    
+    # Traces keep at most as many points as the tail retains
+    extend = ({'x': x_values, 'y': y_values}, trace_indices, LIVE_HISTORY)
+    cursors = {'events': events, 'counts': counts, 'restarts': tail.restarts, 'tail': tail.generation}
+    return dash.no_update, extend, cursors, live_tail_stats_table(tail)
+
+@app.callback(
+    [Output('live-stream-counters', 'children'),
+     Output('live-stream-stats', 'children')],
+    [Input('live-stream-interval', 'n_intervals'),
+     Input('live-stream-window', 'value')]
+)
+def update_live_stream(n_intervals, window):
+    if event_stream is None:
+        return "", html.P("Set LIVE_TCP_PORT or LIVE_UDP_PORT to receive events over a socket.",
+                          className="text-muted")
+    
+    counters = event_stream.stats()
+    summary = (f"{counters['buffered_rows']:,} of {counters['capacity']:,} rows buffered · "
+               f"{counters['received_rows']:,} received · {counters['evicted_rows']:,} evicted · "
+               f"{counters['dropped_rows']:,} dropped · {counters['backpressure_waits']:,} backpressure waits · "
+               f"{counters['malformed_rows']:,} malformed")
+    
+    # Same execution semantics as the uploaded traces, over the rolling window only. The
+    # analysis runs once per new batch of rows, and in-process: a request thread must not
+    # start the process pool
+    buffer = event_stream.buffer
+    
+    def compute():
+        window_data = buffer.snapshot(None if window == 'all' else float(window), max_rows=LIVE_ANALYSIS_ROWS)
+        return 'Device_ID' in window_data.columns, analyze_execution_timing(window_data, parallel=False)
+    
+    has_device_info, stats = live_stream_cache.get_or_compute((buffer.written, window), compute)
+    if not stats:
+        return summary, html.P("No completed executions in this window yet.")
+    
+    rows = ([(device, event, event_stats) for device, device_stats in stats.items()
+             for event, event_stats in device_stats.items()]
+            if has_device_info else
+            [("-", event, event_stats) for event, event_stats in stats.items()])
+    
+    table = dbc.Table([
+        html.Thead(html.Tr([html.Th("Device"), html.Th("Event"), html.Th("Count"), html.Th("Mean (ns)"),
+                            html.Th("Std (ns)"), html.Th("Min (ns)"), html.Th("Max (ns)"), html.Th("p99 (ns)")])),
+        html.Tbody([
+            html.Tr([html.Td(str(device)), html.Td(event), html.Td(f"{event_stats['count']:,}"),
+                     html.Td(f"{event_stats['mean_ns']:.1f}"), html.Td(f"{event_stats['std_ns']:.1f}"),
+                     html.Td(f"{event_stats['min_ns']:.0f}"), html.Td(f"{event_stats['max_ns']:.0f}"),
+                     html.Td(f"{event_stats['p99_ns']:.0f}")])
+            for device, event, event_stats in rows
+        ])
+    ], bordered=True, size='sm', striped=True)
+    return summary, table
+
 @app.callback(
     Output('time-distribution-chart', 'figure'),
-    Input('upload-data', 'contents')
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data'),
+    Input('distribution-bins', 'value'),
+    Input('distribution-options', 'value')
 )
-def update_time_distribution(contents):
-    global timing_data
+def update_time_distribution(dataset_handle, time_window, bins, options):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     if timing_data is None or timing_data.empty:
         return px.histogram(title="No data available")
     
-    stats = analyze_execution_timing(timing_data)
+    # Execution times per event (all devices combined)
+    event_times = {event: executions['time']
+                   for event, executions in cached_analysis(analyze_execution_trends, timing_data).items()}
     
-    if not stats:
+    if not event_times:
         return px.histogram(title="No execution data found")
     
-    # Check if the DataFrame has device information
-    has_device_info = 'Device_ID' in timing_data.columns
+    # Bin on the server with edges shared by every event; only the bars are sent
+    bins = int(min(max(bins or 30, 1), MAX_HISTOGRAM_BINS))
+    log_bins = 'log' in (options or [])
+    edges = histogram_edges(event_times.values(), bins=bins, log=log_bins)
     
-    # Combine all execution times
-    all_times = []
-    all_events = []
+    if edges is None:
+        return px.histogram(title="No execution data found")
     
-    if has_device_info:
-        for device, device_stats in stats.items():
-            for event, event_data in device_stats.items():
-                times_ns = [ex['time'] for ex in event_data['executions']]  # Keep as nanoseconds
-                all_times.extend(times_ns)
-                all_events.extend([event] * len(times_ns))
-    else:
-        for event, data in stats.items():
-            times_ns = [ex['time'] for ex in data['executions']]  # Keep as nanoseconds
-            all_times.extend(times_ns)
-            all_events.extend([event] * len(times_ns))
-    
-    df_dist = pd.DataFrame({
-        'Execution_Time_ns': all_times,
-        'Event': all_events
-    })
+    # Log-spaced bins are drawn on a log10 axis so every bar has the same width
+    positions = np.log10(edges) if log_bins else edges
+    centers = (positions[:-1] + positions[1:]) / 2
+    widths = np.diff(positions)
+    ranges = np.column_stack([edges[:-1], edges[1:]])
+    colors = px.colors.qualitative.Plotly
     
-    fig = px.histogram(
-        df_dist,
-        x='Execution_Time_ns',  # Fixed typo from Execution_Time_un
-        color='Event',
-        title='Execution Time Distribution',
-        labels={'Execution_Time_ns': 'Execution Time (ns)', 'count': 'Frequency'},
-        nbins=30
-    )
+    fig = go.Figure()
+    for i, (event, times) in enumerate(event_times.items()):
+        fig.add_trace(go.Bar(
+            x=centers,
+            y=histogram_counts(times, edges),
+            width=widths,
+            name=str(event),
+            marker_color=colors[i % len(colors)],
+            customdata=ranges,
+            hovertemplate="%{customdata[0]:.4s} – %{customdata[1]:.4s} ns<br>Frequency: %{y}<extra>%{fullData.name}</extra>"
+        ))
     
     fig.update_layout(
+        title='Execution Time Distribution',
+        xaxis_title='Execution Time (ns)',
+        yaxis_title='Frequency',
         height=400,
         template='plotly_white',
-        barmode='overlay'
+        barmode='overlay',
+        bargap=0
     )
     fig.update_traces(opacity=0.7)
     
+    if log_bins:
+        decades = np.arange(np.floor(positions[0]), np.ceil(positions[-1]) + 1)
+        fig.update_xaxes(tickvals=decades, ticktext=[f"{10 ** decade:.0e}" for decade in decades],
+                         title='Execution Time (ns, log scale)')
+        # Zero-length executions have no place on a log axis
+        non_positive = sum(int(np.sum(times <= 0)) for times in event_times.values())
+        if non_positive:
+            fig.add_annotation(text=f"{non_positive:,} executions ≤ 0 ns not shown", xref='paper', yref='paper',
+                               x=1, y=1.08, showarrow=False, font=dict(size=10))
+    
     return fig
 
+def analyze_execution_boxes(df):
+    """Box plot summaries of execution times per (device, event), or per event without devices"""
+    stats = cached_analysis(analyze_execution_timing, df)
+    if 'Device_ID' not in df.columns:
+        return {(None, event): box_statistics(data['executions']['time'], BOX_MAX_OUTLIERS)
+                for event, data in stats.items()}
+    return {
+        (device, event): box_statistics(event_data['executions']['time'], BOX_MAX_OUTLIERS)
+        for device, device_stats in stats.items()
+        for event, event_data in device_stats.items()
+    }
+
 @app.callback(
     Output('detailed-timing-chart', 'figure'),
-    Input('upload-data', 'contents')
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data')
 )
-def update_detailed_timing(contents):
-    global timing_data
+def update_detailed_timing(dataset_handle, time_window):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     if timing_data is None or timing_data.empty:
         return px.box(title="No data available")
     
-    stats = analyze_execution_timing(timing_data)
+    boxes = cached_analysis(analyze_execution_boxes, timing_data)
+    boxes = {key: box for key, box in boxes.items() if box is not None}
     
-    if not stats:
+    if not boxes:
         return px.box(title="No execution data found")
     
     # Check if the DataFrame has device information
     has_device_info = 'Device_ID' in timing_data.columns
     
-    # Create box plot data
-    all_times = []
-    all_events = []
-    all_devices = []
+    # One box trace per device (a single trace without devices), drawn from
+    # precomputed quartiles and fences plus a capped sample of outliers
+    traces = {}
+    for (device, event), box in boxes.items():
+        traces.setdefault(device, []).append((event, box))
     
-    if has_device_info:
-        for device, device_stats in stats.items():
-            for event, event_data in device_stats.items():
-                times_ns = [ex['time'] for ex in event_data['executions']]  # Keep as nanoseconds
-                all_times.extend(times_ns)
-                all_events.extend([event] * len(times_ns))
-                all_devices.extend([device] * len(times_ns))
-        
-        df_box = pd.DataFrame({
-            'Execution_Time_ns': all_times,  # Changed from Execution_Time_ns
-            'Event': all_events,
-            'Device': all_devices
-        })
-        
-        fig = px.box(
-            df_box,
-            x='Event',
-            y='Execution_Time_ns',  # Changed from Execution_Time_ns
-            color='Device',
-            title='Detailed Execution Time Analysis by Device',
-            labels={'Execution_Time_ns': 'Execution Time (ns)'}  # Changed from μs to ns
-        )
-    else:
-        for event, data in stats.items():
-            times_ns = [ex['time'] for ex in data['executions']]  # Keep as nanoseconds
-            all_times.extend(times_ns)
-            all_events.extend([event] * len(times_ns))
+    colors = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    
+    for i, (device, device_boxes) in enumerate(traces.items()):
+        name = str(device) if has_device_info else 'Execution Time'
+        color = colors[i % len(colors)]
+        events = [str(event) for event, _ in device_boxes]
         
-        df_box = pd.DataFrame({
-            'Execution_Time_ns': all_times,  # Changed from Execution_Time_ns
-            'Event': all_events
-        })
+        fig.add_trace(go.Box(
+            x=events,
+            q1=[box['q1'] for _, box in device_boxes],
+            median=[box['median'] for _, box in device_boxes],
+            q3=[box['q3'] for _, box in device_boxes],
+            lowerfence=[box['lowerfence'] for _, box in device_boxes],
+            upperfence=[box['upperfence'] for _, box in device_boxes],
+            name=name,
+            legendgroup=name,
+            offsetgroup=name,
+            marker_color=color,
+            showlegend=has_device_info
+        ))
         
-        fig = px.box(
-            df_box,
-            x='Event',
-            y='Execution_Time_ns',  # Changed from Execution_Time_ns
-            title='Detailed Execution Time Analysis (Box Plot)',
-            labels={'Execution_Time_ns': 'Execution Time (ns)'}  # Changed from μs to ns
-        )
+        outliers = [box['outliers'] for _, box in device_boxes]
+        if sum(len(points) for points in outliers):
+            fig.add_trace(go.Scatter(
+                x=np.repeat(events, [len(points) for points in outliers]),
+                y=np.concatenate(outliers),
+                mode='markers',
+                name=name,
+                legendgroup=name,
+                offsetgroup=name,
+                marker=dict(color=color, size=4),
+                showlegend=False,
+                hovertemplate="%{x}: %{y} ns<extra>" + name + " outlier</extra>"
+            ))
     
     fig.update_layout(
+        title='Detailed Execution Time Analysis by Device' if has_device_info else 'Detailed Execution Time Analysis (Box Plot)',
+        xaxis_title='Event',
+        yaxis_title='Execution Time (ns)',  # Changed from μs to ns
         height=400,
         template='plotly_white',
-        xaxis_tickangle=-45
+        xaxis_tickangle=-45,
+        boxmode='group',
+        # Outlier markers line up with their device's box
+        scattermode='group'
     )
     
     return fig
@@ -1136,15 +1777,17 @@ def update_detailed_timing(contents):
 @app.callback(
     [Output('device-topology-stats', 'children'),
      Output('device-topology-chart', 'figure'),
-     Output('device-selector', 'options')],
-    Input('upload-data', 'contents')
+     Output('device-selector', 'options'),
+     Output('topology-store', 'data')],
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data')
 )
-def update_device_topology(contents):
-    global timing_data
+def update_device_topology(dataset_handle, time_window):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     if timing_data is None or timing_data.empty or 'Device_ID' not in timing_data.columns:
         empty_fig = px.bar(title="No device topology data available")
-        return html.P("No device topology data available"), empty_fig, []
+        return html.P("No device topology data available"), empty_fig, [], topology_figure_replaced()
     
     # Count devices and their positions
     devices = timing_data['Device_ID'].unique()
@@ -1166,7 +1809,8 @@ def update_device_topology(contents):
         sorted_positions = [d[1] for d in sorted_devices]
         
         # Create interactive topology visualization
-        # Use networkx for the graph layout
+        # Use networkx for the graph layout (imported on first use to keep startup fast)
+        import networkx as nx
         G = nx.Graph()
         
         # Add nodes and edges to the graph
@@ -1257,7 +1901,7 @@ def update_device_topology(contents):
         # Create options for device selector dropdown
         options = [{'label': device, 'value': device} for device in sorted_device_ids]
         
-        return html.Div(summary), fig, options
+        return html.Div(summary), fig, options, topology_figure_replaced()
     else:
         # Basic visualization without position data
         fig = go.Figure()
@@ -1311,36 +1955,35 @@ def update_device_topology(contents):
         # Create options for device selector dropdown
         options = [{'label': device, 'value': device} for device in devices]
         
-        return html.Div(summary), fig, options
+        return html.Div(summary), fig, options, topology_figure_replaced()
 
 @app.callback(
     [Output('device-comparison-stats', 'children'),
      Output('device-comparison-chart', 'figure')],
-    [Input('device-selector', 'value')]
+    [Input('device-selector', 'value'),
+     Input('time-window', 'data')],
+    [State('dataset-handle', 'data')]
 )
-def update_device_comparison(selected_devices):
-    global timing_data
+def update_device_comparison(selected_devices, time_window, dataset_handle):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     if timing_data is None or timing_data.empty or 'Device_ID' not in timing_data.columns or not selected_devices:
         empty_fig = px.bar(title="No devices selected for comparison")
         return html.P("Please select devices to compare"), empty_fig
     
-    # Filter data for selected devices
-    selected_df = timing_data[timing_data['Device_ID'].isin(selected_devices)]
-    
     # Compare execution times for different events across devices
     event_device_stats = {}
     
+    # Per-device results are independent, so reuse the shared analysis of the whole dataset
+    stats = cached_analysis(analyze_execution_timing, timing_data)
+    
     for device in selected_devices:
-        device_df = timing_data[timing_data['Device_ID'] == device]
-        stats = analyze_execution_timing(device_df)
-        
         # In this case, stats has a nested structure with device as the first key
         if device in stats:
             for event, event_stats in stats[device].items():
                 if event not in event_device_stats:
                     event_device_stats[event] = {}
-                event_device_stats[event][device] = event_stats['mean_ns'] / 1000  # Convert to microseconds
+                event_device_stats[event][device] = event_stats
     
     # Create comparison chart
     fig = go.Figure()
@@ -1348,7 +1991,11 @@ def update_device_comparison(selected_devices):
     for event, devices in event_device_stats.items():
         fig.add_trace(go.Bar(
             x=list(devices.keys()),
-            y=list(devices.values()),
+            y=[event_stats['mean_ns'] / 1000 for event_stats in devices.values()],  # Convert to microseconds
+            customdata=[[event_stats[f"{name}_ns"] / 1000 for name, _ in LATENCY_PERCENTILES]
+                        for event_stats in devices.values()],
+            hovertemplate="%{x}<br>Mean: %{y:.3f} μs<br>p50: %{customdata[0]:.3f} μs<br>p90: %{customdata[1]:.3f} μs"
+                          "<br>p99: %{customdata[2]:.3f} μs<br>p99.9: %{customdata[3]:.3f} μs",
             name=event
         ))
     
@@ -1365,32 +2012,32 @@ def update_device_comparison(selected_devices):
     summary = []
     
     for device in selected_devices:
-        device_df = timing_data[timing_data['Device_ID'] == device]
-        device_stats = analyze_execution_timing(device_df)
-        
-        if device in device_stats:
-            event_count = sum(stat['count'] for stat in device_stats[device].values())
-            avg_times = [stat['mean_ns'] for stat in device_stats[device].values()]
+        if device in stats:
+            event_count = sum(stat['count'] for stat in stats[device].values())
+            avg_times = [stat['mean_ns'] for stat in stats[device].values()]
             avg_exec_time = f"{np.mean(avg_times):.1f} ns"
+            tail_latency = format_percentiles(merged_sketch(stats[device].values()))
             
-            summary.append(html.P(f"{device}: {event_count} events, Avg Time: {avg_exec_time}"))
+            summary.append(html.P([f"{device}: {event_count} events, Avg Time: {avg_exec_time}",
+                                   html.Br(), html.Small(tail_latency, className="text-muted")]))
     
     return html.Div(summary), fig
 
 @app.callback(
     [Output('sync-stats', 'children'),
      Output('sync-chart', 'figure')],
-    Input('upload-data', 'contents')
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data')
 )
-def update_synchronicity_analysis(contents):
-    global timing_data
+def update_synchronicity_analysis(dataset_handle, time_window):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     if timing_data is None or timing_data.empty or 'Device_ID' not in timing_data.columns:
         empty_fig = px.bar(title="No synchronicity data available")
         return html.P("No synchronicity data available"), empty_fig
     
     # Analyze synchronicity
-    sync_stats = analyze_synchronicity(timing_data)
+    sync_stats = cached_analysis(analyze_synchronicity, timing_data)
     
     if not sync_stats:
         empty_fig = px.bar(title="No synchronization events found")
@@ -1458,11 +2105,7 @@ def update_synchronicity_analysis(contents):
     overall_avg = np.mean(all_mean_diffs) / 1000
     
     # Count number of devices involved in synchronization
-    devices_involved = set()
-    for sync_id, stats in sync_stats.items():
-        for detail in stats['details']:
-            devices_involved.add(detail['device1'])
-            devices_involved.add(detail['device2'])
+    devices_involved = pd.unique(np.concatenate([stats['devices'] for stats in sync_stats.values()]))
     
     summary = [
         html.H5("Synchronicity Analysis"),
@@ -1471,52 +2114,78 @@ def update_synchronicity_analysis(contents):
         html.P(f"Average sync difference: {overall_avg:.2f} ns"),  # Changed from μs to ns
         html.P(f"Maximum sync difference: {overall_max:.2f} ns"),  # Changed from μs to ns
         html.Hr(),
-        html.P("Lower values indicate better synchronization between devices")
+        html.P("Lower values indicate better synchronization between devices. Click a pulse for device details.")
     ]
     
     return html.Div(summary), fig
 
+@app.callback(
+    Output('sync-pulse-details', 'children'),
+    Input('sync-chart', 'clickData'),
+    State('dataset-handle', 'data'),
+    State('time-window', 'data'),
+    prevent_initial_call=True
+)
+def show_sync_pulse_details(click_data, dataset_handle, time_window):
+    """Per-device offsets and the largest pairwise differences for a clicked sync pulse"""
+    if not click_data or not click_data.get('points'):
+        return None
+    
+    timing_data = load_window_data(dataset_handle, time_window)
+    if timing_data is None or timing_data.empty or 'Device_ID' not in timing_data.columns:
+        return None
+    
+    sync_id = click_data['points'][0]['x']
+    pulse_stats = cached_analysis(analyze_synchronicity, timing_data).get(sync_id)
+    if pulse_stats is None:
+        return None
+    
+    # Pairwise differences are only built for the chosen pulse
+    pairs = sync_pulse_pairs(pulse_stats).nlargest(10, 'time_diff_ns')
+    offsets = pulse_stats['offsets_ns']
+    details = [html.H6(f"{sync_id}: {pulse_stats['device_count']} devices")]
+    if not np.isnan(offsets).all():
+        earliest, latest = np.nanargmin(offsets), np.nanargmax(offsets)
+        details.append(html.P(f"Earliest: {pulse_stats['devices'][earliest]} ({offsets[earliest]:+.2f} ns from median), "
+                              f"latest: {pulse_stats['devices'][latest]} ({offsets[latest]:+.2f} ns from median)"))
+    
+    return html.Div(details + [
+        dbc.Table([
+            html.Thead(html.Tr([html.Th("Device 1"), html.Th("Device 2"), html.Th("Difference (ns)")])),
+            html.Tbody([
+                html.Tr([html.Td(str(row.device1)), html.Td(str(row.device2)), html.Td(f"{row.time_diff_ns:.2f}")])
+                for row in pairs.itertuples()
+            ])
+        ], bordered=True, size='sm', striped=True)
+    ])
+
 @app.callback(
     [Output('comm-stats', 'children'),
      Output('comm-chart', 'figure')],
-    Input('upload-data', 'contents')
+    Input('dataset-handle', 'data'),
+    Input('time-window', 'data')
 )
-def update_communication_analysis(contents):
-    global timing_data
+def update_communication_analysis(dataset_handle, time_window):
+    timing_data = load_window_data(dataset_handle, time_window)
     
     if timing_data is None or timing_data.empty or 'Device_ID' not in timing_data.columns:
         empty_fig = px.bar(title="No communication data available")
         return html.P("No communication data available"), empty_fig
     
     # Analyze communication times
-    comm_stats = analyze_communication_time(timing_data)
+    comm_stats = cached_analysis(analyze_communication_time, timing_data)
     
-    if not comm_stats:
+    if comm_stats.empty:
         empty_fig = px.bar(title="No communication events found")
         return html.P("No communication events found in the data"), empty_fig
     
-    # Collect data for visualization
-    message_ids = []
-    source_devices = []
-    destination_devices = []
-    comm_times = []
-    hop_counts = []
-    
-    for message_id, stats in comm_stats.items():
-        for prop in stats['propagation_details']:
-            message_ids.append(message_id)
-            source_devices.append(prop['from_device'])
-            destination_devices.append(prop['to_device'])
-            comm_times.append(prop['time_ns'] / 1000)  # Convert to microseconds
-            hop_counts.append(prop['hops'])
-    
     # Create dataframe for visualization
     df_comm = pd.DataFrame({
-        'Message_ID': message_ids,
-        'Source': source_devices,
-        'Destination': destination_devices,
-        'Time_ns': comm_times,
-        'Hops': hop_counts
+        'Message_ID': comm_stats['message_id'],
+        'Source': comm_stats['from_device'],
+        'Destination': comm_stats['to_device'],
+        'Time_ns': comm_stats['time_ns'] / 1000,  # Convert to microseconds
+        'Hops': comm_stats['hops']
     })
     
     # Create scatter plot of communication time vs. hop count
@@ -1528,7 +2197,8 @@ def update_communication_analysis(contents):
         hover_data=['Destination', 'Message_ID'],
         title='Communication Time vs. Distance (Hops)',
         labels={'Time_ns': 'Communication Time (ns)', 'Hops': 'Number of Hops'},
-        trendline='ols'  # Add trendline
+        trendline='ols',  # Add trendline
+        render_mode='webgl' if len(df_comm) >= WEBGL_MIN_POINTS else 'svg'
     )
     
     fig.update_layout(
@@ -1540,7 +2210,7 @@ def update_communication_analysis(contents):
     avg_time_per_hop = df_comm['Time_ns'].sum() / df_comm['Hops'].sum() if df_comm['Hops'].sum() > 0 else 0
     
     # Calculate average communication times between each device pair
-    device_pairs = df_comm.groupby(['Source', 'Destination']).agg({
+    device_pairs = df_comm.groupby(['Source', 'Destination'], observed=True).agg({
         'Time_ns': 'mean',
         'Hops': 'mean'
     }).reset_index()
@@ -1554,7 +2224,7 @@ def update_communication_analysis(contents):
     
     summary = [
         html.H5("Communication Time Analysis"),
-        html.P(f"Total messages analyzed: {len(message_ids)}"),
+        html.P(f"Total messages analyzed: {len(df_comm)}"),
         html.P(f"Average time per hop: {avg_time_per_hop:.2f} ns"),  # Changed from μs to ns
         html.Hr(),
         html.P("Average communication times:"),
@@ -1568,28 +2238,49 @@ def update_communication_analysis(contents):
 @app.callback(
     [Output('device-topology-chart', 'figure', allow_duplicate=True),
      Output('topology-status', 'children'),
-     Output('topology-store', 'data', allow_duplicate=True)],
+     Output('topology-store', 'data', allow_duplicate=True),
+     Output('connection-source', 'options'),
+     Output('connection-target', 'options'),
+     Output('current-connections-list', 'children', allow_duplicate=True),
+     Output('topology-connections', 'data', allow_duplicate=True),
+     Output('topology-redraw', 'data', allow_duplicate=True)],
     [Input('topology-mode', 'value'),
      Input('reset-layout-btn', 'n_clicks'),
      Input('layout-options', 'value')],
     [State('topology-store', 'data'),
-     State('custom-positions-store', 'data')],
+     State('custom-positions-store', 'data'),
+     State('dataset-handle', 'data'),
+     State('time-window', 'data')],
     prevent_initial_call=True
 )
-def update_topology_mode(topology_mode, reset_clicks, layout_options, topology_data, custom_positions):
+def update_topology_mode(topology_mode, reset_clicks, layout_options, topology_data, custom_positions, dataset_handle,
+                         time_window):
     """Update topology visualization based on selected mode and options"""
-    global timing_data
-    
-    if timing_data is None or timing_data.empty or 'Device_ID' not in timing_data.columns:
-        return {}, html.P("No device data available"), {}
-    
     ctx = dash.callback_context
     triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
     
+    # Toggling an option of the topology on display only restyles it; nothing is laid out again.
+    # Without positioned devices there is no node trace to restyle
+    if (triggered_id == 'layout-options' and topology_data and topology_data.get('interactive_figure')
+            and topology_data.get('mode') == topology_mode
+            and any(device in topology_data['positions'] for device in topology_data['devices'])):
+        num_connections = topology_data.get('num_connections', 0)
+        fig = topology_options_patch(layout_options, len(topology_data['devices']), num_connections)
+        status = dbc.Alert(f"Topology updated to {topology_mode} mode with {num_connections} connections",
+                           color="success", dismissable=True)
+        return (fig, status, dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update,
+                dash.no_update)
+    
+    timing_data = load_window_data(dataset_handle, time_window)
+    
+    if timing_data is None or timing_data.empty or 'Device_ID' not in timing_data.columns:
+        return {}, html.P("No device data available"), {}, [], [], [], [], dash.no_update
+    
     devices = timing_data['Device_ID'].unique()
     num_devices = len(devices)
     
     # Create networkx graph based on topology mode
+    import networkx as nx
     G = nx.Graph()
     for device in devices:
         G.add_node(device)
@@ -1633,39 +2324,58 @@ def update_topology_mode(topology_mode, reset_clicks, layout_options, topology_d
             pos = custom_positions
         else:
             pos = nx.spring_layout(G, k=2, iterations=50)
-        # Use existing connections from topology_data
-        if topology_data and 'connections' in topology_data:
-            for connection in topology_data['connections']:
-                G.add_edge(connection['source'], connection['target'])
+        # The existing connections are kept; they are drawn from the browser's copy (see redraw_topology),
+        # which also counts them again
+        num_connections = (topology_data or {}).get('num_connections', 0)
+        new_topology_data = {'mode': topology_mode, 'positions': pos, 'devices': list(devices), 'degrees': {},
+                             'drawn': 0, 'num_connections': num_connections, 'interactive_figure': False}
+        status = dbc.Alert(f"Topology updated to {topology_mode} mode with {num_connections} connections",
+                           color="success", dismissable=True)
+        options = [{'label': device, 'value': device} for device in devices]
+        return (dash.no_update, status, new_topology_data, options, options, dash.no_update, dash.no_update,
+                uuid.uuid4().hex)
     
     # Create the interactive figure
     fig = create_interactive_topology_figure(G, pos, layout_options, topology_mode)
     
     # Update topology store
-    new_topology_data = {
-        'mode': topology_mode,
-        'positions': pos,
-        'connections': [{'source': edge[0], 'target': edge[1]} for edge in G.edges()],
-        'devices': list(devices)
-    }
+    connections = [{'source': edge[0], 'target': edge[1]} for edge in G.edges()]
+    new_topology_data = topology_store_data(topology_mode, pos, list(devices), connections)
     
     status = dbc.Alert(f"Topology updated to {topology_mode} mode with {len(G.edges())} connections", 
                       color="success", dismissable=True)
     
-    return fig, status, new_topology_data
-
-@app.callback(
-    [Output('connection-source', 'options'),
-     Output('connection-target', 'options')],
-    Input('topology-store', 'data')
-)
-def update_connection_dropdowns(topology_data):
-    """Update connection dropdown options based on available devices"""
-    if not topology_data or 'devices' not in topology_data:
-        return [], []
+    # The connection editor is filled here, where the devices and connections are replaced, so that
+    # edits only send what they change
+    options = [{'label': device, 'value': device} for device in devices]
+    connection_items = [connection_item(connection) for connection in connections]
     
-    options = [{'label': device, 'value': device} for device in topology_data['devices']]
-    return options, options
+    return fig, status, new_topology_data, options, options, connection_items, connections, dash.no_update
+
+def topology_store_data(mode, positions, devices, connections):
+    """Topology store contents for an interactive topology drawn in full.
+    
+    The store holds what an edit needs: device degrees and the number of connections drawn
+    (those between positioned devices) are counted here once, so that edits need neither the
+    list of connections nor a scan of it.
+    """
+    degrees = dict.fromkeys(devices, 0)
+    drawn = 0
+    for connection in connections:
+        source, target = connection['source'], connection['target']
+        degrees[source] = degrees.get(source, 0) + 1
+        degrees[target] = degrees.get(target, 0) + 1
+        drawn += source in positions and target in positions
+    return {
+        'mode': mode,
+        'positions': positions,
+        'devices': devices,
+        'degrees': degrees,
+        'drawn': drawn,
+        'num_connections': len(connections),
+        # Later edits patch the figure instead of rebuilding it while it is on display
+        'interactive_figure': True
+    }
 
 @app.callback(
     Output('connection-modal', 'is_open'),
@@ -1679,59 +2389,111 @@ def toggle_connection_modal(add_clicks, close_clicks, is_open):
         return not is_open
     return is_open
 
-@app.callback(
-    [Output('current-connections-display', 'children'),
-     Output('topology-store', 'data', allow_duplicate=True),
-     Output('device-topology-chart', 'figure', allow_duplicate=True)],
+# Edits are resolved in the browser, which holds the connections (assets/topology_edit.js)
+app.clientside_callback(
+    ClientsideFunction(namespace='topology', function_name='resolve_connection_edit'),
+    Output('topology-edit', 'data'),
     [Input('confirm-add-connection', 'n_clicks'),
      Input('remove-connection-btn', 'n_clicks')],
     [State('connection-source', 'value'),
      State('connection-target', 'value'),
-     State('topology-store', 'data'),
+     State('topology-connections', 'data')],
+    prevent_initial_call=True
+)
+
+@app.callback(
+    [Output('current-connections-list', 'children'),
+     Output('topology-store', 'data', allow_duplicate=True),
+     Output('topology-connections', 'data', allow_duplicate=True),
+     Output('device-topology-chart', 'figure', allow_duplicate=True),
+     Output('topology-redraw', 'data', allow_duplicate=True)],
+    Input('topology-edit', 'data'),
+    [State('topology-store', 'data'),
      State('layout-options', 'value')],
     prevent_initial_call=True
 )
-def manage_connections(add_clicks, remove_clicks, source, target, topology_data, layout_options):
-    """Add or remove connections in the topology"""
-    if not topology_data:
-        return html.P("No topology data available"), {}, {}
-    
-    ctx = dash.callback_context
-    triggered_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+def manage_connections(edit, topology_data, layout_options):
+    """Add or remove connections in the topology.
     
-    if triggered_id == 'confirm-add-connection' and source and target and source != target:
-        # Add new connection
-        new_connection = {'source': source, 'target': target}
-        if new_connection not in topology_data.get('connections', []):
-            topology_data.setdefault('connections', []).append(new_connection)
-    
-    elif triggered_id == 'remove-connection-btn':
-        # Show interface for removing connections (for now, remove the last added)
-        if topology_data.get('connections'):
-            topology_data['connections'].pop()
+    edit names the connection added or removed and its index in the list of connections.
+    """
+    if not topology_data or 'devices' not in topology_data:
+        return ["No topology data available"], {}, dash.no_update, {}, dash.no_update
+    if not edit:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+    
+    changed, added, index = edit['connection'], edit['added'], edit['index']
+    step = 1 if added else -1
+    
+    # The store's counts follow the edit, so the next one needs no scan of the connections either
+    store = dash.Patch()
+    degrees = topology_data.setdefault('degrees', {})
+    for device in (changed['source'], changed['target']):
+        degrees[device] = degrees.get(device, 0) + step
+        store['degrees'][device] = degrees[device]
+    positions = topology_data.get('positions', {})
+    if changed['source'] in positions and changed['target'] in positions:
+        topology_data['drawn'] = topology_data.get('drawn', 0) + step
+        store['drawn'] = topology_data['drawn']
+    topology_data['num_connections'] = topology_data.get('num_connections', 0) + step
+    store['num_connections'] = topology_data['num_connections']
+    
+    connections = dash.Patch()
+    connection_items = dash.Patch()
+    if added:
+        connections.append(changed)
+        connection_items.append(connection_item(changed))
+    else:
+        del connections[index]
+        del connection_items[index]
+    
+    # Only the edited connection is sent: its edge segment, its endpoints' colors and the counts
+    if topology_data.get('interactive_figure'):
+        fig = topology_connection_patch(topology_data, changed, added, layout_options)
+        if fig is not None:
+            return connection_items, store, connections, fig, dash.no_update
+    
+    # The chart shows another figure (e.g. after the dataset changed), or the edit cannot be
+    # patched into it, so the topology is drawn in full once the edit is in the connections
+    return connection_items, store, connections, dash.no_update, uuid.uuid4().hex
+
+@app.callback(
+    [Output('device-topology-chart', 'figure', allow_duplicate=True),
+     Output('topology-store', 'data', allow_duplicate=True),
+     Output('current-connections-list', 'children', allow_duplicate=True)],
+    Input('topology-redraw', 'data'),
+    [State('topology-store', 'data'),
+     State('topology-connections', 'data'),
+     State('layout-options', 'value')],
+    prevent_initial_call=True
+)
+def redraw_topology(redraw, topology_data, connections, layout_options):
+    """Draw the stored topology and its connections in full"""
+    if not topology_data or 'devices' not in topology_data:
+        return dash.no_update, dash.no_update, dash.no_update
     
-    # Create updated graph
+    import networkx as nx
     G = nx.Graph()
-    for device in topology_data.get('devices', []):
+    for device in topology_data['devices']:
         G.add_node(device)
     
-    for connection in topology_data.get('connections', []):
-        G.add_edge(connection['source'], connection['target'])
+    connections = connections or []
+    edges = [(conn['source'], conn['target']) for conn in connections]
+    G.add_edges_from(edges)
     
-    # Update figure
     pos = topology_data.get('positions', {})
-    fig = create_interactive_topology_figure(G, pos, layout_options, topology_data.get('mode', 'custom'))
-    
-    # Display current connections
-    connections_display = html.Div([
-        html.H6("Current Connections:"),
-        html.Ul([
-            html.Li(f"{conn['source']} ↔ {conn['target']}")
-            for conn in topology_data.get('connections', [])
-        ])
-    ])
+    mode = topology_data.get('mode', 'custom')
+    fig = create_interactive_topology_figure(G, pos, layout_options, mode, edges)
+    store = topology_store_data(mode, pos, topology_data['devices'], connections)
+    return fig, store, [connection_item(connection) for connection in connections]
+
+def connection_item(connection):
+    """Line of the connection editor's list of current connections.
     
-    return connections_display, topology_data, fig
+    Plain text rather than a component per connection, which would take seconds to build and
+    send for a full mesh.
+    """
+    return f"{connection['source']} ↔ {connection['target']}\n"
 
 @app.callback(
     Output('custom-positions-store', 'data'),
@@ -1752,59 +2514,144 @@ def update_custom_positions(relayout_data, topology_data):
     
     return custom_positions
 
-def create_interactive_topology_figure(G, pos, layout_options, topology_mode):
-    """Create an interactive topology figure with drag-and-drop capability"""
+def topology_options(layout_options):
+    """(show labels, show connections, enable dragging) from the layout options (all on by default)"""
+    if not layout_options:
+        return True, True, True
+    return 'labels' in layout_options, 'connections' in layout_options, 'dragging' in layout_options
+
+def topology_node_color(degree):
+    """Node color by degree (number of connections)"""
+    if degree == 0:
+        return 'lightgray'  # Isolated nodes
+    elif degree <= 2:
+        return 'lightblue'  # Low connectivity
+    elif degree <= 4:
+        return 'orange'     # Medium connectivity
+    return 'red'            # High connectivity
+
+def topology_annotations(num_devices, num_connections, enable_dragging):
+    """Footer of the interactive topology figure"""
+    if not enable_dragging:
+        return []
+    return [
+        dict(
+            text=f"Drag nodes to reposition • {num_devices} devices • {num_connections} connections",
+            showarrow=False,
+            xref="paper", yref="paper",
+            x=0.5, y=-0.1, xanchor='center', yanchor='top',
+            font=dict(size=12, color="gray")
+        )
+    ]
+
+def topology_options_patch(layout_options, num_devices, num_connections):
+    """Figure update applying the layout options to the interactive topology on display"""
+    show_labels, show_connections, enable_dragging = topology_options(layout_options)
+    
+    fig = dash.Patch()
+    fig['data'][0]['visible'] = show_connections
+    fig['data'][1]['mode'] = 'markers+text' if show_labels else 'markers'
+    fig['layout']['dragmode'] = 'pan' if enable_dragging else 'zoom'
+    fig['layout']['annotations'] = topology_annotations(num_devices, num_connections, enable_dragging)
+    return fig
+
+def topology_connection_patch(topology_data, connection, added, layout_options):
+    """Figure update for a connection added to or removed from the interactive topology on display.
+    
+    topology_data holds the degrees and counts after the edit; the connection is (or was) the last
+    of the connections. Returns None when the figure cannot be patched and must be drawn again.
+    """
+    positions = topology_data.get('positions', {})
+    devices = topology_data['devices']
+    source, target = connection['source'], connection['target']
+    
+    # Node points follow the devices that have a position (nodes only in connections come last);
+    # an endpoint without a point of its own has no color to patch
+    plotted = {device: index for index, device in enumerate(device for device in devices if device in positions)}
+    if source not in plotted or target not in plotted:
+        return None
+    
+    # Edges between devices without a position are not drawn, so they have no segment
+    drawn = topology_data['drawn']
+    # An edit that takes the edge trace across the WebGL threshold needs the other trace type
+    before = drawn - 1 if added else drawn + 1
+    if scatter_type(3 * before) is not scatter_type(3 * drawn):
+        return None
+    
+    fig = dash.Patch()
+    if added:
+        (x0, y0), (x1, y1) = positions[source], positions[target]
+        fig['data'][0]['x'].extend([x0, x1, None])
+        fig['data'][0]['y'].extend([y0, y1, None])
+    else:
+        segment = 3 * drawn
+        for axis in ('x', 'y'):
+            for _ in range(3):
+                del fig['data'][0][axis][segment]
+    
+    # Only the two endpoints change degree
+    for device in (source, target):
+        fig['data'][1]['marker']['color'][plotted[device]] = topology_node_color(topology_data['degrees'][device])
+    
+    if topology_options(layout_options)[2]:
+        fig['layout']['annotations'] = topology_annotations(len(devices), topology_data['num_connections'], True)
+    return fig
+
+def topology_figure_replaced():
+    """Store update for when the topology chart is given a figure other than the interactive one"""
+    store = dash.Patch()
+    store['interactive_figure'] = False
+    return store
+
+def create_interactive_topology_figure(G, pos, layout_options, topology_mode, edges=None):
+    """Create an interactive topology figure with drag-and-drop capability.
+    
+    Edges are drawn in the order given (G's edge order by default), one segment each, so
+    edits can be patched into the figure: the edge trace is always data[0] and the nodes data[1].
+    """
     
     # Default options
-    show_labels = 'labels' in layout_options if layout_options else True
-    show_connections = 'connections' in layout_options if layout_options else True
-    enable_dragging = 'dragging' in layout_options if layout_options else True
+    show_labels, show_connections, enable_dragging = topology_options(layout_options)
     
     fig = go.Figure()
     
-    # Add edges (connections) if enabled
-    if show_connections and G.edges():
-        edge_x = []
-        edge_y = []
-        for edge in G.edges():
-            if edge[0] in pos and edge[1] in pos:
-                x0, y0 = pos[edge[0]]
-                x1, y1 = pos[edge[1]]
-                edge_x.extend([x0, x1, None])
-                edge_y.extend([y0, y1, None])
-        
-        fig.add_trace(go.Scatter(
-            x=edge_x, y=edge_y,
-            line=dict(width=3, color='rgba(50, 50, 50, 0.6)'),
-            hoverinfo='none',
-            mode='lines',
-            showlegend=False,
-            name='connections'
-        ))
+    # Add edges (connections), hidden rather than left out when disabled. All edges are
+    # one trace, each segment followed by a gap, so dense meshes stay a single draw call.
+    # Plain lists rather than arrays, which would be sent as binary that edits cannot patch
+    # Endpoints are looked up by device index, not copied per edge
+    index = {node: i for i, node in enumerate(pos)}
+    coords = np.array([pos[node] for node in index], dtype=float).reshape(-1, 2)
+    drawn = np.array([(index[source], index[target]) for source, target in (G.edges() if edges is None else edges)
+                      if source in index and target in index], dtype=np.int64).reshape(-1, 2)
+    # Gaps are None rather than NaN, which would make the JSON encoder go over the figure a second time
+    edge_x, edge_y = [None] * (3 * len(drawn)), [None] * (3 * len(drawn))
+    for axis, values in ((0, edge_x), (1, edge_y)):
+        values[0::3] = coords[drawn[:, 0], axis].tolist()
+        values[1::3] = coords[drawn[:, 1], axis].tolist()
+    
+    fig.add_trace(scatter_type(len(edge_x))(
+        x=[], y=[],
+        line=dict(width=3, color='rgba(50, 50, 50, 0.6)'),
+        hoverinfo='none',
+        mode='lines',
+        showlegend=False,
+        visible=show_connections,
+        name='connections'
+    ))
     
-    # Add nodes (devices)
-    if pos:
-        node_x = [pos[node][0] for node in G.nodes() if node in pos]
-        node_y = [pos[node][1] for node in G.nodes() if node in pos]
-        node_text = list(G.nodes()) if show_labels else ['']*len(G.nodes())
+    # Add nodes (devices) that have a position
+    plotted = [node for node in G.nodes() if node in pos]
+    if plotted:
+        node_x = [pos[node][0] for node in plotted]
+        node_y = [pos[node][1] for node in plotted]
         
         # Color nodes based on their degree (number of connections)
-        node_colors = []
-        for node in G.nodes():
-            degree = G.degree(node)
-            if degree == 0:
-                node_colors.append('lightgray')  # Isolated nodes
-            elif degree <= 2:
-                node_colors.append('lightblue')  # Low connectivity
-            elif degree <= 4:
-                node_colors.append('orange')     # Medium connectivity
-            else:
-                node_colors.append('red')        # High connectivity
+        node_colors = [topology_node_color(G.degree(node)) for node in plotted]
         
-        fig.add_trace(go.Scatter(
+        fig.add_trace(scatter_type(len(node_x))(
             x=node_x, y=node_y,
             mode='markers+text' if show_labels else 'markers',
-            text=node_text,
+            text=plotted,
             textposition="bottom center",
             marker=dict(
                 size=40,
@@ -1812,7 +2659,7 @@ def create_interactive_topology_figure(G, pos, layout_options, topology_mode):
                 line=dict(width=3, color='darkblue'),
                 opacity=0.8
             ),
-            customdata=list(G.nodes()),
+            customdata=plotted,
             hovertemplate='%{customdata}<br>Connections: %{marker.color}<extra></extra>',
             name='devices'
         ))
@@ -1841,18 +2688,14 @@ def create_interactive_topology_figure(G, pos, layout_options, topology_mode):
         margin=dict(l=40, r=40, t=60, b=40),
         plot_bgcolor='rgba(248, 249, 250, 0.8)',
         paper_bgcolor='white',
-        annotations=[
-            dict(
-                text=f"Drag nodes to reposition • {len(G.nodes())} devices • {len(G.edges())} connections",
-                showarrow=False,
-                xref="paper", yref="paper",
-                x=0.5, y=-0.1, xanchor='center', yanchor='top',
-                font=dict(size=12, color="gray")
-            )
-        ] if enable_dragging else []
+        annotations=topology_annotations(len(G.nodes()), len(G.edges()), enable_dragging)
     )
     
-    return fig
+    # The edge coordinates are set on the figure's dict, past Plotly's validation of every
+    # element, which takes seconds for a full mesh
+    figure = fig.to_dict()
+    figure['data'][0].update(x=edge_x, y=edge_y)
+    return figure
 
 @app.callback(
     Output('topology-status', 'children', allow_duplicate=True),
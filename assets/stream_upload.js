@@ -0,0 +1,47 @@
+// Streamed upload for large traces.
+// dcc.Upload round-trips the whole file through the browser as a base64 data
+// URL; this posts the raw file to /api/upload instead and hands the returned
+// dataset handle to Dash through the 'upload-result' store.
+(function () {
+    function setResult(result) {
+        window.dash_clientside.set_props('upload-result', {data: result});
+    }
+
+    function upload(file) {
+        var headers = {'Content-Type': 'text/csv'};
+        if (/\.gz$/i.test(file.name)) {
+            headers['Content-Encoding'] = 'gzip';
+        } else if (/\.zst$/i.test(file.name)) {
+            headers['Content-Encoding'] = 'zstd';
+        }
+
+        fetch('/api/upload?filename=' + encodeURIComponent(file.name), {
+            method: 'POST',
+            headers: headers,
+            body: file
+        })
+            .then(function (response) { return response.json(); })
+            .then(setResult)
+            .catch(function (error) {
+                setResult({error: 'Upload failed: ' + error, filename: file.name});
+            });
+    }
+
+    // The button is rendered by Dash, so listen at the document level
+    document.addEventListener('click', function (event) {
+        var button = event.target.closest && event.target.closest('#stream-upload-btn');
+        if (!button) {
+            return;
+        }
+
+        var input = document.createElement('input');
+        input.type = 'file';
+        input.accept = '.csv,.gz,.zst';
+        input.addEventListener('change', function () {
+            if (input.files && input.files.length) {
+                upload(input.files[0]);
+            }
+        });
+        input.click();
+    });
+})();
@@ -0,0 +1,40 @@
+// Connection edits of the interactive topology.
+// The list of connections can hold a full mesh (about half a million for 1000
+// devices), so it stays in the browser: the duplicate check and the choice of
+// the connection to remove are made here, and the server is sent only the
+// edit through the 'topology-edit' store.
+(function () {
+    function sameConnection(connection, source, target) {
+        return (connection.source === source && connection.target === target) ||
+            (connection.source === target && connection.target === source);
+    }
+
+    function resolveConnectionEdit(addClicks, removeClicks, source, target, connections) {
+        var noUpdate = window.dash_clientside.no_update;
+        var triggered = window.dash_clientside.callback_context.triggered.map(function (t) { return t.prop_id; });
+        var clicks = (addClicks || 0) + (removeClicks || 0);
+        connections = connections || [];
+
+        if (triggered.indexOf('confirm-add-connection.n_clicks') >= 0) {
+            // The graph is undirected, so the connection may already exist the other way round
+            if (!source || !target || source === target || connections.some(function (connection) {
+                return sameConnection(connection, source, target);
+            })) {
+                return noUpdate;
+            }
+            return {added: true, connection: {source: source, target: target}, index: connections.length,
+                    clicks: clicks};
+        }
+
+        // Removing takes the last added connection
+        if (triggered.indexOf('remove-connection-btn.n_clicks') >= 0 && connections.length) {
+            var index = connections.length - 1;
+            return {added: false, connection: connections[index], index: index, clicks: clicks};
+        }
+        return noUpdate;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        topology: {resolve_connection_edit: resolveConnectionEdit}
+    });
+})();
@@ -0,0 +1,74 @@
+"""
+Server-side reductions for distribution charts.
+
+Histogram and box plot figures are built from bin counts and quantiles
+computed here with NumPy, so their size depends on the number of bins and
+groups rather than on the number of executions.
+"""
+import numpy as np
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values)]
+
+
+def histogram_edges(groups, bins=30, log=False):
+    """Bin edges shared by several groups of values.
+
+    With log=True the edges are spaced evenly in log10 over the positive
+    values, which suits heavy-tailed latencies. Returns None when there is
+    nothing to bin.
+    """
+    groups = [_finite(values) for values in groups]
+    if log:
+        groups = [values[values > 0] for values in groups]
+    groups = [values for values in groups if len(values)]
+    if not groups:
+        return None
+
+    low = min(values.min() for values in groups)
+    high = max(values.max() for values in groups)
+    if log:
+        return np.logspace(np.log10(low), np.log10(high) if high > low else np.log10(low) + 1, bins + 1)
+    if high == low:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+
+def histogram_counts(values, edges):
+    """Counts of finite values per bin (values outside the edges are dropped)"""
+    counts, _ = np.histogram(_finite(values), bins=edges)
+    return counts
+
+
+def box_statistics(values, max_outliers=50):
+    """Box plot summary of a group of values, or None if it has none.
+
+    Quartiles use linear interpolation (Plotly's default) and the whiskers
+    end at the most extreme values within 1.5 IQR of the box, as Plotly
+    would draw them. Outliers beyond the whiskers are thinned to at most
+    max_outliers evenly spaced values, always keeping the extremes.
+    """
+    values = _finite(values)
+    if len(values) == 0:
+        return None
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = np.sort(values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)])
+    if len(outliers) > max_outliers:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype(np.int64)]
+
+    return {
+        'count': len(values),
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': inside.min(),
+        'upperfence': inside.max(),
+        'mean': values.mean(),
+        'outliers': outliers,
+        'outlier_count': len(values) - len(inside)
+    }
@@ -0,0 +1,237 @@
+"""
+Session-scoped dataset store shared by all server workers.
+
+Datasets are written once as Arrow IPC files under a cache directory and
+memory-mapped on read, so any worker process can serve any session without
+re-parsing the CSV. Sessions point at datasets by handle; idle sessions and
+least recently used datasets are evicted under a configurable memory cap.
+"""
+import json
+import os
+import re
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import pyarrow as pa
+
+from analysis_cache import dataset_fingerprint, remember_fingerprint
+
+# Session tokens and handles come from the browser; only allow plain tokens
+_TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+
+def _valid_token(token):
+    return isinstance(token, str) and bool(_TOKEN_PATTERN.match(token))
+
+
+def _write_atomic(path, write):
+    """Write a file via a temporary sibling so readers never see partial data"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _private_dir(path):
+    """Create a directory only this user can access, refusing one another user controls.
+
+    Analysis results are unpickled from the store, so anyone who can write to
+    it could run code in the server.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return
+    info = os.lstat(path)
+    if stat.S_ISLNK(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"Dataset store {path} is not a directory owned by this user")
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+
+class DatasetStore:
+    """On-disk Arrow store of timing datasets, bound to browser sessions"""
+
+    def __init__(self, root, max_bytes=2 * 1024 ** 3, idle_timeout=4 * 3600, memory_entries=4):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.memory_entries = memory_entries
+        self._datasets_dir = os.path.join(root, 'datasets')
+        self._sessions_dir = os.path.join(root, 'sessions')
+        _private_dir(root)
+        os.makedirs(self._datasets_dir, exist_ok=True)
+        os.makedirs(self._sessions_dir, exist_ok=True)
+        # Small per-process LRU of datasets already loaded from disk
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _dataset_path(self, handle):
+        return os.path.join(self._datasets_dir, f"{handle}.arrow")
+
+    def _session_path(self, session_id):
+        return os.path.join(self._sessions_dir, f"{session_id}.json")
+
+    def put_dataset(self, df, handle=None):
+        """Persist a dataset and return its handle (content hash by default)"""
+        handle = handle or dataset_fingerprint(df)
+        if not _valid_token(handle):
+            raise ValueError(f"Invalid dataset handle: {handle!r}")
+
+        path = self._dataset_path(handle)
+        if not os.path.exists(path):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+
+            def write(f):
+                with pa.ipc.new_file(f, table.schema) as writer:
+                    writer.write_table(table)
+
+            _write_atomic(path, write)
+        else:
+            os.utime(path)
+
+        remember_fingerprint(df, handle)
+        self._remember(handle, df)
+        self.evict(keep=handle)
+        return handle
+
+    def has_dataset(self, handle):
+        """Check whether a dataset is available without loading it"""
+        return _valid_token(handle) and os.path.exists(self._dataset_path(handle))
+
+    def get_dataset(self, handle):
+        """Load a dataset by handle, or None if unknown or evicted"""
+        if not _valid_token(handle):
+            return None
+
+        with self._lock:
+            if handle in self._loaded:
+                self._loaded.move_to_end(handle)
+                df = self._loaded[handle]
+            else:
+                df = None
+
+        path = self._dataset_path(handle)
+        try:
+            if df is None:
+                with pa.memory_map(path) as source:
+                    # One block per column avoids consolidating into fresh 2-D arrays
+                    df = pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+                remember_fingerprint(df, handle)
+                self._remember(handle, df)
+            # Record the access for LRU eviction across workers
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._loaded.pop(handle, None)
+            return None
+        return df
+
+    def _remember(self, handle, df):
+        with self._lock:
+            self._loaded[handle] = df
+            self._loaded.move_to_end(handle)
+            while len(self._loaded) > self.memory_entries:
+                self._loaded.popitem(last=False)
+
+    def bind(self, session_id, handle, filename=None):
+        """Point a session at a stored dataset"""
+        if not _valid_token(session_id) or not _valid_token(handle):
+            raise ValueError("Invalid session token or dataset handle")
+        info = {'handle': handle, 'filename': filename, 'bound_at': time.time()}
+        _write_atomic(self._session_path(session_id), lambda f: f.write(json.dumps(info).encode('utf-8')))
+
+    def session_info(self, session_id):
+        """Dataset binding for a session, or None"""
+        if not _valid_token(session_id):
+            return None
+        path = self._session_path(session_id)
+        info = self._read_session(path)
+        if info is not None:
+            # Record the access so active sessions are not treated as idle
+            os.utime(path)
+        return info
+
+    @staticmethod
+    def _read_session(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def load(self, session_id):
+        """Dataset and binding info for a session, or (None, None)"""
+        info = self.session_info(session_id)
+        if info is None:
+            return None, None
+        df = self.get_dataset(info['handle'])
+        return (df, info) if df is not None else (None, None)
+
+    def usage(self):
+        """Current disk usage of the store"""
+        datasets = self._list(self._datasets_dir, '.arrow')
+        return {
+            'datasets': len(datasets),
+            'sessions': len(self._list(self._sessions_dir, '.json')),
+            'bytes': sum(size for _, size, _ in datasets),
+            'max_bytes': self.max_bytes
+        }
+
+    @staticmethod
+    def _list(directory, suffix):
+        entries = []
+        for name in os.listdir(directory):
+            if not name.endswith(suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((name[:-len(suffix)], stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self, keep=None):
+        """Drop idle sessions, then least recently used datasets over the cap"""
+        now = time.time()
+
+        references = {}
+        for session_id, _, accessed in self._list(self._sessions_dir, '.json'):
+            if now - accessed > self.idle_timeout:
+                self._remove(self._session_path(session_id))
+                continue
+            info = self._read_session(self._session_path(session_id))
+            if info:
+                references.setdefault(info['handle'], []).append(session_id)
+
+        datasets = self._list(self._datasets_dir, '.arrow')
+        total = sum(size for _, size, _ in datasets)
+        if total <= self.max_bytes:
+            return
+
+        # Unreferenced datasets go first, then those of the least recently used sessions
+        for handle, size, _ in sorted(datasets, key=lambda d: (d[0] in references, d[2])):
+            if total <= self.max_bytes:
+                break
+            if handle == keep:
+                continue
+            self._remove(self._dataset_path(handle))
+            for session_id in references.get(handle, []):
+                self._remove(self._session_path(session_id))
+            with self._lock:
+                self._loaded.pop(handle, None)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,52 @@
+"""
+Server-side downsampling for zoomable line charts.
+
+Charts drawn from a zoomed range are re-queried for just the points inside
+it, so a zoom never reads more of a long series than it shows. A range with
+more points than the chart's budget is drawn as equal-width buckets holding
+the mean, min and max of their points, so spikes survive the reduction.
+"""
+import numpy as np
+
+
+def visible_slice(x, x_range):
+    """Slice of a sorted x array that falls inside an axis range (all of it for None)"""
+    if x_range is None:
+        return slice(0, len(x))
+    lo = np.searchsorted(x, x_range[0], side='left')
+    hi = np.searchsorted(x, x_range[1], side='right')
+    # One point either side keeps lines running to the edges of the view
+    return slice(max(lo - 1, 0), min(hi + 1, len(x)))
+
+
+def minmax_buckets(x, y, start, end, buckets, quantiles=()):
+    """Points of a series summarized over equal-width x buckets of [start, end].
+
+    Returns a dict of arrays over the non-empty buckets in x order, shaped
+    like TimelinePyramid.query: 'start' (bucket start), 'count', 'sum',
+    'mean', 'min', 'max' and one 'p<q>' entry per requested quantile q in
+    [0, 1]. Points outside [start, end] or with a missing x or y are left out.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    width = (end - start) / max(buckets, 1) or 1
+    keep = (x >= start) & (x <= end) & ~np.isnan(y)
+    bucket = np.minimum(((x[keep] - start) // width).astype(np.int64), max(buckets, 1) - 1)
+    # Values sorted within each bucket give min, max and quantiles by position
+    order = np.lexsort((y[keep], bucket))
+    bucket, values = bucket[order], y[keep][order]
+
+    firsts = np.flatnonzero(np.concatenate([[True], bucket[1:] != bucket[:-1]])) if len(bucket) else bucket
+    counts = np.diff(np.append(firsts, len(bucket)))
+    result = {'start': start + bucket[firsts] * width, 'count': counts}
+    if len(bucket) == 0:
+        result.update({name: np.empty(0) for name in ('sum', 'mean', 'min', 'max')})
+        result.update({f"p{q * 100:g}": np.empty(0) for q in quantiles})
+        return result
+    result['sum'] = np.add.reduceat(values, firsts)
+    result['mean'] = result['sum'] / counts
+    result['min'] = values[firsts]
+    result['max'] = values[firsts + counts - 1]
+    for q in quantiles:
+        result[f"p{q * 100:g}"] = values[firsts + np.floor(q * (counts - 1)).astype(np.int64)]
+    return result
@@ -0,0 +1,224 @@
+"""
+Live event ingest from a local TCP or UDP socket.
+
+Records arrive as CSV lines (Event,Time,Toggled,Device_ID by default), for
+example from a serial-to-network bridge. Network threads hand batches of
+complete lines to a bounded queue, and a single writer parses them and
+appends the rows to a fixed-size columnar ring buffer that keeps the most
+recent rows for rolling-window analysis.
+
+When the writer falls behind and the queue fills up, TCP readers stop
+reading (the kernel's flow control then slows the sender down) and UDP
+datagrams are dropped. Both cases are counted.
+"""
+import queue
+import socketserver
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ingest import CategoryCodes, CommentFilterReader, normalize_trace, read_timing_csv
+
+DEFAULT_COLUMNS = 'Event,Time,Toggled,Device_ID'
+RECV_BYTES = 64 * 1024
+
+
+class EventRingBuffer:
+    """Fixed-size columnar buffer holding the most recent events"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.time = np.zeros(capacity, dtype=np.float64)
+        self.toggled = np.zeros(capacity, dtype=bool)
+        self.event = np.full(capacity, -1, dtype=np.int32)
+        self.device = np.full(capacity, -1, dtype=np.int32)
+        self.message = np.full(capacity, -1, dtype=np.int32)
+        self._codes = {'Event': CategoryCodes(), 'Device_ID': CategoryCodes(), 'Message_ID': CategoryCodes()}
+        self.has_device_info = False
+        self.has_message_ids = False
+        # Rows ever appended; the write position is written % capacity
+        self.written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def evicted(self):
+        """Rows overwritten by newer ones"""
+        return max(self.written - self.capacity, 0)
+
+    def append(self, df):
+        """Append a normalized trace batch, overwriting the oldest rows when full"""
+        with self._lock:
+            columns = {
+                'time': df['Time'].to_numpy(dtype=np.float64),
+                'toggled': df['Toggled'].to_numpy(dtype=bool),
+                'event': self._codes['Event'].codes(df['Event'])
+            }
+            if 'Device_ID' in df.columns:
+                self.has_device_info = True
+                columns['device'] = self._codes['Device_ID'].codes(df['Device_ID'])
+            if 'Message_ID' in df.columns:
+                self.has_message_ids = True
+                columns['message'] = self._codes['Message_ID'].codes(df['Message_ID'])
+
+            # Only the last capacity rows of an oversized batch can survive
+            skip = max(len(df) - self.capacity, 0)
+            slots = (self.written + np.arange(skip, len(df))) % self.capacity
+            for name in ('time', 'toggled', 'event', 'device', 'message'):
+                values = columns.get(name)
+                getattr(self, name)[slots] = values[skip:] if values is not None else -1
+            self.written += len(df)
+
+    def snapshot(self, window_ns=None, max_rows=None):
+        """Buffered rows in arrival order as a trace DataFrame.
+
+        With window_ns, only rows within that many nanoseconds of the latest
+        timestamp are returned; with max_rows, only that many of the most
+        recent rows are considered. The writer is held off only while the
+        raw columns are copied.
+        """
+        with self._lock:
+            count = min(self.written, self.capacity, max_rows or self.capacity)
+            first = (self.written - count) % self.capacity
+            # The rows are at most two contiguous runs of the ring
+            runs = [slice(first, min(first + count, self.capacity)), slice(0, max(first + count - self.capacity, 0))]
+            columns = {name: np.concatenate([getattr(self, name)[run] for run in runs])
+                       for name in ('time', 'toggled', 'event', 'device', 'message')}
+            labels = {name: list(codes.labels) for name, codes in self._codes.items()}
+            has_device_info, has_message_ids = self.has_device_info, self.has_message_ids
+
+        if window_ns is not None and count:
+            keep = columns['time'] >= np.nanmax(columns['time']) - window_ns
+            columns = {name: values[keep] for name, values in columns.items()}
+
+        trace = {
+            'Event': self._codes['Event'].categorical(columns['event'], labels['Event']),
+            'Time': columns['time'],
+            'Toggled': columns['toggled']
+        }
+        if has_device_info:
+            trace['Device_ID'] = self._codes['Device_ID'].categorical(columns['device'], labels['Device_ID'])
+        if has_message_ids:
+            trace['Message_ID'] = self._codes['Message_ID'].categorical(columns['message'], labels['Message_ID'])
+        return normalize_trace(pd.DataFrame(trace))
+
+
+class EventStream:
+    """Socket listeners, bounded batch queue and writer feeding an EventRingBuffer"""
+
+    def __init__(self, capacity, max_batches=1024, columns=DEFAULT_COLUMNS):
+        self.buffer = EventRingBuffer(capacity)
+        self.header = columns.strip().encode() + b'\n'
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._servers = []
+        self._lock = threading.Lock()
+        self.counters = {
+            'received_rows': 0,     # rows handed to the queue
+            'dropped_rows': 0,      # UDP rows discarded because the queue was full
+            'backpressure_waits': 0,  # TCP batches that had to wait for queue space
+            'malformed_rows': 0     # rows in batches that failed to parse
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def submit(self, header, data, block=True):
+        """Queue a batch of complete CSV lines; returns False if it was dropped"""
+        rows = data.count(b'\n')
+        if not rows:
+            return True
+        try:
+            self._queue.put_nowait((header, data))
+        except queue.Full:
+            if not block:
+                self._count('dropped_rows', rows)
+                return False
+            self._count('backpressure_waits')
+            self._queue.put((header, data))
+        self._count('received_rows', rows)
+        return True
+
+    def split_header(self, data):
+        """Take a leading header line ("Event,...") off a batch, if there is one"""
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            if line.strip() and not CommentFilterReader._is_comment(line):
+                if line.lstrip().startswith(b'Event'):
+                    return line, data[:offset] + data[offset + len(line):]
+                break
+            offset += len(line)
+        return None, data
+
+    def _write_loop(self):
+        while True:
+            header, data = self._queue.get()
+            try:
+                df = read_timing_csv([header, data])
+            except Exception:
+                # A bad batch is only counted; the writer has to keep running
+                self._count('malformed_rows', data.count(b'\n'))
+                continue
+            self.buffer.append(df)
+
+    def start(self, host='127.0.0.1', tcp_port=None, udp_port=None):
+        """Listen on the given ports and start the writer thread"""
+        stream = self
+
+        class TCPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                header, partial = stream.header, b''
+                first = True
+                while True:
+                    chunk = self.request.recv(RECV_BYTES)
+                    if not chunk:
+                        break
+                    data = partial + chunk
+                    cut = data.rfind(b'\n') + 1
+                    data, partial = data[:cut], data[cut:]
+                    if first and data:
+                        # A connection may announce its own column order
+                        sent_header, data = stream.split_header(data)
+                        header = sent_header or header
+                        first = False
+                    stream.submit(header, data)
+                if partial.strip():
+                    stream.submit(header, partial + b'\n')
+
+        class UDPHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                data = self.request[0]
+                if not data.endswith(b'\n'):
+                    data += b'\n'
+                sent_header, data = stream.split_header(data)
+                stream.submit(sent_header or stream.header, data, block=False)
+
+        if tcp_port:
+            server = socketserver.ThreadingTCPServer((host, tcp_port), TCPHandler)
+            server.daemon_threads = True
+            self._servers.append(server)
+        if udp_port:
+            self._servers.append(socketserver.UDPServer((host, udp_port), UDPHandler))
+
+        threading.Thread(target=self._write_loop, name='event-stream-writer', daemon=True).start()
+        for server in self._servers:
+            threading.Thread(target=server.serve_forever, name='event-stream-listener', daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+
+    def stats(self):
+        """Counters plus buffer occupancy"""
+        with self._lock:
+            stats = dict(self.counters)
+        stats.update({
+            'queued_batches': self._queue.qsize(),
+            'buffered_rows': min(self.buffer.written, self.buffer.capacity),
+            'evicted_rows': self.buffer.evicted,
+            'capacity': self.buffer.capacity
+        })
+        return stats
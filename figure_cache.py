@@ -0,0 +1,96 @@
+"""
+Cache of serialized callback responses for the dataset panels.
+
+The panels' figures depend only on the dataset's contents and the callback's
+inputs, so the JSON a callback returned is kept, keyed by (dataset content
+hash, callback, inputs), and repeat requests are answered with the same bytes
+without running the callback or serializing its figure again. Responses carry
+an ETag of their body; a request whose If-None-Match already names it gets an
+empty 304 instead. Dash callback requests are POSTs, but for these callbacks
+they are safe reads, so they are revalidated like GETs.
+"""
+import hashlib
+import json
+
+from flask import Response, g, request
+
+from analysis_cache import AnalysisCache
+
+DASH_UPDATE_PATH = '_dash-update-component'
+
+
+def _etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class FigureCache:
+    """Serves repeat Dash callback requests from their stored response bodies"""
+
+    def __init__(self, dash_app, callbacks, dataset_hash, max_bytes=128 * 1024 ** 2, max_entries=1024):
+        self.dash_app = dash_app
+        self.callbacks = set(callbacks)
+        # dataset_hash(handle) -> content hash of the dataset, or None when it must not be cached
+        self.dataset_hash = dataset_hash
+        self.cache = AnalysisCache(max_bytes=max_bytes, max_entries=max_entries)
+        self.not_modified = 0
+        dash_app.server.before_request(self._serve_cached)
+        dash_app.server.after_request(self._store_response)
+
+    def _key(self):
+        """Cache key of the current request, or None when it is not cacheable"""
+        if request.method != 'POST' or not request.path.endswith(DASH_UPDATE_PATH):
+            return None
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return None
+        entry = self.dash_app.callback_map.get(body.get('output'))
+        if entry is None or entry['callback'].__name__ not in self.callbacks:
+            return None
+
+        props = (body.get('inputs') or []) + (body.get('state') or [])
+        handle = next((prop.get('value') for prop in props
+                       if isinstance(prop, dict) and prop.get('id') == 'dataset-handle'), None)
+        dataset = self.dataset_hash(handle)
+        if dataset is None:
+            return None
+        described = json.dumps([dataset, body['output'], body.get('inputs'), body.get('state'),
+                                body.get('changedPropIds')], sort_keys=True, separators=(',', ':'))
+        return hashlib.blake2b(described.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _serve_cached(self):
+        key = self._key()
+        if key is None:
+            return None
+        g.figure_cache_key = key
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        etag, body = cached
+        g.figure_cache_hit = True
+        if etag in request.if_none_match:
+            self.not_modified += 1
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        return Response(body, mimetype='application/json', headers={'ETag': f'"{etag}"'})
+
+    def _store_response(self, response):
+        key = g.get('figure_cache_key')
+        # Only complete responses: 204 means no_update, and errors must be retried
+        if key is None or g.get('figure_cache_hit') or response.status_code != 200:
+            return response
+        body = response.get_data()
+        etag = _etag(body)
+        self.cache.put(key, (etag, body))
+        response.headers['ETag'] = f'"{etag}"'
+        if etag in request.if_none_match:
+            self.not_modified += 1
+            response.status_code = 304
+            response.set_data(b'')
+        return response
+
+    def clear(self):
+        """Drop all stored responses"""
+        self.cache.clear()
+
+    def stats(self):
+        """Counters for monitoring"""
+        return dict(self.cache.stats(), not_modified=self.not_modified)
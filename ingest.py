@@ -0,0 +1,266 @@
+"""
+Streaming CSV ingest for hardware timing traces.
+
+Input is consumed in fixed-size byte chunks: comment lines (starting with //
+or #) are dropped as the bytes stream past, rows are parsed in chunks with
+compact dtypes, and columns are concatenated one at a time. The whole file
+never exists as Python strings, so peak memory stays close to the size of
+the final DataFrame.
+"""
+import base64
+import io
+import zlib
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+REQUIRED_COLUMNS = ['Event', 'Time', 'Toggled']
+# Low-cardinality text columns are stored as categoricals from the start
+CATEGORICAL_COLUMNS = ['Event', 'Device_ID', 'Message_ID']
+
+# Bump whenever parsing or dtype conversion changes, so cached traces are re-parsed
+TRACE_SCHEMA_VERSION = 2
+
+READ_CHUNK_BYTES = 4 * 1024 * 1024
+PARSE_CHUNK_ROWS = 1_000_000
+
+
+class TraceFormatError(ValueError):
+    """Raised when a CSV does not look like a timing trace"""
+
+
+class UnsupportedEncodingError(ValueError):
+    """Raised for compressed uploads the server cannot decode"""
+
+
+class CommentFilterReader(io.RawIOBase):
+    """Binary file-like view over byte chunks with comment lines removed"""
+
+    def __init__(self, chunks, total_bytes=None, progress=None):
+        self._chunks = iter(chunks)
+        self._total_bytes = total_bytes
+        self._progress = progress
+        self._bytes_read = 0
+        self._pending = b''   # filtered bytes not yet handed out
+        self._offset = 0      # read position within _pending
+        self._partial = b''   # trailing line without a newline yet
+        self._exhausted = False
+
+    def readable(self):
+        return True
+
+    @staticmethod
+    def _is_comment(line):
+        stripped = line.lstrip()
+        return stripped.startswith(b'//') or stripped.startswith(b'#')
+
+    def _filter(self, data):
+        # Fast path: most chunks contain no comment markers at all
+        if b'#' not in data and b'//' not in data:
+            return data
+        lines = data.split(b'\n')
+        lines.pop()  # data always ends with a newline
+        return b''.join(line + b'\n' for line in lines if not self._is_comment(line))
+
+    def _fill(self):
+        """Pull the next chunk and filter all of its complete lines"""
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._exhausted = True
+            tail, self._partial = self._partial, b''
+            if tail and not self._is_comment(tail):
+                self._pending, self._offset = tail, 0
+            return
+
+        self._bytes_read += len(chunk)
+        if self._progress is not None:
+            self._progress(self._bytes_read, self._total_bytes)
+
+        data = self._partial + chunk
+        cut = data.rfind(b'\n') + 1
+        self._partial = data[cut:]
+        if cut:
+            self._pending, self._offset = self._filter(data[:cut]), 0
+
+    def readinto(self, buffer):
+        while self._offset >= len(self._pending) and not self._exhausted:
+            self._fill()
+        size = min(len(buffer), len(self._pending) - self._offset)
+        buffer[:size] = memoryview(self._pending)[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+
+def iter_file_chunks(f, chunk_bytes=READ_CHUNK_BYTES):
+    """Yield fixed-size byte chunks from a binary file object"""
+    while True:
+        chunk = f.read(chunk_bytes)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_base64_chunks(text, start=0, chunk_bytes=READ_CHUNK_BYTES):
+    """Decode a base64 string incrementally, one slice at a time"""
+    # Slices must be a multiple of 4 characters to decode independently
+    step = (chunk_bytes // 3) * 4
+    for offset in range(start, len(text), step):
+        yield base64.b64decode(text[offset:offset + step])
+
+
+def encoding_for_filename(filename):
+    """Guess a content encoding from a compressed file extension"""
+    name = (filename or '').lower()
+    if name.endswith('.gz'):
+        return 'gzip'
+    if name.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def iter_decompressed(chunks, encoding):
+    """Decompress a gzip or zstd byte stream chunk by chunk"""
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('', 'identity'):
+        yield from chunks
+        return
+
+    if encoding in ('gzip', 'x-gzip'):
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    elif encoding in ('zstd', 'zstandard'):
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedEncodingError("zstd uploads require the zstandard package")
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        raise UnsupportedEncodingError(f"Unsupported content encoding: {encoding}")
+
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def _normalize_chunk(chunk):
+    """Apply the dashboard's column conversions to one parsed chunk"""
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing_columns:
+        raise TraceFormatError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    # Convert Time to numeric (nanoseconds)
+    chunk['Time'] = pd.to_numeric(chunk['Time'], errors='coerce')
+
+    # Convert Toggled to boolean
+    chunk['Toggled'] = chunk['Toggled'].astype(bool)
+
+    # Convert Position to numeric if device topology columns exist
+    if 'Device_ID' in chunk.columns and 'Position' in chunk.columns:
+        chunk['Position'] = pd.to_numeric(chunk['Position'], errors='coerce')
+    return chunk
+
+
+def _concat_columns(chunks):
+    """Concatenate parsed chunks column by column, freeing each chunk column as it goes"""
+    if len(chunks) == 1:
+        return chunks[0]
+
+    columns = {}
+    for col in list(chunks[0].columns):
+        parts = [chunk.pop(col) for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            # All-missing chunks infer empty categories of a different dtype
+            filled = [part.cat.categories for part in parts if len(part.cat.categories)]
+            if filled:
+                parts = [part if len(part.cat.categories) else part.cat.set_categories(filled[0][:0]) for part in parts]
+            columns[col] = pd.Series(union_categoricals(parts), name=col)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+        del parts
+    return pd.DataFrame(columns)
+
+
+def _integral(values, low, high):
+    """Whether a float array holds only whole numbers within [low, high]"""
+    return (len(values) > 0 and np.isfinite(values).all()
+            and values.min() >= low and values.max() <= high
+            and (values == np.round(values)).all())
+
+
+def normalize_trace(df):
+    """Convert a trace to the compact schema the analyses expect.
+
+    Event, Device_ID and Message_ID become categoricals, Time becomes int64
+    nanoseconds and Position int16, and Toggled stays bool. Time and Position
+    remain float64 when they contain missing or fractional values.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    if df['Time'].dtype.kind != 'i':
+        times = df['Time'].to_numpy(dtype=np.float64)
+        if _integral(times, -2 ** 62, 2 ** 62):
+            df['Time'] = times.astype(np.int64)
+
+    if df['Toggled'].dtype != bool:
+        df['Toggled'] = df['Toggled'].astype(bool)
+
+    if 'Position' in df.columns and df['Position'].dtype != np.int16:
+        positions = df['Position'].to_numpy(dtype=np.float64)
+        # Non-negative only, so hop counts (position differences) cannot overflow
+        if _integral(positions, 0, np.iinfo(np.int16).max):
+            df['Position'] = positions.astype(np.int16)
+    return df
+
+
+class CategoryCodes:
+    """Stable integer ids for the labels of a categorical column across batches"""
+
+    def __init__(self):
+        self.ids = {}
+        self.labels = []
+
+    def codes(self, values):
+        """Ids of a categorical Series' values (-1 for missing), assigning new ids as needed"""
+        lookup = []
+        for label in values.cat.categories:
+            if label not in self.ids:
+                self.ids[label] = len(self.labels)
+                self.labels.append(label)
+            lookup.append(self.ids[label])
+        lookup = np.append(np.asarray(lookup, dtype=np.int64), -1)
+        return lookup[values.cat.codes.to_numpy()]
+
+    def categorical(self, codes, labels=None):
+        """Categorical of labels for an array of ids (labels: a copy of self.labels taken earlier)"""
+        return pd.Categorical.from_codes(codes, categories=pd.Index(self.labels if labels is None else labels,
+                                                                    dtype=object))
+
+
+def read_timing_csv(chunks, total_bytes=None, progress=None, chunk_rows=PARSE_CHUNK_ROWS):
+    """Parse a timing CSV from an iterable of byte chunks.
+
+    progress, if given, is called as progress(bytes_read, total_bytes) after
+    each chunk is consumed. Raises TraceFormatError when required columns
+    are missing.
+    """
+    reader = io.BufferedReader(
+        CommentFilterReader(chunks, total_bytes=total_bytes, progress=progress),
+        buffer_size=READ_CHUNK_BYTES
+    )
+    dtypes = {col: 'category' for col in CATEGORICAL_COLUMNS}
+
+    parsed = []
+    for chunk in pd.read_csv(reader, dtype=dtypes, chunksize=chunk_rows):
+        parsed.append(_normalize_chunk(chunk))
+
+    if not parsed:
+        raise TraceFormatError("No data rows found")
+    return normalize_trace(_concat_columns(parsed))
+
@@ -0,0 +1,350 @@
+"""
+Background jobs for trace parsing and the heavy analyses.
+
+Jobs run on a local process pool so a large upload never ties up a server
+worker. Each job's state is a small JSON file under the dataset store, so
+any worker can report its progress or cancel it. Finished analysis results
+are pickled next to the datasets, keyed by dataset handle and results
+version, and picked up by the analysis cache of whichever worker needs them.
+"""
+import _thread
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+
+import parallel_analysis
+from dataset_store import DatasetStore, _valid_token, _write_atomic
+from time_index import build_time_index
+from timeline_pyramid import build_timeline_pyramid
+from trace_analysis import analyze_communication_time, analyze_execution_timing, analyze_synchronicity
+from trace_cache import _iter_path_chunks, load_trace
+
+# Analyses a job runs after parsing, in order, with their share of the work
+JOB_ANALYSES = [(build_time_index, 10), (analyze_execution_timing, 50), (build_timeline_pyramid, 10),
+                (analyze_synchronicity, 25), (analyze_communication_time, 25)]
+# Earlier results an analysis takes as extra arguments instead of recomputing them
+JOB_INPUTS = {'build_timeline_pyramid': ['analyze_execution_timing']}
+PARSE_WEIGHT = 100
+
+# Status writes from progress callbacks are throttled to this interval (seconds)
+STATUS_INTERVAL = 0.25
+# Seconds between checks for a cancel request while an analysis is running
+CANCEL_POLL_INTERVAL = 0.2
+
+# Bumped whenever the pickled result types change, so results of older builds are never loaded
+RESULTS_VERSION = 2
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+def _summarize(name, result, has_device_info):
+    """Partial results shown while the rest of a job is still running"""
+    if name == 'analyze_execution_timing':
+        groups = ([stats for device_stats in result.values() for stats in device_stats.values()]
+                  if has_device_info else list(result.values()))
+        return {'executions': int(sum(stats['count'] for stats in groups)),
+                'events': len({event for device_stats in result.values() for event in device_stats}
+                              if has_device_info else result)}
+    if name == 'analyze_synchronicity':
+        return {'sync_pulses': len(result),
+                'max_sync_diff_ns': float(max((stats['max_diff_ns'] for stats in result.values()), default=0))}
+    if name == 'analyze_communication_time':
+        return {'messages': int(result['message_id'].nunique()) if len(result) else 0}
+    return {}
+
+
+class _Reporter:
+    """Writes a job's status file from inside the worker process"""
+
+    def __init__(self, jobs_dir, job_id, status):
+        self.path = os.path.join(jobs_dir, f"{job_id}.json")
+        self.cancel_path = os.path.join(jobs_dir, f"{job_id}.cancel")
+        self.status = status
+        self._written = 0
+
+    def check_cancelled(self):
+        if os.path.exists(self.cancel_path):
+            raise JobCancelled()
+
+    def update(self, force=True, **fields):
+        self.status.update(fields)
+        now = time.monotonic()
+        if force or now - self._written >= STATUS_INTERVAL:
+            self._written = now
+            data = json.dumps(self.status).encode('utf-8')
+            _write_atomic(self.path, lambda f: f.write(data))
+
+
+# Set while a job runs in this worker's main thread
+_watching = threading.Event()
+
+
+def _cancel_handler(signum, frame):
+    # Interrupts arriving after a job has finished (or Ctrl+C between jobs) are ignored
+    if _watching.is_set():
+        raise JobCancelled()
+
+
+class _CancelWatcher:
+    """Interrupts a running job as soon as its cancel file appears.
+
+    Jobs check for cancellation between steps, but one analysis of a large
+    trace can run for minutes. A thread polls for the cancel file and
+    interrupts the worker's main thread, where a SIGINT handler raises
+    JobCancelled, also out of a wait for analysis shards.
+    """
+
+    def __init__(self, reporter):
+        self.reporter = reporter
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        # Signal handlers can only be installed from the main thread
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, _cancel_handler)
+            _watching.set()
+            self._thread = threading.Thread(target=self._watch, name='job-cancel-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def _watch(self):
+        while not self._stopped.wait(CANCEL_POLL_INTERVAL):
+            if os.path.exists(self.reporter.cancel_path):
+                if hasattr(signal, 'pthread_kill'):
+                    # A real signal also wakes the main thread from blocking waits
+                    signal.pthread_kill(threading.main_thread().ident, signal.SIGINT)
+                else:
+                    _thread.interrupt_main()
+                return
+
+    def __exit__(self, *exc_info):
+        _watching.clear()
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        return False
+
+
+def run_job(store_config, jobs_dir, results_dir, job_id, spec, status):
+    """Job body, executed in a pool worker"""
+    reporter = _Reporter(jobs_dir, job_id, status)
+    total_weight = (PARSE_WEIGHT if spec['kind'] == 'upload' else 0) + sum(weight for _, weight in JOB_ANALYSES)
+    done_weight = 0
+    inputs = {name for names in JOB_INPUTS.values() for name in names}
+    results = {}
+
+    def stage_progress(fraction, weight):
+        return round(100 * (done_weight + fraction * weight) / total_weight, 1)
+
+    try:
+        with _CancelWatcher(reporter):
+            reporter.check_cancelled()
+            store = DatasetStore(**store_config)
+
+            if spec['kind'] == 'upload':
+                reporter.update(state='running', stage='parse', progress=0)
+
+                def progress(bytes_read, total_bytes):
+                    reporter.check_cancelled()
+                    if total_bytes:
+                        reporter.update(force=False,
+                                        progress=stage_progress(min(bytes_read / total_bytes, 1), PARSE_WEIGHT))
+
+                path = spec['path']
+                df, handle = load_trace(store, lambda: _iter_path_chunks(path),
+                                        total_bytes=os.path.getsize(path), progress=progress)
+                done_weight += PARSE_WEIGHT
+                reporter.update(handle=handle, rows=len(df), partial={'rows': len(df)})
+            else:
+                handle = spec['handle']
+                df = store.get_dataset(handle)
+                if df is None:
+                    raise ValueError("Dataset is no longer available")
+                reporter.update(state='running', handle=handle, rows=len(df), partial={'rows': len(df)})
+
+            for analysis, weight in JOB_ANALYSES:
+                reporter.check_cancelled()
+                name = analysis.__name__
+                reporter.update(stage=name, progress=stage_progress(0, weight))
+                path = _result_path(results_dir, name, handle)
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        result = pickle.load(f)
+                else:
+                    result = analysis(df, *(results[input_name] for input_name in JOB_INPUTS.get(name, [])))
+                    _write_atomic(path, lambda f: pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL))
+                if name in inputs:
+                    results[name] = result
+                done_weight += weight
+                partial = dict(reporter.status['partial'], **_summarize(name, result, 'Device_ID' in df.columns))
+                reporter.update(partial=partial, completed=reporter.status['completed'] + [name],
+                                progress=round(100 * done_weight / total_weight, 1))
+
+        reporter.update(state='done', stage=None, progress=100, finished=time.time())
+    except JobCancelled:
+        reporter.update(state='cancelled', finished=time.time())
+    except Exception as e:
+        reporter.update(state='failed', error=str(e), finished=time.time())
+    finally:
+        for path in (spec.get('path'), reporter.cancel_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+def _init_worker(analysis_workers):
+    """Pool initializer: every job worker gets its share of the analysis processes"""
+    parallel_analysis.ANALYSIS_WORKERS = analysis_workers
+
+
+def _result_path(results_dir, name, handle):
+    return os.path.join(results_dir, f"{name}-v{RESULTS_VERSION}-{handle}.pkl")
+
+
+class JobManager:
+    """Submits jobs to a process pool and reads their status files"""
+
+    def __init__(self, store, max_workers=None, max_age=24 * 3600):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self.jobs_dir = os.path.join(store.root, 'jobs')
+        self.results_dir = os.path.join(store.root, 'analysis-results')
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        os.makedirs(self.results_dir, exist_ok=True)
+        self._executor = None
+        self._futures = {}
+        # The job workers and the server process split one budget of ANALYSIS_WORKERS
+        # analysis processes instead of each starting that many; a share below two
+        # means analyzing in-process
+        workers = max_workers or os.cpu_count() or 1
+        self.analysis_workers = max(parallel_analysis.ANALYSIS_WORKERS // (workers + 1), 1)
+
+    def _pool(self):
+        if self._executor is None:
+            # Fresh interpreters: forking a threaded server process can deadlock
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(self.analysis_workers,))
+        return self._executor
+
+    def _status_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _write_status(self, status):
+        data = json.dumps(status).encode('utf-8')
+        _write_atomic(self._status_path(status['id']), lambda f: f.write(data))
+
+    def _submit(self, spec, filename):
+        self.prune()
+        job_id = uuid.uuid4().hex
+        status = {
+            'id': job_id, 'state': 'queued', 'stage': None, 'progress': 0, 'filename': filename,
+            'created': time.time(), 'completed': [], 'partial': {}
+        }
+        self._write_status(status)
+
+        store_config = {'root': self.store.root, 'max_bytes': self.store.max_bytes,
+                        'idle_timeout': self.store.idle_timeout}
+        args = (run_job, store_config, self.jobs_dir, self.results_dir, job_id, spec, status)
+        try:
+            future = self._pool().submit(*args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool
+            self._executor = None
+            future = self._pool().submit(*args)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finished(job_id, f))
+        return job_id
+
+    def _finished(self, job_id, future):
+        self._futures.pop(job_id, None)
+        if future.cancelled() or future.exception() is not None:
+            # The worker never ran or died without recording why (e.g. killed)
+            status = self.status(job_id) or {'id': job_id}
+            if status.get('state') in ('queued', 'running'):
+                status.update(state='cancelled' if future.cancelled() else 'failed',
+                              error=None if future.cancelled() else str(future.exception()),
+                              finished=time.time())
+                self._write_status(status)
+
+    def submit_upload(self, chunks, filename):
+        """Store uploaded bytes and queue a job that parses and analyzes them"""
+        job_path = os.path.join(self.jobs_dir, f"{uuid.uuid4().hex}.upload")
+        with open(job_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        return self._submit({'kind': 'upload', 'path': job_path}, filename)
+
+    def submit_analysis(self, handle, filename=None):
+        """Queue a job that runs the heavy analyses of a stored dataset"""
+        return self._submit({'kind': 'dataset', 'handle': handle}, filename)
+
+    def status(self, job_id):
+        """Latest status of a job, or None if unknown"""
+        if not _valid_token(job_id):
+            return None
+        try:
+            with open(self._status_path(job_id), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def cancel(self, job_id):
+        """Ask a job to stop; running jobs stop within CANCEL_POLL_INTERVAL of an analysis step"""
+        status = self.status(job_id)
+        if status is None or status['state'] not in ('queued', 'running'):
+            return False
+        with open(os.path.join(self.jobs_dir, f"{job_id}.cancel"), 'wb'):
+            pass
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        return True
+
+    def has_results(self, handle):
+        """Whether every job analysis of a dataset has already been computed"""
+        return all(os.path.exists(_result_path(self.results_dir, analysis.__name__, handle))
+                   for analysis, _ in JOB_ANALYSES)
+
+    def load_result(self, name, handle):
+        """A stored analysis result, or None"""
+        if not _valid_token(handle):
+            return None
+        path = _result_path(self.results_dir, name, handle)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            # Results in use are not pruned
+            os.utime(path)
+            return result
+        except FileNotFoundError:
+            return None
+
+    def save_result(self, name, handle, result):
+        """Store an analysis result computed outside a job, as if a job had produced it"""
+        if not _valid_token(handle):
+            raise ValueError(f"Invalid dataset handle: {handle!r}")
+        _write_atomic(_result_path(self.results_dir, name, handle),
+                      lambda f: pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def prune(self):
+        """Remove finished job files and analysis results older than max_age"""
+        now = time.time()
+        for directory in (self.jobs_dir, self.results_dir):
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    if now - os.stat(path).st_mtime > self.max_age:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
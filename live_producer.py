@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the serial-to-network bridge: sends timing events to the
+dashboard's live stream socket.
+
+Replays a CSV trace (shifting its timestamps on every loop) or generates
+synthetic executions for a few devices, at a given rate.
+
+    python live_producer.py --tcp 9100 --rate 50000
+    python live_producer.py --udp 9101 --csv data/sample_data.csv
+"""
+import argparse
+import socket
+import time
+
+import numpy as np
+import pandas as pd
+
+EVENTS = ['GPIO_Init', 'ADC_Read', 'SPI_Transfer', 'UART_Send', 'Timer_ISR']
+COLUMNS = ['Event', 'Time', 'Toggled', 'Device_ID']
+
+
+def synthetic_batches(devices, batch_rows, seed=0):
+    """Endless batches of start/end rows with log-normal execution times"""
+    rng = np.random.default_rng(seed)
+    clock = 0
+    executions = batch_rows // 2
+    while True:
+        starts = clock + np.cumsum(rng.integers(100, 2000, executions))
+        durations = rng.lognormal(7, 0.5, executions).astype(np.int64) + 1
+        event = rng.choice(EVENTS, executions)
+        device = rng.choice([f"Device_{i + 1}" for i in range(devices)], executions)
+        clock = int(starts[-1])
+
+        rows = pd.DataFrame({
+            'Event': np.concatenate([event, event]),
+            'Time': np.concatenate([starts, starts + durations]),
+            'Toggled': np.concatenate([np.ones(executions, dtype=bool), np.zeros(executions, dtype=bool)]),
+            'Device_ID': np.concatenate([device, device])
+        }).sort_values('Time', kind='stable')
+        yield rows
+
+
+def replay_batches(path, batch_rows):
+    """Endless batches from a CSV trace, offset in time on each pass"""
+    trace = pd.read_csv(path, comment='#')
+    columns = [col for col in COLUMNS + ['Position', 'Message_ID'] if col in trace.columns]
+    trace = trace[columns]
+    span = int(trace['Time'].max() - trace['Time'].min()) + 1
+    offset = 0
+    while True:
+        for lo in range(0, len(trace), batch_rows):
+            rows = trace.iloc[lo:lo + batch_rows].copy()
+            rows['Time'] += offset
+            yield rows
+        offset += span
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--tcp', type=int, metavar='PORT', help="send over TCP to this port")
+    target.add_argument('--udp', type=int, metavar='PORT', help="send UDP datagrams to this port")
+    parser.add_argument('--csv', help="replay this trace instead of synthetic events")
+    parser.add_argument('--devices', type=int, default=4, help="devices in the synthetic trace")
+    parser.add_argument('--rate', type=float, default=10000, help="rows per second (0 for as fast as possible)")
+    parser.add_argument('--batch', type=int, default=200, help="rows per send")
+    parser.add_argument('--limit', type=int, default=0, help="stop after this many rows (0 for no limit)")
+    args = parser.parse_args()
+
+    batches = replay_batches(args.csv, args.batch) if args.csv else synthetic_batches(args.devices, args.batch)
+
+    if args.tcp:
+        sock = socket.create_connection((args.host, args.tcp))
+        send = sock.sendall
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        send = lambda data: sock.sendto(data, (args.host, args.udp))
+
+    header_sent = False
+    sent, started, reported = 0, time.monotonic(), time.monotonic()
+    try:
+        for rows in batches:
+            # TCP announces the columns once per connection; every UDP datagram carries them
+            header = args.udp is not None or not header_sent
+            send(rows.to_csv(index=False, header=header).encode())
+            header_sent = True
+            sent += len(rows)
+
+            if args.rate:
+                # Sleep to stay on the requested average rate
+                delay = started + sent / args.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            now = time.monotonic()
+            if now - reported >= 1:
+                print(f"📡 {sent:,} rows sent ({sent / (now - started):,.0f} rows/s)")
+                reported = now
+            if args.limit and sent >= args.limit:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+    print(f"✅ Sent {sent:,} rows")
+
+
+if __name__ == "__main__":
+    main()
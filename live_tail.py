@@ -0,0 +1,254 @@
+"""
+Incremental statistics over a capture file that is still being written.
+
+A LiveTail remembers how far into the file it has read. Each poll parses
+only the newly appended complete lines, pairs them with any executions left
+open by the previous batch, and folds the results into running per
+(device, event) statistics: Welford mean/variance, min/max and a quantile
+sketch. Nothing is recomputed from the start of the file.
+
+Rows are expected to be appended in time order for each device and event,
+as a logic analyzer bridge writes them.
+"""
+import itertools
+import os
+import threading
+import time
+
+import numpy as np
+
+from ingest import CategoryCodes, CommentFilterReader, TraceFormatError, read_timing_csv
+from quantile_sketch import DDSketch
+from timing_engine import open_starts, pair_toggle_events
+
+# Executions kept per event for charts; statistics cover everything seen
+LIVE_HISTORY = 5000
+# Upper bound on bytes parsed per poll so one refresh never stalls; longer lines are skipped
+MAX_POLL_BYTES = 64 * 1024 * 1024
+# Tails nobody has polled for this long are dropped
+LIVE_TAIL_IDLE_SECONDS = 600
+
+# Event codes fit in the low bits of a (device, event) group id
+_EVENT_BITS = 20
+
+
+class RunningStats:
+    """Welford/Chan running moments plus a quantile sketch for one group"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = DDSketch()
+
+    def update(self, values):
+        """Fold a batch of execution times in"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        mean = values.mean()
+        self._combine(len(values), mean, ((values - mean) ** 2).sum(), values.min(), values.max())
+        self.sketch.add(values)
+
+    def merge(self, other):
+        """Fold another group's statistics in (e.g. to combine devices)"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+        return self
+
+    def _combine(self, count, mean, m2, low, high):
+        # Parallel form of Welford's update (Chan et al.)
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.count) if self.count else np.nan
+
+
+class LiveTail:
+    """Follow a growing timing CSV and keep execution statistics current"""
+
+    def __init__(self, path, history=LIVE_HISTORY):
+        self.path = path
+        self.history = history
+        self._lock = threading.Lock()
+        # Distinguishes this tail from a later one for the same path
+        self.generation = next(_generations)
+        # Bumped whenever the file is truncated and reading starts over
+        self.restarts = 0
+        self.last_poll = time.monotonic()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._header = None
+        self.rows = 0
+        # Lines longer than MAX_POLL_BYTES, and whether one is still being skipped
+        self.skipped_lines = 0
+        self._skipping = False
+        # Stable ids for labels seen so far, so state survives across batches
+        self._codes = {'Event': CategoryCodes(), 'Device_ID': CategoryCodes(), 'Message_ID': CategoryCodes()}
+        # Open executions carried into the next batch: group id -> (start time, message id)
+        self._open = {}
+        self.stats = {}
+        # Recent execution times per event, and how many were ever seen
+        self._recent = {}
+        self.totals = {}
+
+    def poll(self):
+        """Parse newly appended rows; returns the number of new executions"""
+        with self._lock:
+            self.last_poll = time.monotonic()
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                return 0
+            if size < self._offset:
+                # File was truncated or replaced: start over
+                self._reset()
+                self.restarts += 1
+
+            data = self._read_appended(size)
+            if not data:
+                return 0
+            return self._ingest(data)
+
+    def _read_appended(self, size):
+        """Complete new lines since the last poll (a trailing partial line waits)"""
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(min(size - self._offset, MAX_POLL_BYTES))
+        if self._skipping:
+            # The rest of an oversized line is dropped up to its newline
+            end = data.find(b'\n') + 1
+            if end == 0:
+                self._offset += len(data)
+                return b''
+            self._offset += end
+            data = data[end:]
+            self._skipping = False
+        elif len(data) == MAX_POLL_BYTES and b'\n' not in data:
+            # A line longer than a whole poll could never be parsed; skip it instead of stalling
+            self._offset += len(data)
+            self._skipping = True
+            self.skipped_lines += 1
+            return b''
+        cut = data.rfind(b'\n') + 1
+        self._offset += cut
+        data = data[:cut]
+
+        if self._header is None:
+            # The first line that is not a comment is the CSV header
+            lines = data.splitlines(keepends=True)
+            for i, line in enumerate(lines):
+                if line.strip() and not CommentFilterReader._is_comment(line):
+                    self._header = line
+                    return b''.join(lines[i + 1:])
+            return b''
+        return data
+
+    def _ingest(self, data):
+        try:
+            df = read_timing_csv([self._header, data])
+        except TraceFormatError:
+            return 0
+        self.rows += len(df)
+
+        has_device_info = 'Device_ID' in df.columns
+        event = self._codes['Event'].codes(df['Event'])
+        device = self._codes['Device_ID'].codes(df['Device_ID']) if has_device_info else np.zeros(len(df), dtype=np.int64)
+        message = (self._codes['Message_ID'].codes(df['Message_ID'])
+                   if has_device_info and 'Message_ID' in df.columns else None)
+        group = np.where((device >= 0) & (event >= 0), (device << _EVENT_BITS) + event, -1)
+
+        # Executions left open by the previous batch go first, as earlier starts
+        carried = list(self._open.items())
+        group = np.concatenate([np.array([g for g, _ in carried], dtype=np.int64), group])
+        times = np.concatenate([np.array([start for _, (start, _) in carried], dtype=np.float64),
+                                df['Time'].to_numpy(dtype=np.float64)])
+        toggled = np.concatenate([np.ones(len(carried), dtype=bool), df['Toggled'].to_numpy(dtype=bool)])
+        if message is not None:
+            message = np.concatenate([np.array([m for _, (_, m) in carried], dtype=np.int64), message])
+
+        start_rows, end_rows = pair_toggle_events(group, toggled, times, message)
+        self._open = {
+            int(group[row]): (times[row], int(message[row]) if message is not None else -1)
+            for row in open_starts(group, toggled, times, end_rows)
+        }
+
+        if len(start_rows) == 0:
+            return 0
+        self._record(group[start_rows], times[start_rows], times[end_rows] - times[start_rows],
+                     has_device_info)
+        return len(start_rows)
+
+    def _record(self, groups, starts, execution_times, has_device_info):
+        # Pairs come back ordered by group, then start time
+        bounds = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+        per_event = {}
+        for lo, hi in zip(np.append(0, bounds), np.append(bounds, len(groups))):
+            group = int(groups[lo])
+            event = self._codes['Event'].labels[group & ((1 << _EVENT_BITS) - 1)]
+            key = (self._codes['Device_ID'].labels[group >> _EVENT_BITS] if has_device_info else None, event)
+            self.stats.setdefault(key, RunningStats()).update(execution_times[lo:hi])
+            per_event.setdefault(event, []).append((starts[lo:hi], execution_times[lo:hi]))
+
+        # Chart history per event across devices, in start time order
+        for event, parts in per_event.items():
+            batch_starts = np.concatenate([part[0] for part in parts])
+            batch_times = np.concatenate([part[1] for part in parts])[np.argsort(batch_starts, kind='stable')]
+            recent = np.concatenate([self._recent.get(event, np.empty(0)), batch_times])
+            self._recent[event] = recent[-self.history:]
+            self.totals[event] = self.totals.get(event, 0) + len(batch_times)
+
+    def events(self):
+        with self._lock:
+            return list(self.totals)
+
+    def recent(self, event, since=0):
+        """(first index, times) of the retained executions of an event with index >= since"""
+        with self._lock:
+            recent = self._recent.get(event, np.empty(0))
+            first = self.totals.get(event, 0) - len(recent)
+            skip = max(since - first, 0)
+            return first + skip, recent[skip:].copy()
+
+    def event_summary(self):
+        """Per-event statistics merged across devices"""
+        with self._lock:
+            summary = {}
+            for (_, event), stats in self.stats.items():
+                summary.setdefault(event, RunningStats()).merge(stats)
+            return summary
+
+
+_tails = {}
+_tails_lock = threading.Lock()
+_generations = itertools.count()
+
+
+def get_live_tail(path):
+    """Shared LiveTail for a path (one per server process)"""
+    now = time.monotonic()
+    with _tails_lock:
+        for idle in [key for key, tail in _tails.items() if now - tail.last_poll > LIVE_TAIL_IDLE_SECONDS]:
+            del _tails[idle]
+        tail = _tails.get(path)
+        if tail is None:
+            tail = _tails[path] = LiveTail(path)
+        return tail
+
+
+def release_live_tail(path):
+    """Drop the shared LiveTail of a path; the next get_live_tail starts over"""
+    with _tails_lock:
+        _tails.pop(path, None)
@@ -0,0 +1,186 @@
+"""
+Process-pool execution of analyses over independent shards of a trace.
+
+Executions never span devices, so a trace split by Device_ID can be paired
+and summarized one shard per core. The shard columns are copied once into a
+single shared memory block that workers map directly, so no DataFrame is
+pickled on the way in; workers write their bulk output (e.g. execution
+records) into a second shared block and only return small summaries.
+"""
+import concurrent.futures
+import heapq
+import multiprocessing
+import os
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory, util
+
+import numpy as np
+
+# Worker processes for sharded analyses (1 runs everything in-process). Background job
+# workers share this budget between them (see jobs.JobManager)
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', os.cpu_count() or 1))
+# Smaller traces are analyzed in-process. Sharding costs about a third of the serial run at
+# any size (parallel_benchmark.py on one core); from 1M rows (~0.35 s serial) the estimated
+# saving with 4 or more workers is worth a tenth of a second or more
+PARALLEL_MIN_ROWS = int(os.environ.get('PARALLEL_MIN_ROWS', 1_000_000))
+
+# Column offsets in the shared block are aligned for any dtype
+_ALIGN = 64
+
+_executor = None
+
+
+def use_parallel(rows, devices):
+    """Whether a trace is worth sharding across worker processes"""
+    return ANALYSIS_WORKERS > 1 and devices > 1 and rows >= PARALLEL_MIN_ROWS
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        # Fresh interpreters: forking a threaded server process can deadlock
+        _executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=ANALYSIS_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        # Inside a pool worker (e.g. a background job), multiprocessing joins
+        # child processes on exit before concurrent.futures stops them. Shut
+        # the pool down first, ahead of the queue finalizers (priority 10)
+        util.Finalize(None, _shutdown, exitpriority=100)
+    return _executor
+
+
+def _shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+def device_shards(device_codes, shards):
+    """Shard number for every row, balancing row counts across shards.
+
+    Whole devices are assigned largest first to the currently smallest shard
+    (LPT scheduling). Rows with a negative device code get shard number
+    shards, i.e. no shard.
+    """
+    device_codes = np.asarray(device_codes)
+    rows_per_device = np.bincount(device_codes + 1)[1:]
+    # The last entry catches code -1
+    shard_of_device = np.full(len(rows_per_device) + 1, shards, dtype=_shard_dtype(shards))
+    loads = [(0, shard) for shard in range(shards)]
+    for device in np.argsort(-rows_per_device, kind='stable').tolist():
+        load, shard = heapq.heappop(loads)
+        shard_of_device[device] = shard
+        heapq.heappush(loads, (load + int(rows_per_device[device]), shard))
+    return shard_of_device[device_codes]
+
+
+def _shard_dtype(shards):
+    # Small unsigned keys get numpy's linear-time radix sort
+    return np.uint16 if shards < 2 ** 16 else np.int64
+
+
+def _layout(dtypes_and_lengths):
+    """(offset, total size) of consecutive aligned arrays"""
+    offsets, size = [], 0
+    for dtype, length in dtypes_and_lengths:
+        offsets.append(size)
+        size += -(-np.dtype(dtype).itemsize * length // _ALIGN) * _ALIGN
+    return offsets, max(size, 1)
+
+
+def _view(shm, spec, lo, hi):
+    if spec is None:
+        return None
+    dtype, offset, length = spec
+    return np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)[lo:hi]
+
+
+def _run_shard(function, input_name, specs, lo, hi, output=None):
+    """Worker side: gather one shard's rows from the shared columns and run the function on them"""
+    inputs = shared_memory.SharedMemory(name=input_name)
+    try:
+        rows = _view(inputs, specs['_order'], lo, hi)
+        columns = {name: _view(inputs, spec, 0, None)[rows] if spec is not None else None
+                   for name, spec in specs.items() if name != '_order'}
+        # Views must be gone before the mapping can be closed
+        del rows
+    finally:
+        inputs.close()
+
+    if output is None:
+        return function(**columns)
+    output_name, output_spec, out_lo, out_hi = output
+    outputs = shared_memory.SharedMemory(name=output_name)
+    columns['out'] = _view(outputs, output_spec, out_lo, out_hi)
+    try:
+        return function(**columns)
+    finally:
+        del columns
+        outputs.close()
+
+
+def map_shards(function, columns, shard, shards, out_dtype=None, out_rows=None):
+    """Run function(**columns) on every shard of the rows in worker processes.
+
+    columns maps argument names to equal-length arrays (None is passed
+    through). Rows keep their relative order within a shard; rows whose
+    shard number is not below shards are left out. With out_dtype, each
+    shard also gets an 'out' array of out_rows[shard] elements to fill.
+
+    Returns (results, outputs): the function results and, with out_dtype,
+    the 'out' arrays (copied out of shared memory), both in shard order.
+    """
+    global _executor
+    shard = np.asarray(shard)
+    order = np.argsort(shard.astype(_shard_dtype(shards), copy=False), kind='stable')
+    bounds = np.searchsorted(shard[order], np.arange(shards + 1)).tolist()
+
+    # Columns go to shared memory as they are; each worker gathers its own rows
+    arrays = {name: np.asarray(values) for name, values in columns.items() if values is not None}
+    arrays['_order'] = order
+    offsets, size = _layout([(values.dtype, len(values)) for values in arrays.values()])
+    specs = dict.fromkeys(columns)
+    specs.update({name: (values.dtype, offset, len(values)) for (name, values), offset in zip(arrays.items(), offsets)})
+
+    out_bounds = [0] * (shards + 1)
+    if out_dtype is not None:
+        out_bounds[1:] = np.cumsum(out_rows).tolist()
+    output_spec = (np.dtype(out_dtype), 0, out_bounds[-1]) if out_dtype is not None else None
+
+    inputs = shared_memory.SharedMemory(create=True, size=size)
+    outputs = (shared_memory.SharedMemory(create=True, size=_layout([output_spec[::2]])[1])
+               if out_dtype is not None else None)
+    try:
+        for name, values in arrays.items():
+            np.copyto(_view(inputs, specs[name], 0, None), values)
+
+        futures = []
+        try:
+            futures = [
+                _pool().submit(_run_shard, function, inputs.name, specs, bounds[i], bounds[i + 1],
+                               (outputs.name, output_spec, out_bounds[i], out_bounds[i + 1])
+                               if outputs is not None else None)
+                for i in range(shards)
+            ]
+            results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); the next call starts a fresh pool
+            _executor = None
+            raise
+        except BaseException:
+            # Interrupted (e.g. a cancelled job): shards that have not started never will
+            for future in futures:
+                future.cancel()
+            raise
+
+        out_arrays = None
+        if outputs is not None:
+            out = _view(outputs, output_spec, 0, None)
+            out_arrays = [out[out_bounds[i]:out_bounds[i + 1]].copy() for i in range(shards)]
+            del out
+        return results, out_arrays
+    finally:
+        for block in (inputs, outputs):
+            if block is not None:
+                block.close()
+                block.unlink()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Parallel analysis benchmark: execution timing analysis in one process versus sharded by device.
+
+Times analyze_execution_timing on synthetic multi-device traces of several
+sizes, serially and across worker processes, checks that both give the same
+results, and reports the speedup. On a machine with fewer cores than
+workers the shards run one after another, so the difference to the serial
+run is the cost of sharding (copying columns to shared memory, gathering
+shards, merging) rather than a speedup. The benchmark then estimates the
+speedup on as many cores as workers as serial / (serial / workers +
+overhead). That is an estimate, not a measurement: part of the overhead
+would itself run in parallel.
+
+    python parallel_benchmark.py
+    python parallel_benchmark.py --workers 2 4 8 --rows 1000000 4000000 16000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import parallel_analysis
+from trace_analysis import analyze_execution_timing
+
+
+def synthetic_trace(rows, devices=16, events=8, seed=0):
+    """Trace of rows toggles: start/end pairs of random events spread over devices"""
+    rng = np.random.default_rng(seed)
+    pairs = rows // 2
+    device = rng.integers(devices, size=pairs)
+    event = rng.integers(events, size=pairs)
+    start = np.sort(rng.integers(0, pairs * 100, size=pairs))
+    duration = rng.integers(50, 5000, size=pairs)
+    return pd.DataFrame({
+        'Event': pd.Categorical.from_codes(np.repeat(event, 2), [f"Event_{i}" for i in range(events)]),
+        'Time': np.column_stack([start, start + duration]).ravel(),
+        'Toggled': np.tile([True, False], pairs),
+        'Device_ID': pd.Categorical.from_codes(np.repeat(device, 2), [f"Device_{i}" for i in range(devices)]),
+    })
+
+
+def timed(workers, df, runs):
+    """(best seconds, result) of analyze_execution_timing with the given worker count"""
+    parallel_analysis.ANALYSIS_WORKERS = workers
+    # Every size is sharded when workers > 1
+    parallel_analysis.PARALLEL_MIN_ROWS = 0
+    best, result = float('inf'), None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = analyze_execution_timing(df)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def same_results(a, b):
+    if a.keys() != b.keys():
+        return False
+    for device, device_stats in a.items():
+        for event, stats in device_stats.items():
+            other = b[device][event]
+            if stats['count'] != other['count'] or not np.array_equal(stats['executions'], other['executions']):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4], help="worker counts to compare")
+    parser.add_argument('--rows', type=int, nargs='+', default=[250_000, 1_000_000, 4_000_000],
+                        help="trace sizes (toggle rows)")
+    parser.add_argument('--devices', type=int, default=16, help="devices in the synthetic traces")
+    parser.add_argument('--runs', type=int, default=3, help="timed runs per measurement (the best is kept)")
+    args = parser.parse_args()
+
+    print(f"🖥️ {os.cpu_count()} CPUs; the pool is started once per worker count before timing")
+    for workers in args.workers:
+        # Spawning the pool is a one-off cost per process, so it is kept out of the timings
+        started = time.perf_counter()
+        timed(workers, synthetic_trace(20_000, devices=args.devices), 1)
+        print(f"   pool of {workers} started in {time.perf_counter() - started:.2f} s")
+        parallel_analysis._shutdown()
+
+    print(f"{'rows':>12} {'workers':>8} {'serial s':>9} {'sharded s':>10} {'speedup':>8} {'overhead s':>11} "
+          f"{'estimated':>10}")
+    for rows in args.rows:
+        df = synthetic_trace(rows, devices=args.devices)
+        serial, expected = timed(1, df, args.runs)
+        for workers in args.workers:
+            timed(workers, df.head(20_000), 1)
+            sharded, result = timed(workers, df, args.runs)
+            if not same_results(expected, result):
+                raise SystemExit(f"❌ Sharded results differ from the serial run ({rows} rows, {workers} workers)")
+            # With fewer cores than workers the shards share a core; their work equals the
+            # serial run's, so the excess is what sharding costs
+            if os.cpu_count() < workers:
+                overhead = max(sharded - serial, 0)
+                estimated = f"{serial / (serial / workers + overhead):>9.2f}x"
+            else:
+                overhead, estimated = float('nan'), f"{'-':>10}"
+            print(f"{rows:>12,} {workers:>8} {serial:>9.2f} {sharded:>10.2f} {serial / sharded:>7.2f}x "
+                  f"{overhead:>11.2f} {estimated}")
+            parallel_analysis._shutdown()
+
+    print("✅ Sharded results match the serial run")
+
+
+if __name__ == "__main__":
+    main()
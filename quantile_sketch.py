@@ -0,0 +1,162 @@
+"""
+Mergeable quantile sketch for execution latencies.
+
+DDSketch maps every value to a logarithmic bucket, so any quantile comes
+back within a fixed relative error of the true value while memory stays
+bounded by the number of buckets. Sketches of different devices, files or
+time windows merge by adding bucket counts.
+"""
+import math
+
+import numpy as np
+
+
+class _DenseStore:
+    """Bucket counts for a contiguous range of keys, collapsing the lowest keys past max_bins"""
+
+    def __init__(self, max_bins):
+        self.max_bins = max_bins
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, keys, weights=None):
+        if len(keys) == 0:
+            return
+        low, high = int(keys.min()), int(keys.max())
+        if len(self.counts):
+            low, high = min(low, self.offset), max(high, self.offset + len(self.counts) - 1)
+        counts = np.zeros(high - low + 1, dtype=np.int64)
+        counts[self.offset - low:self.offset - low + len(self.counts)] = self.counts
+        counts += np.bincount(keys - low, weights=weights, minlength=len(counts)).astype(np.int64)
+        self.offset, self.counts = low, counts
+        self._collapse()
+
+    def _collapse(self):
+        excess = len(self.counts) - self.max_bins
+        if excess > 0:
+            self.counts[excess] += self.counts[:excess].sum()
+            self.counts = self.counts[excess:].copy()
+            self.offset += excess
+
+    def merge(self, other):
+        nonzero = np.flatnonzero(other.counts)
+        self.add(nonzero + other.offset, weights=other.counts[nonzero])
+
+    def keys(self):
+        nonzero = np.flatnonzero(self.counts)
+        return nonzero + self.offset, self.counts[nonzero]
+
+
+class DDSketch:
+    """Quantile sketch with bounded relative error (DDSketch, collapsing lowest buckets)"""
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._positive = _DenseStore(max_bins)
+        self._negative = _DenseStore(max_bins)
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def add(self, values):
+        """Add an array of values (NaN values are ignored)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self._positive.add(self._keys(values[values > 0]))
+        self._negative.add(self._keys(-values[values < 0]))
+        self.zero_count += int(np.count_nonzero(values == 0))
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def merge(self, other):
+        """Fold another sketch with the same accuracy into this one"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self):
+        return DDSketch(self.relative_accuracy, self.max_bins).merge(self)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def quantiles(self, qs):
+        """Estimates for several quantiles in [0, 1] (NaN for an empty sketch)"""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+
+        # Buckets in value order: negatives (largest magnitude first), zeros, positives
+        negative_keys, negative_counts = self._negative.keys()
+        positive_keys, positive_counts = self._positive.keys()
+        bucket_values = np.concatenate([
+            -self._bucket_value(negative_keys[::-1]),
+            [0.0],
+            self._bucket_value(positive_keys)
+        ])
+        cumulative = np.cumsum(np.concatenate([negative_counts[::-1], [self.zero_count], positive_counts]))
+
+        ranks = qs * (self.count - 1)
+        estimates = bucket_values[np.searchsorted(cumulative, ranks, side='right')]
+        # Exact extremes are known, so never report beyond them
+        return np.clip(estimates, self.min, self.max)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def _bucket_value(self, keys):
+        # Midpoint (in relative terms) of the bucket (gamma^(k-1), gamma^k]
+        return 2 * np.power(self.gamma, keys.astype(np.float64)) / (self.gamma + 1)
+
+    def to_dict(self):
+        """JSON-friendly state, e.g. for storing alongside cached results"""
+        positive_keys, positive_counts = self._positive.keys()
+        negative_keys, negative_counts = self._negative.keys()
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'positive': [positive_keys.tolist(), positive_counts.tolist()],
+            'negative': [negative_keys.tolist(), negative_counts.tolist()],
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state['relative_accuracy'], state['max_bins'])
+        for store, (keys, counts) in ((sketch._positive, state['positive']), (sketch._negative, state['negative'])):
+            store.add(np.asarray(keys, dtype=np.int64), weights=np.asarray(counts, dtype=np.float64))
+        sketch.zero_count = state['zero_count']
+        sketch.count = state['count']
+        sketch.sum = state['sum']
+        sketch.min = state['min']
+        sketch.max = state['max']
+        return sketch
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self._positive.counts.nbytes + self._negative.counts.nbytes
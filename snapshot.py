@@ -0,0 +1,126 @@
+"""
+Prebuilt snapshots of a trace and its analysis results.
+
+A snapshot directory holds the parsed trace as an Arrow IPC file and the
+analysis results as a pickle whose arrays live out-of-band in one flat
+binary file. Loading memory-maps both, so a process starts with the trace
+and every result in place without parsing or analyzing anything. Arrays in
+the results are read-only views of the mapped file.
+"""
+import json
+import mmap
+import os
+import pickle
+
+import pyarrow as pa
+
+from analysis_cache import remember_fingerprint
+from dataset_store import _write_atomic
+from ingest import TRACE_SCHEMA_VERSION
+from trace_cache import _iter_path_chunks, content_handle
+
+# Bumped whenever the layout or the pickled result types change
+SNAPSHOT_VERSION = 2
+
+# Buffer offsets in the binary file are aligned for any dtype
+_ALIGN = 64
+
+
+def _paths(directory):
+    return {name: os.path.join(directory, filename) for name, filename in (
+        ('manifest', 'manifest.json'), ('trace', 'trace.arrow'), ('results', 'results.pkl'),
+        ('buffers', 'results.bin'))}
+
+
+def _source_info(source):
+    stat = os.stat(source)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_snapshot(directory, df, handle, results, source=None):
+    """Write a trace, its content handle and {analysis name: result} as a snapshot.
+
+    source is the CSV the trace was parsed from; loading checks the snapshot
+    against it.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = _paths(directory)
+    # Without a manifest a half-written snapshot is never loaded
+    if os.path.exists(paths['manifest']):
+        os.remove(paths['manifest'])
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    def write_trace(f):
+        with pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+
+    _write_atomic(paths['trace'], write_trace)
+
+    # Protocol 5 hands every contiguous array to buffer_callback instead of copying it into the pickle
+    buffers = []
+    data = pickle.dumps(results, protocol=5, buffer_callback=buffers.append)
+    spans, offset = [], 0
+    for buffer in buffers:
+        length = buffer.raw().nbytes
+        spans.append((offset, length))
+        offset += -(-length // _ALIGN) * _ALIGN
+
+    def write_buffers(f):
+        for buffer, (offset, length) in zip(buffers, spans):
+            f.seek(offset)
+            f.write(buffer.raw())
+        f.truncate(max(offset, 1))
+
+    _write_atomic(paths['buffers'], write_buffers)
+    _write_atomic(paths['results'], lambda f: f.write(data))
+
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'trace_schema': TRACE_SCHEMA_VERSION,
+        'handle': handle,
+        'analyses': sorted(results),
+        'buffers': spans,
+        'source': _source_info(source) if source else None
+    }
+    _write_atomic(paths['manifest'], lambda f: f.write(json.dumps(manifest).encode('utf-8')))
+
+
+def _is_current(manifest, source):
+    """Whether a snapshot was built by this code from the source file as it is now"""
+    if manifest.get('version') != SNAPSHOT_VERSION or manifest.get('trace_schema') != TRACE_SCHEMA_VERSION:
+        return False
+    if not source or not os.path.exists(source) or not manifest.get('source'):
+        # A snapshot may ship without its CSV
+        return True
+    info = _source_info(source)
+    if info['size'] != manifest['source']['size']:
+        return False
+    if info['mtime_ns'] == manifest['source']['mtime_ns']:
+        return True
+    # Checkouts and copies touch files; same contents still match
+    return content_handle(_iter_path_chunks(source)) == manifest['handle']
+
+
+def load_snapshot(directory, source=None):
+    """(df, handle, results) from a snapshot, or None when missing or out of date for source"""
+    paths = _paths(directory)
+    try:
+        with open(paths['manifest'], 'r') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if not _is_current(manifest, source):
+        return None
+
+    with pa.memory_map(paths['trace']) as trace:
+        # One block per column avoids consolidating into fresh 2-D arrays
+        df = pa.ipc.open_file(trace).read_all().to_pandas(split_blocks=True)
+    remember_fingerprint(df, manifest['handle'])
+
+    with open(paths['buffers'], 'rb') as f:
+        # The mapping stays open for as long as any result array refers to it
+        mapped = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    with open(paths['results'], 'rb') as f:
+        results = pickle.load(f, buffers=[mapped[offset:offset + length] for offset, length in manifest['buffers']])
+    return df, manifest['handle'], results
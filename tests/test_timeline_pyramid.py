@@ -0,0 +1,50 @@
+"""
+Busy time rollups of the timeline pyramid.
+"""
+import numpy as np
+
+from timeline_pyramid import TimelinePyramid
+
+
+def pyramid_of(starts, times):
+    records = np.zeros(len(starts), dtype=[('start', np.int64), ('time', np.int64)])
+    records['start'], records['time'] = starts, times
+    return TimelinePyramid({'Device_0': {'Read': {'executions': records}}}, True)
+
+
+def overlap_per_bucket(pyramid, level, starts, times):
+    """Reference busy time: every execution's overlap with every bucket"""
+    width = pyramid.width(level)
+    edges = pyramid.origin + np.arange(pyramid.buckets >> level) * width
+    ends = np.asarray(starts) + np.asarray(times)
+    return np.clip(np.minimum(ends[:, None], edges + width) - np.maximum(np.asarray(starts)[:, None], edges),
+                   0, None).sum(axis=0)
+
+
+def test_busy_time_is_spread_over_overlapped_buckets():
+    rng = np.random.default_rng(0)
+    starts = np.sort(rng.integers(0, 1_000_000, 500))
+    times = rng.integers(1, 50_000, 500)
+    pyramid = pyramid_of(starts, times)
+
+    for level in range(len(pyramid.levels)):
+        expected = overlap_per_bucket(pyramid, level, starts, times)
+        bucket_starts, busy = pyramid.busy(level)
+        assert np.array_equal(bucket_starts, pyramid.origin + np.flatnonzero(expected) * pyramid.width(level))
+        assert np.allclose(busy, expected[expected > 0])
+
+
+def test_long_execution_fills_buckets_without_exceeding_them():
+    # One execution across the whole trace next to many short ones
+    starts = np.append(0, np.arange(1, 100_000, 10))
+    times = np.append(100_000, np.ones(len(starts) - 1, dtype=np.int64))
+    pyramid = pyramid_of(starts, times)
+
+    bucket_starts, busy = pyramid.busy(0)
+    width = pyramid.width(0)
+    # At most the long execution plus the short ones starting in a bucket
+    assert busy.max() <= width + width // 10 + 1
+    assert np.isclose(busy.sum(), times.sum())
+    start, end = 20_000, 40_000
+    selected = pyramid.busy(0, start, end)[0]
+    assert selected.min() <= start and selected.max() >= end - width
@@ -0,0 +1,196 @@
+"""
+Toggle pairing compared against the dashboard's original per-row loop.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import parallel_analysis
+from timing_engine import EXECUTION_DTYPE, execution_records, pair_toggle_events
+from trace_analysis import analyze_execution_timing
+
+
+def baseline_execution_timing(df):
+    """The original iterrows pairing, kept as the reference.
+
+    The only change is a stable sort by Time, so rows with the same
+    timestamp are taken in row order (the rule pair_toggle_events
+    documents); the original's default quicksort left their order
+    unspecified.
+    """
+    execution_stats = {}
+    has_device_info = 'Device_ID' in df.columns
+
+    def pair(event_data, with_message):
+        executions = []
+        start_time = None
+        message_id = None
+        for _, row in event_data.sort_values('Time', kind='stable').iterrows():
+            if row['Toggled'] and start_time is None:
+                start_time = row['Time']
+                message_id = row.get('Message_ID', None) if with_message else None
+            elif not row['Toggled'] and start_time is not None:
+                row_message_id = row.get('Message_ID', None) if with_message else None
+                if (pd.isna(message_id) and pd.isna(row_message_id)) or (message_id == row_message_id):
+                    executions.append((start_time, row['Time']))
+                    start_time = None
+                    message_id = None
+        return executions
+
+    if has_device_info:
+        for device in df['Device_ID'].unique():
+            device_df = df[df['Device_ID'] == device]
+            device_stats = {}
+            for event in device_df['Event'].unique():
+                executions = pair(device_df[device_df['Event'] == event], True)
+                if executions:
+                    device_stats[event] = executions
+            if device_stats:
+                execution_stats[device] = device_stats
+    else:
+        for event in df['Event'].unique():
+            executions = pair(df[df['Event'] == event], False)
+            if executions:
+                execution_stats[event] = executions
+    return execution_stats
+
+
+def random_trace(rng, rows, devices=3, events=3, messages=4, time_range=None, device_info=True):
+    """Random toggles; time_range below rows makes timestamps repeat"""
+    if time_range is None:
+        times = rng.permutation(rows) * 10
+    else:
+        times = rng.integers(0, time_range, size=rows)
+    df = pd.DataFrame({
+        'Event': rng.choice([f"Event_{i}" for i in range(events)], size=rows),
+        'Time': times,
+        'Toggled': rng.random(rows) < 0.5,
+    })
+    if device_info:
+        df['Device_ID'] = rng.choice([f"Device_{i}" for i in range(devices)], size=rows)
+        message_ids = np.array([f"MSG_{i}" for i in range(messages)] + [np.nan], dtype=object)
+        df['Message_ID'] = rng.choice(message_ids, size=rows)
+    return df
+
+
+def as_pairs(execution_stats, has_device_info=True):
+    """{device: {event: [(start, end), ...]}} of analyze_execution_timing results"""
+    def pairs(event_stats):
+        executions = event_stats['executions']
+        assert event_stats['count'] == len(executions)
+        return list(zip(executions['start'].tolist(), executions['end'].tolist()))
+
+    if not has_device_info:
+        return {event: pairs(event_stats) for event, event_stats in execution_stats.items()}
+    return {device: {event: pairs(event_stats) for event, event_stats in device_stats.items()}
+            for device, device_stats in execution_stats.items()}
+
+
+def assert_matches_baseline(df, has_device_info=True):
+    expected = baseline_execution_timing(df)
+    actual = as_pairs(analyze_execution_timing(df), has_device_info)
+    assert actual == expected
+    # Devices and events keep their order of first appearance
+    assert list(actual) == list(expected)
+    if has_device_info:
+        for device in expected:
+            assert list(actual[device]) == list(expected[device])
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_traces_unique_times(seed):
+    rng = np.random.default_rng(seed)
+    assert_matches_baseline(random_trace(rng, int(rng.integers(1, 400))))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_traces_tied_times(seed):
+    rng = np.random.default_rng(1000 + seed)
+    rows = int(rng.integers(1, 400))
+    assert_matches_baseline(random_trace(rng, rows, time_range=max(rows // 8, 1)))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_traces_without_device_info(seed):
+    rng = np.random.default_rng(2000 + seed)
+    df = random_trace(rng, 300, time_range=100, device_info=False)
+    assert_matches_baseline(df, has_device_info=False)
+
+
+def test_nested_starts_are_ignored():
+    df = pd.DataFrame({
+        'Event': ['A'] * 6,
+        'Time': [0, 5, 10, 20, 25, 30],
+        'Toggled': [True, True, False, False, True, False],
+        'Device_ID': ['D0'] * 6,
+        'Message_ID': ['M'] * 6,
+    })
+    assert as_pairs(analyze_execution_timing(df)) == {'D0': {'A': [(0, 10), (25, 30)]}}
+    assert_matches_baseline(df)
+
+
+def test_end_with_other_message_id_is_ignored():
+    df = pd.DataFrame({
+        'Event': ['A'] * 5,
+        'Time': [0, 10, 20, 30, 40],
+        'Toggled': [True, False, False, True, False],
+        'Device_ID': ['D0'] * 5,
+        'Message_ID': ['M1', 'M2', 'M1', 'M2', 'M2'],
+    })
+    assert as_pairs(analyze_execution_timing(df)) == {'D0': {'A': [(0, 20), (30, 40)]}}
+    assert_matches_baseline(df)
+
+
+def test_missing_message_ids_match_each_other():
+    df = pd.DataFrame({
+        'Event': ['A'] * 6,
+        'Time': [0, 10, 20, 30, 40, 50],
+        'Toggled': [True, False, False, True, False, False],
+        'Device_ID': ['D0'] * 6,
+        'Message_ID': [np.nan, 'M1', np.nan, 'M1', np.nan, 'M1'],
+    })
+    assert as_pairs(analyze_execution_timing(df)) == {'D0': {'A': [(0, 20), (30, 50)]}}
+    assert_matches_baseline(df)
+
+
+def test_tied_timestamps_follow_row_order():
+    # An end and a start at the same time: row order decides which comes first
+    df = pd.DataFrame({
+        'Event': ['A'] * 6,
+        'Time': [0, 10, 10, 20, 20, 30],
+        'Toggled': [True, False, True, True, False, False],
+    })
+    assert as_pairs(analyze_execution_timing(df), has_device_info=False) == {'A': [(0, 10), (10, 20)]}
+    assert_matches_baseline(df, has_device_info=False)
+
+
+def test_pair_toggle_events_skips_negative_groups():
+    group = np.array([0, -1, 0, 1, 1])
+    toggled = np.array([True, False, False, True, False])
+    times = np.array([0, 5, 10, 0, 3])
+    start_rows, end_rows = pair_toggle_events(group, toggled, times)
+    assert start_rows.tolist() == [0, 3]
+    assert end_rows.tolist() == [2, 4]
+
+
+def test_sharded_analysis_matches_baseline(monkeypatch):
+    monkeypatch.setattr(parallel_analysis, 'ANALYSIS_WORKERS', 2)
+    monkeypatch.setattr(parallel_analysis, 'PARALLEL_MIN_ROWS', 0)
+    rng = np.random.default_rng(3000)
+    try:
+        assert_matches_baseline(random_trace(rng, 2000, devices=5, time_range=500))
+    finally:
+        parallel_analysis._shutdown()
+
+
+def test_many_devices_widen_record_codes():
+    # Codes past int16 would wrap around and merge unrelated devices
+    device = np.array([5, 40_000, 40_000, 5])
+    times = np.array([0, 1, 3, 4])
+    records = execution_records(np.array([0, 1]), np.array([3, 2]), times, device=device, event=np.zeros(4, int))
+    assert records.dtype['device'] == np.int32
+    assert records['device'].tolist() == [5, 40_000]
+    assert records['time'].tolist() == [4, 2]
+
+    narrow = execution_records(np.array([0]), np.array([3]), times, device=np.array([5, 6, 6, 5]))
+    assert narrow.dtype == EXECUTION_DTYPE
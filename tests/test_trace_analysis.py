@@ -0,0 +1,45 @@
+"""
+Time window selection of execution timing results.
+"""
+import numpy as np
+import pandas as pd
+
+from trace_analysis import analyze_execution_timing, executions_starting_within
+
+
+def toggles(rows):
+    """Trace from (device, event, time, toggled) tuples"""
+    return pd.DataFrame(rows, columns=['Device_ID', 'Event', 'Time', 'Toggled'])
+
+
+def test_window_keeps_executions_by_start():
+    df = toggles([
+        ('A', 'Read', 0, True), ('A', 'Read', 50, False),     # starts before the window
+        ('A', 'Read', 100, True), ('A', 'Read', 150, False),  # inside
+        ('A', 'Read', 180, True), ('A', 'Read', 400, False),  # ends after it
+        ('A', 'Write', 10, True), ('A', 'Write', 120, False), # crosses its start
+        ('B', 'Read', 300, True), ('B', 'Read', 310, False),  # after it
+    ])
+    stats = executions_starting_within(analyze_execution_timing(df), True, 100, 200)
+
+    assert list(stats) == ['A'] and list(stats['A']) == ['Read']
+    read = stats['A']['Read']
+    assert read['count'] == 2
+    assert read['executions']['end'].tolist() == [150, 400]
+    assert read['max_ns'] == 220 and read['min_ns'] == 50
+    assert np.isclose(read['mean_ns'], 135)
+
+
+def test_window_bounds_are_inclusive():
+    df = toggles([('A', 'Read', 100, True), ('A', 'Read', 110, False),
+                  ('A', 'Read', 200, True), ('A', 'Read', 210, False)])
+    stats = analyze_execution_timing(df)
+    assert executions_starting_within(stats, True, 100, 200)['A']['Read'] is stats['A']['Read']
+    assert executions_starting_within(stats, True, 101, 199) == {}
+
+
+def test_window_without_device_info():
+    df = toggles([('A', 'Read', 0, True), ('A', 'Read', 10, False),
+                  ('A', 'Read', 20, True), ('A', 'Read', 30, False)]).drop(columns='Device_ID')
+    stats = executions_starting_within(analyze_execution_timing(df), False, 5, 25)
+    assert stats['Read']['count'] == 1 and stats['Read']['executions']['start'].tolist() == [20]
@@ -0,0 +1,104 @@
+"""
+Time-range index over a trace.
+
+Row positions are sorted once by (device, event, Time) and every
+(device, event) group gets an offset into that order, so the rows of any
+time window are found with two binary searches per group instead of a scan
+of the whole trace: O(groups * log n + k log k) for k matching rows, the
+last term for putting them back in trace order.
+"""
+import numpy as np
+import pandas as pd
+
+from timing_engine import _stable_order
+
+
+def _codes_and_labels(column):
+    """Integer codes of a column with missing values given a code of their own (the last one)"""
+    codes, labels = pd.factorize(column)
+    return np.where(codes >= 0, codes, len(labels)), list(labels)
+
+
+class TimeIndex:
+    """Trace rows sorted by (device, event, Time), with per-group offsets"""
+
+    def __init__(self, df):
+        event_codes, self.events = _codes_and_labels(df['Event'])
+        if 'Device_ID' in df.columns:
+            device_codes, self.devices = _codes_and_labels(df['Device_ID'])
+        else:
+            device_codes, self.devices = np.zeros(len(df), dtype=np.int64), [None]
+        # One slot past the labels holds rows with a missing value
+        self._event_slots = len(self.events) + 1
+        group = device_codes * self._event_slots + event_codes
+
+        times = df['Time'].to_numpy()
+        order = _stable_order(times, group)
+        self.order = order.astype(np.int32 if len(order) < 2 ** 31 else np.int64)
+        # Missing times sort last within their group, so no window ever matches them
+        self.times = times[order]
+        groups = (len(self.devices) + 1) * self._event_slots
+        self.offsets = np.searchsorted(group[order], np.arange(groups + 1))
+        self._groups = np.flatnonzero(np.diff(self.offsets))
+
+        valid = times[~np.isnan(times)] if times.dtype.kind == 'f' else times
+        self.span = (valid.min(), valid.max()) if len(valid) else None
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.order.nbytes + self.times.nbytes + self.offsets.nbytes
+
+    def _search(self, groups, value, side):
+        """Binary search for value within each group's time-sorted rows, all groups at once"""
+        lo, hi = self.offsets[groups], self.offsets[groups + 1]
+        last = max(len(self.times) - 1, 0)
+        while True:
+            active = lo < hi
+            if not active.any():
+                return lo
+            mid = (lo + hi) // 2
+            times = self.times[np.minimum(mid, last)]
+            # Missing times compare false, so they count as larger than any value
+            right = active & ((times < value) if side == 'left' else (times <= value))
+            lo = np.where(right, mid + 1, lo)
+            hi = np.where(active & ~right, mid, hi)
+
+    def _bounds(self, start, end, devices):
+        """(lo, hi) arrays of positions in the sorted order for every selected group's window"""
+        groups = self._groups
+        if devices is not None:
+            slots = [self.devices.index(device) for device in devices if device in self.devices]
+            groups = groups[np.isin(groups // self._event_slots, slots)]
+        if start is None and end is None:
+            return self.offsets[groups], self.offsets[groups + 1]
+        lo = self._search(groups, start, 'left') if start is not None else self.offsets[groups]
+        hi = (self._search(groups, end, 'right') if end is not None
+              else self._search(groups, np.inf, 'right'))
+        return lo, np.maximum(hi, lo)
+
+    def rows(self, start=None, end=None, devices=None):
+        """Positions of the rows with start <= Time <= end, in trace order.
+
+        devices limits the result to those Device_ID labels (None for all).
+        Rows with a missing Time are only returned when neither bound is given.
+        """
+        lo, hi = self._bounds(start, end, devices)
+        keep = lo < hi
+        if not keep.any():
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate([self.order[a:b] for a, b in zip(lo[keep].tolist(), hi[keep].tolist())])
+        # Analyses expect the trace's own row order (ties in Time keep it)
+        return np.sort(rows)
+
+    def count(self, start=None, end=None, devices=None):
+        """Number of rows rows() would return, without gathering them"""
+        lo, hi = self._bounds(start, end, devices)
+        return int((hi - lo).sum())
+
+    def covers(self, start, end):
+        """Whether a window includes every timestamp of the trace"""
+        return self.span is None or (start <= self.span[0] and end >= self.span[1])
+
+
+def build_time_index(df):
+    """TimeIndex of a trace, in the form of an analysis function (for caching and jobs)"""
+    return TimeIndex(df) if df is not None and not df.empty else None
@@ -0,0 +1,301 @@
+"""
+Multi-resolution rollups of execution times for zoomable timelines.
+
+Executions are bucketed by start time into power-of-two wide buckets, and
+each coarser level merges pairs of neighbouring buckets of the level below,
+up to a single bucket for the whole trace. Every non-empty bucket of every
+(device, event) holds the count, sum, min and max of its execution times and
+a coarse quantile sketch, so a chart of any time range reads the one level
+that has about as many buckets as the chart has room for, whatever the size
+of the trace. Busy time is rolled up separately: each execution's time is
+spread over the buckets it overlaps, so no bucket is busier than its width
+per execution running through it.
+"""
+import math
+import os
+
+import numpy as np
+
+from trace_analysis import analyze_execution_timing
+
+# Buckets across the whole trace at the finest level (rounded up to a power of two)
+PYRAMID_BASE_BUCKETS = int(os.environ.get('PYRAMID_BASE_BUCKETS', 2 ** 16))
+# Finer buckets than this many executions on average are no better than the executions
+# themselves, except that short traces still get MIN_BASE_BUCKETS
+MIN_BUCKET_EXECUTIONS = 16
+MIN_BASE_BUCKETS = 1024
+# Relative accuracy of the bucket sketches, coarser than the analysis sketches to keep them small
+SKETCH_ACCURACY = 0.05
+
+_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+# Zero and negative execution times share the lowest sketch key
+_ZERO_KEY = np.iinfo(np.int16).min
+
+
+def _sketch_keys(times):
+    """Logarithmic sketch bucket of each execution time (as in DDSketch)"""
+    keys = np.full(len(times), _ZERO_KEY, dtype=np.int16)
+    positive = times > 0
+    keys[positive] = np.clip(np.ceil(np.log(times[positive]) / math.log(_GAMMA)), _ZERO_KEY + 1,
+                             np.iinfo(np.int16).max)
+    return keys
+
+
+def _sketch_values(keys):
+    values = 2 * np.power(_GAMMA, keys.astype(np.float64)) / (_GAMMA + 1)
+    return np.where(keys == _ZERO_KEY, 0.0, values)
+
+
+def _ranges(first, last):
+    """Concatenation of arange(first[i], last[i]) over all i"""
+    lengths = np.maximum(last - first, 0)
+    return np.repeat(first - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+
+def _segments(keys):
+    """Start position of every run of equal values in a sorted array"""
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+
+
+def _busy_cells(group, offsets, times, buckets, width):
+    """Busy time of every (group, bucket) cell with executions running in it, sorted by cell.
+
+    offsets are execution starts relative to the pyramid origin. An execution
+    contributes its overlap with each bucket from the one it starts in to the
+    one it ends in.
+    """
+    ends = offsets + times
+    first = np.floor(offsets / width).astype(np.int64)
+    last = np.minimum(np.floor(ends / width).astype(np.int64), buckets - 1)
+    base = group * buckets
+    spanning = last > first
+    # Partly covered buckets: the one an execution starts in and the one it ends in
+    cells = [base + first, base[spanning] + last[spanning]]
+    busy = [np.minimum(ends, (first + 1) * width) - offsets, ends[spanning] - last[spanning] * width]
+
+    # Buckets wholly inside executions: runs of cells between changes of the count in progress
+    edges = np.concatenate([base[spanning] + first[spanning] + 1, base[spanning] + last[spanning]])
+    order = np.argsort(edges, kind='stable')
+    edges = edges[order]
+    running = np.cumsum(np.repeat([1, -1], np.count_nonzero(spanning))[order])
+    covered = np.flatnonzero(running[:-1] > 0)
+    cells.append(_ranges(edges[covered], edges[covered + 1]))
+    busy.append(width * np.repeat(running[covered], edges[covered + 1] - edges[covered]).astype(np.float64))
+
+    cell, inverse = np.unique(np.concatenate(cells), return_inverse=True)
+    busy = np.bincount(inverse, np.concatenate(busy).astype(np.float64), minlength=len(cell))
+    keep = busy > 0
+    return cell[keep], busy[keep]
+
+
+class _Level:
+    """Non-empty buckets of one pyramid level, sorted by (group, bucket)"""
+
+    def __init__(self, cell, count, total, low, high, sketch_offsets, sketch_keys, sketch_counts,
+                 busy_cell, busy):
+        # cell = group * buckets per group + bucket
+        self.cell = cell
+        self.count = count
+        self.sum = total
+        self.min = low
+        self.max = high
+        # Sketch entries of bucket i are sketch_keys/counts[sketch_offsets[i]:sketch_offsets[i + 1]]
+        self.sketch_offsets = sketch_offsets
+        self.sketch_keys = sketch_keys
+        self.sketch_counts = sketch_counts
+        # Busy time of the cells executions run in (not only those they start in)
+        self.busy_cell = busy_cell
+        self.busy = busy
+
+    @classmethod
+    def from_executions(cls, cell, times, busy_cell, busy):
+        """Level from executions sorted by cell"""
+        starts = _segments(cell)
+        keys = _sketch_keys(times)
+        order = np.lexsort((keys, cell))
+        entries = cls._sketch_entries(cell[order], keys[order], np.ones(len(times), dtype=np.uint32))
+        return cls(cell[starts], np.diff(np.append(starts, len(cell))), np.add.reduceat(times, starts),
+                   np.minimum.reduceat(times, starts), np.maximum.reduceat(times, starts), *entries,
+                   busy_cell, busy)
+
+    @staticmethod
+    def _sketch_entries(cell, keys, counts):
+        """Bucket offsets, keys and counts of (cell, key) entries sorted by cell and then key"""
+        first = _segments(cell.astype(np.int64) * 2 ** 16 + (keys.astype(np.int64) - _ZERO_KEY))
+        entry_cells = cell[first]
+        offsets = np.append(_segments(entry_cells), len(first))
+        return offsets, keys[first], np.add.reduceat(counts, first) if len(first) else counts[:0]
+
+    def coarser(self):
+        """Next level up: every pair of neighbouring buckets merged into one"""
+        cell = self.cell // 2
+        starts = _segments(cell)
+        # Sketch entries follow their bucket; the two halves' keys are merged back into order
+        entry_cell = np.repeat(cell, np.diff(self.sketch_offsets))
+        order = np.lexsort((self.sketch_keys, entry_cell))
+        entries = self._sketch_entries(entry_cell[order], self.sketch_keys[order], self.sketch_counts[order])
+        busy_cell = self.busy_cell // 2
+        busy_starts = _segments(busy_cell)
+        busy = np.add.reduceat(self.busy, busy_starts) if len(busy_starts) else self.busy
+        return _Level(cell[starts], np.add.reduceat(self.count, starts), np.add.reduceat(self.sum, starts),
+                      np.minimum.reduceat(self.min, starts), np.maximum.reduceat(self.max, starts), *entries,
+                      busy_cell[busy_starts], busy)
+
+    def nbytes(self):
+        return sum(values.nbytes for values in vars(self).values())
+
+
+class TimelinePyramid:
+    """Per-(device, event) rollups of execution times at power-of-two time buckets"""
+
+    def __init__(self, execution_stats, has_device_info, base_buckets=PYRAMID_BASE_BUCKETS):
+        if has_device_info:
+            groups = [((device, event), event_stats) for device, device_stats in execution_stats.items()
+                      for event, event_stats in device_stats.items()]
+        else:
+            groups = [((None, event), event_stats) for event, event_stats in execution_stats.items()]
+        self.groups = [key for key, _ in groups]
+
+        executions = [event_stats['executions'] for _, event_stats in groups]
+        group = np.repeat(np.arange(len(groups)), [len(records) for records in executions])
+        executions = np.concatenate(executions) if executions else np.empty(0, dtype=[('start', 'f8'), ('time', 'f8')])
+        starts, times = executions['start'], executions['time'].astype(np.float64)
+        # Executions with a missing start or end have no place on the timeline
+        valid = ~(np.isnan(starts) | np.isnan(times)) if starts.dtype.kind == 'f' else np.ones(len(starts), dtype=bool)
+        group, starts, times = group[valid], starts[valid], times[valid]
+
+        if len(starts) == 0:
+            self.origin, self.base_width, self.buckets, self.levels = 0, 1, 1, []
+            return
+
+        # Smallest power-of-two bucket width giving at most base_buckets buckets over the trace
+        self.origin = int(math.floor(starts.min()))
+        offsets = starts - self.origin
+        # The pyramid reaches to the last end, so the busy time of late executions is kept
+        span = int(math.floor((offsets + times).max())) + 1
+        offsets = (np.floor(offsets) if offsets.dtype.kind == 'f' else offsets).astype(np.int64)
+        base_buckets = min(base_buckets, max(-(-len(times) // (len(groups) * MIN_BUCKET_EXECUTIONS)),
+                                             MIN_BASE_BUCKETS))
+        self.buckets = 1 << max(int(base_buckets) - 1, 0).bit_length()
+        self.base_width = 1 << max(-(-span // self.buckets) - 1, 0).bit_length()
+        # Short traces need fewer than base_buckets buckets of 1 ns
+        self.buckets = min(self.buckets, 1 << (-(-span // self.base_width) - 1).bit_length())
+
+        cell = group * self.buckets + (offsets >> (self.base_width.bit_length() - 1))
+        order = np.argsort(cell, kind='stable')
+        busy = _busy_cells(group, starts - self.origin, times, self.buckets, self.base_width)
+        self.levels = [_Level.from_executions(cell[order], times[order], *busy)]
+        for _ in range(self.buckets.bit_length() - 1):
+            self.levels.append(self.levels[-1].coarser())
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(level.nbytes() for level in self.levels)
+
+    @property
+    def span(self):
+        """(start, end) of the time range the pyramid covers, or None when empty"""
+        return (self.origin, self.origin + self.buckets * self.base_width) if self.levels else None
+
+    def width(self, level):
+        """Bucket width of a level in ns"""
+        return self.base_width << level
+
+    def level_for(self, start, end, max_buckets):
+        """Finest level that covers [start, end] in at most about max_buckets buckets"""
+        buckets = (end - start) / (self.base_width * max(max_buckets, 1))
+        level = math.ceil(math.log2(buckets)) if buckets > 1 else 0
+        return min(level, len(self.levels) - 1)
+
+    def group_codes(self, devices=None, events=None):
+        """Positions in groups of the given devices and events (None for all)"""
+        return [code for code, (device, event) in enumerate(self.groups)
+                if (devices is None or device in devices) and (events is None or event in events)]
+
+    def query(self, level, start=None, end=None, groups=None, quantiles=()):
+        """Buckets of a level overlapping [start, end], merged across groups.
+
+        Returns a dict of arrays over the non-empty buckets in time order:
+        'start' (bucket start in ns), 'count', 'sum', 'mean', 'min', 'max'
+        and one 'p<q>' entry per requested quantile q in [0, 1].
+        """
+        data = self.levels[level]
+        width = self.width(level)
+        buckets = max(self.buckets >> level, 1)
+        lo = 0 if start is None else max(int((start - self.origin) // width), 0)
+        hi = buckets - 1 if end is None else min(int((end - self.origin) // width), buckets - 1)
+        if groups is None:
+            groups = range(len(self.groups))
+
+        # Every group's buckets in range are one contiguous slice of the level
+        cells = np.array(groups, dtype=np.int64) * buckets
+        first = np.searchsorted(data.cell, cells + lo, side='left')
+        last = np.searchsorted(data.cell, cells + hi, side='right')
+        rows = _ranges(first, last)
+
+        bucket = data.cell[rows] % buckets
+        order = np.argsort(bucket, kind='stable')
+        rows, bucket = rows[order], bucket[order]
+        starts = _segments(bucket)
+        result = {'start': self.origin + bucket[starts] * width}
+        if len(rows) == 0:
+            result.update({name: np.empty(0) for name in ('count', 'sum', 'mean', 'min', 'max')})
+            result.update({f"p{q * 100:g}": np.empty(0) for q in quantiles})
+            return result
+        result['count'] = np.add.reduceat(data.count[rows], starts)
+        result['sum'] = np.add.reduceat(data.sum[rows], starts)
+        result['mean'] = result['sum'] / result['count']
+        result['min'] = np.minimum.reduceat(data.min[rows], starts)
+        result['max'] = np.maximum.reduceat(data.max[rows], starts)
+
+        if quantiles:
+            # Sketch entries of the selected buckets, merged per time bucket
+            entries = _ranges(data.sketch_offsets[rows], data.sketch_offsets[rows + 1])
+            row_bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(rows))))
+            entry_bucket = np.repeat(row_bucket, np.diff(data.sketch_offsets)[rows])
+            keys, counts = data.sketch_keys[entries], data.sketch_counts[entries]
+            order = np.lexsort((keys, entry_bucket))
+            offsets, keys, counts = _Level._sketch_entries(entry_bucket[order], keys[order], counts[order])
+            for q in quantiles:
+                result[f"p{q * 100:g}"] = self._quantiles(offsets, keys, counts, q, result['min'], result['max'])
+        return result
+
+    def busy(self, level, start=None, end=None, groups=None):
+        """Busy time of the buckets of a level overlapping [start, end], summed across groups.
+
+        Returns (bucket starts in ns, busy ns) over the buckets in time order
+        that any execution runs in.
+        """
+        data = self.levels[level]
+        width = self.width(level)
+        buckets = max(self.buckets >> level, 1)
+        lo = 0 if start is None else max(int((start - self.origin) // width), 0)
+        hi = buckets - 1 if end is None else min(int((end - self.origin) // width), buckets - 1)
+        if groups is None:
+            groups = range(len(self.groups))
+
+        cells = np.array(groups, dtype=np.int64) * buckets
+        rows = _ranges(np.searchsorted(data.busy_cell, cells + lo, side='left'),
+                       np.searchsorted(data.busy_cell, cells + hi, side='right'))
+        bucket, inverse = np.unique(data.busy_cell[rows] % buckets, return_inverse=True)
+        return self.origin + bucket * width, np.bincount(inverse, data.busy[rows], minlength=len(bucket))
+
+    @staticmethod
+    def _quantiles(offsets, keys, counts, q, low, high):
+        """Quantile q of every bucket's sketch, vectorized over buckets"""
+        cumulative = np.cumsum(counts, dtype=np.int64)
+        before = np.append(0, cumulative)[offsets[:-1]]
+        totals = cumulative[offsets[1:] - 1] - before
+        positions = np.searchsorted(cumulative, before + q * (totals - 1), side='right')
+        # Exact extremes are known, so never report beyond them
+        return np.clip(_sketch_values(keys[positions]), low, high)
+
+
+def build_timeline_pyramid(df, execution_stats=None):
+    """TimelinePyramid of a trace, from its execution timing analysis when already at hand"""
+    if df is None or df.empty:
+        return None
+    if execution_stats is None:
+        execution_stats = analyze_execution_timing(df)
+    return TimelinePyramid(execution_stats, 'Device_ID' in df.columns)
@@ -0,0 +1,276 @@
+"""
+Columnar toggle-pairing engine for hardware timing traces.
+
+Replays the Toggled=True/False state machine used by the dashboard without a
+per-row Python loop: rows are sorted once by (group, Time) and every start/end
+pair is located with NumPy scans.
+"""
+import numpy as np
+
+# One execution record: 32 bytes instead of a dict per execution. device,
+# event and message are category codes into the trace's Device_ID, Event and
+# Message_ID columns (-1 when missing). Traces with more devices or events
+# than int16 codes can hold get int32 device and event fields.
+EXECUTION_DTYPE = np.dtype([
+    ('device', np.int16),
+    ('event', np.int16),
+    ('message', np.int32),
+    ('start', np.int64),
+    ('end', np.int64),
+    ('time', np.int64),
+])
+
+
+def execution_dtype(time_dtype, max_code=-1):
+    """Record dtype for executions of a trace with the given Time dtype and largest category code"""
+    float_times = np.dtype(time_dtype).kind == 'f'
+    wide_codes = max_code > np.iinfo(np.int16).max
+    if not (float_times or wide_codes):
+        return EXECUTION_DTYPE
+    fields = []
+    for name, (dtype, _) in EXECUTION_DTYPE.fields.items():
+        if name in ('start', 'end', 'time') and float_times:
+            # Traces with missing or fractional times keep float timestamps
+            dtype = np.float64
+        elif dtype == np.int16 and wide_codes:
+            dtype = np.int32
+        fields.append((name, dtype))
+    return np.dtype(fields)
+
+
+def max_category_code(*codes):
+    """Largest code in any of the given code arrays (None entries are skipped; -1 if none)"""
+    return max((int(values.max()) for values in codes if values is not None and len(values)), default=-1)
+
+
+def _next_marked(marked, seg_end):
+    """Index of the first marked position strictly after each position within its segment (n if none)"""
+    n = len(marked)
+    candidates = np.where(marked, np.arange(n), n)
+    # Reverse running minimum gives the nearest marked position at or after i
+    at_or_after = np.minimum.accumulate(candidates[::-1])[::-1]
+    after = np.empty(n, dtype=np.int64)
+    after[:-1] = at_or_after[1:]
+    after[-1] = n
+    after[after >= seg_end] = n
+    return after
+
+
+def _segment_ends(keys_changed):
+    """Exclusive end position of the segment each position belongs to"""
+    n = len(keys_changed) + 1
+    boundaries = np.flatnonzero(keys_changed) + 1
+    ends = np.append(boundaries, n)
+    segment_ids = np.zeros(n, dtype=np.int64)
+    segment_ids[boundaries] = 1
+    segment_ids = np.cumsum(segment_ids)
+    return ends[segment_ids], np.insert(boundaries, 0, 0)
+
+
+def _stable_order(*keys):
+    """Stable sort order by several keys, last key primary (like np.lexsort)"""
+    order = None
+    for key in keys:
+        key = key if order is None else key[order]
+        # Small non-negative integer codes take NumPy's radix sort path
+        if key.dtype.kind in 'iu' and len(key) and key.min() >= 0 and key.max() < 2 ** 16:
+            key = key.astype(np.uint16)
+        step = np.argsort(key, kind='stable')
+        order = step if order is None else order[step]
+    return order
+
+
+def pair_toggle_events(group, toggled, times, message=None):
+    """Pair start/end toggles into executions.
+
+    Within each group (e.g. a device/event combination), rows are taken in
+    Time order. A Toggled=True row starts an execution when none is open; the
+    execution ends at the next Toggled=False row carrying the same message
+    code. True rows seen while an execution is open, and False rows with a
+    different message code, are ignored. Rows with equal times are taken in
+    input order (the sort is stable), so an end and a start sharing a
+    timestamp pair as the rows are listed.
+
+    group and message are integer codes (message -1 marks a missing
+    Message_ID, which matches other missing values). Rows with a negative
+    group code are skipped.
+
+    Returns (start_rows, end_rows): row positions into the inputs, ordered by
+    group and then start time.
+    """
+    group = np.asarray(group, dtype=np.int64)
+    toggled = np.asarray(toggled, dtype=bool)
+    times = np.asarray(times)
+    empty = np.empty(0, dtype=np.int64)
+
+    rows = np.flatnonzero(group >= 0)
+    if len(rows) == 0:
+        return empty, empty
+
+    # One stable sort by (group, Time); position in this order encodes time order
+    order = rows[_stable_order(times[rows], group[rows])]
+    n = len(order)
+    g = group[order]
+    is_start = toggled[order]
+
+    group_end, group_first = _segment_ends(g[1:] != g[:-1])
+
+    # First start of each group, and the next start after any position
+    next_start = _next_marked(is_start, group_end)
+    first_start = np.where(is_start[group_first], group_first, next_start[group_first])
+    first_start = first_start[first_start < n]
+
+    # Next matching end for every position: regroup by (group, message) keeping time order
+    if message is None:
+        by_message = np.arange(n)
+        m = np.zeros(n, dtype=np.int64)
+    else:
+        m = np.asarray(message, dtype=np.int64)[order]
+        by_message = _stable_order(m + 1, g)
+    gm, mm = g[by_message], m[by_message]
+    message_end, _ = _segment_ends((gm[1:] != gm[:-1]) | (mm[1:] != mm[:-1]))
+    next_end_sorted = _next_marked(~is_start[by_message], message_end)
+    next_end = np.full(n, n, dtype=np.int64)
+    found = next_end_sorted < n
+    next_end[by_message[found]] = by_message[next_end_sorted[found]]
+
+    # Successor of each start: the first start after its matching end
+    start_positions = np.flatnonzero(is_start)
+    rank = np.full(n + 1, len(start_positions), dtype=np.int64)
+    rank[start_positions] = np.arange(len(start_positions))
+    ends_of_starts = next_end[start_positions]
+    successor = np.full(len(start_positions) + 1, len(start_positions), dtype=np.int64)
+    has_end = ends_of_starts < n
+    successor[:-1][has_end] = rank[next_start[ends_of_starts[has_end]]]
+
+    # Starts that actually fire are the successor chains from each group's
+    # first start; collect them by pointer doubling in O(n log n)
+    reached = np.zeros(len(start_positions) + 1, dtype=bool)
+    reached[rank[first_start]] = True
+    reached[-1] = False
+    jump = successor
+    while True:
+        targets = jump[np.flatnonzero(reached[:-1])]
+        targets = targets[~reached[targets]]
+        targets = targets[targets < len(start_positions)]
+        if len(targets) == 0:
+            break
+        reached[targets] = True
+        jump = jump[jump]
+
+    fired = start_positions[reached[:-1] & has_end]
+    return order[fired], order[next_end[fired]]
+
+
+def execution_records(start_rows, end_rows, times, device=None, event=None, message=None):
+    """Build execution records for paired rows from per-row category codes.
+
+    Device and event fields are int16, or int32 when a trace has more
+    distinct values than int16 codes can hold.
+    """
+    device = None if device is None else np.asarray(device)
+    event = None if event is None else np.asarray(event)
+    records = np.empty(len(start_rows), dtype=execution_dtype(times.dtype, max_category_code(device, event)))
+    for name, codes in (('device', device), ('event', event), ('message', message)):
+        if codes is None:
+            records[name] = -1
+            continue
+        records[name] = np.asarray(codes)[start_rows]
+    records['start'] = times[start_rows]
+    records['end'] = times[end_rows]
+    records['time'] = records['end'] - records['start']
+    return records
+
+
+def pulse_spread(pulse, times):
+    """Spread statistics of the times within each pulse in O(n log n).
+
+    pulse holds non-negative integer codes, one per (pulse, device) time.
+    Pairwise absolute differences are never materialized: with the times of
+    a pulse sorted, the sum of |x_i - x_j| over pairs is sum(x_j * (2j - n + 1))
+    and the sum of squared differences is n * sum((x - mean)^2).
+
+    Returns (order, pulses, stats): order sorts the inputs by pulse and then
+    time, pulses lists the code of each pulse, and stats maps 'count',
+    'max_diff', 'min_diff', 'mean_diff', 'std_diff' and 'median' to per-pulse
+    arrays plus 'offset' to per-input offsets from the pulse median (in
+    sorted order). Missing times propagate as NaN like np.max/np.min would.
+    """
+    pulse = np.asarray(pulse, dtype=np.int64)
+    times = np.asarray(times)
+    if len(pulse) == 0:
+        empty = np.empty(0)
+        stats = {name: empty for name in ('count', 'max_diff', 'min_diff', 'mean_diff', 'std_diff', 'median', 'offset')}
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), stats
+
+    order = _stable_order(times, pulse)
+    p, x = pulse[order], times[order]
+
+    _, starts = _segment_ends(p[1:] != p[:-1])
+    counts = np.diff(np.append(starts, len(p)))
+    segment = np.repeat(np.arange(len(starts)), counts)
+    rank = np.arange(len(p)) - starts[segment]
+    last = starts + counts - 1
+
+    # Sorted, so the largest difference is last - first and the smallest is an adjacent gap
+    max_diff = x[last] - x[starts]
+    gaps = np.empty_like(x)
+    gaps[:-1] = np.diff(x)
+    gaps[last] = np.iinfo(x.dtype).max if x.dtype.kind in 'iu' else np.inf
+    min_diff = np.minimum.reduceat(gaps, starts)
+
+    # Center on the pulse median before summing so large timestamps keep precision.
+    # Missing times sort last; the median is taken over the known ones
+    xf = x.astype(np.float64)
+    known = np.add.reduceat(~np.isnan(xf), starts)
+    median = (xf[starts + np.maximum(known - 1, 0) // 2] + xf[starts + known // 2]) / 2
+    median[known == 0] = np.nan
+    offset = xf - median[segment]
+    n = counts.astype(np.float64)
+    pairs = n * (n - 1) / 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_diff = np.add.reduceat(offset * (2 * rank - (n[segment] - 1)), starts) / pairs
+        s1 = np.add.reduceat(offset, starts)
+        s2 = np.add.reduceat(offset * offset, starts)
+        mean_sq_diff = n * (s2 - s1 * s1 / n) / pairs
+        std_diff = np.sqrt(np.maximum(mean_sq_diff - mean_diff * mean_diff, 0))
+
+    stats = {
+        'count': counts,
+        'max_diff': max_diff,
+        'min_diff': min_diff,
+        'mean_diff': mean_diff,
+        'std_diff': std_diff,
+        'median': median,
+        'offset': offset,
+    }
+    return order, p[starts], stats
+
+
+def open_starts(group, toggled, times, end_rows):
+    """Row of the execution still open at the end of each group, if any.
+
+    Given the end_rows returned by pair_toggle_events for the same inputs, the
+    open execution of a group is its first start after its last completed
+    end (or its first start when nothing completed). Used to carry unfinished
+    executions from one batch of rows into the next.
+    """
+    group = np.asarray(group, dtype=np.int64)
+    toggled = np.asarray(toggled, dtype=bool)
+    rows = np.flatnonzero(group >= 0)
+    if len(rows) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    order = rows[_stable_order(np.asarray(times)[rows], group[rows])]
+    position = np.empty(len(group), dtype=np.int64)
+    position[order] = np.arange(len(order))
+
+    # Compact group codes in sorted order, and the last completed end per group
+    g = group[order]
+    compact = np.cumsum(np.append(0, g[1:] != g[:-1]))
+    last_end = np.full(compact[-1] + 1, -1, dtype=np.int64)
+    np.maximum.at(last_end, compact[position[end_rows]], position[end_rows])
+
+    candidates = np.flatnonzero(toggled[order] & (np.arange(len(order)) > last_end[compact]))
+    _, first = np.unique(compact[candidates], return_index=True)
+    return order[candidates[first]]
@@ -0,0 +1,352 @@
+"""
+Execution, synchronicity and communication analyses of timing traces.
+
+These are plain functions of a trace DataFrame with no Dash dependencies,
+so the dashboard can also run them in background worker processes.
+"""
+import numpy as np
+import pandas as pd
+
+import parallel_analysis
+from quantile_sketch import DDSketch
+from timing_engine import execution_dtype, execution_records, max_category_code, pair_toggle_events, pulse_spread
+
+
+# Tail latency percentiles reported from the quantile sketches
+LATENCY_PERCENTILES = [('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('p99.9', 0.999)]
+
+
+def latency_percentiles(sketch):
+    """Percentile fields ('p50_ns', ...) estimated from a quantile sketch"""
+    values = sketch.quantiles([q for _, q in LATENCY_PERCENTILES])
+    return {f"{name}_ns": value for (name, _), value in zip(LATENCY_PERCENTILES, values)}
+
+
+def merged_sketch(event_stats_list):
+    """Combine the sketches of several stats entries (devices, events, files)"""
+    sketch = DDSketch()
+    for event_stats in event_stats_list:
+        sketch.merge(event_stats['sketch'])
+    return sketch
+
+
+def format_percentiles(sketch):
+    """Short 'p50 · p90 · p99 · p99.9' text for cards and summaries"""
+    values = sketch.quantiles([q for _, q in LATENCY_PERCENTILES])
+    return " · ".join(f"{name} {value:,.0f} ns" for (name, _), value in zip(LATENCY_PERCENTILES, values))
+
+
+def category_codes(column):
+    """Category codes of a trace column (-1 for missing values)"""
+    return column.astype('category').cat.codes.to_numpy()
+
+
+def execution_group_stats(group, toggled, times, message=None, device=None, event=None):
+    """Pair executions and summarize them per group code.
+
+    Returns the execution records (ordered by group, then start time) and
+    {group code: stats}, each stats' 'executions' being a slice of the records.
+    """
+    start_rows, end_rows = pair_toggle_events(group, toggled, times, message)
+    
+    # Executions are kept as one structured array (32 bytes each, 36 with
+    # int32 codes); every group gets a slice of it
+    records = execution_records(start_rows, end_rows, times, device=device, event=event, message=message)
+    if len(start_rows) == 0:
+        return records, {}
+    
+    # Executions come back ordered by group, then start time
+    execution_groups = group[start_rows]
+    bounds = np.flatnonzero(execution_groups[1:] != execution_groups[:-1]) + 1
+    group_stats = {}
+    for lo, hi in zip(np.insert(bounds, 0, 0).tolist(), np.append(bounds, len(start_rows)).tolist()):
+        group_stats[execution_groups[lo]] = summarize_executions(records[lo:hi])
+    return records, group_stats
+
+
+def summarize_executions(executions):
+    """Stats entry of one group's (non-empty) execution records"""
+    group_times = executions['time']
+    event_stats = {
+        'count': len(executions),
+        'mean_ns': np.mean(group_times),
+        'std_ns': np.std(group_times),
+        'min_ns': np.min(group_times),
+        'max_ns': np.max(group_times),
+        'executions': executions,
+        # Mergeable tail-latency summary (fixed size, ~1% relative error)
+        'sketch': DDSketch().add(group_times)
+    }
+    event_stats.update(latency_percentiles(event_stats['sketch']))
+    return event_stats
+
+
+def executions_starting_within(execution_stats, has_device_info, start, end):
+    """Execution timing results limited to the executions that start in [start, end].
+
+    Executions keep their pairing from the whole trace, so one running past
+    either end of the window is neither cut short nor paired differently.
+    Groups without such executions are left out.
+    """
+    def within(event_stats):
+        # A group's executions are in start time order
+        starts = event_stats['executions']['start']
+        lo, hi = np.searchsorted(starts, start, side='left'), np.searchsorted(starts, end, side='right')
+        if lo == hi:
+            return None
+        if hi - lo == event_stats['count']:
+            return event_stats
+        return summarize_executions(event_stats['executions'][lo:hi])
+    
+    window_stats = {}
+    for key, stats in execution_stats.items():
+        if has_device_info:
+            device_stats = {event: within(event_stats) for event, event_stats in stats.items()}
+            device_stats = {event: event_stats for event, event_stats in device_stats.items() if event_stats}
+            if device_stats:
+                window_stats[key] = device_stats
+        else:
+            event_stats = within(stats)
+            if event_stats:
+                window_stats[key] = event_stats
+    return window_stats
+
+
+def _shard_group_stats(out, **columns):
+    """execution_group_stats of one device shard, run in a worker process.
+
+    Records go to the shared out array; stats come back in record order with
+    'executions' left for the caller to fill in.
+    """
+    records, group_stats = execution_group_stats(**columns)
+    out[:len(records)] = records
+    for event_stats in group_stats.values():
+        event_stats['executions'] = None
+    return list(group_stats.items())
+
+
+def _execution_group_stats_by_device(columns, device_codes, devices):
+    """execution_group_stats computed per device shard on the analysis pool"""
+    shards = min(parallel_analysis.ANALYSIS_WORKERS, devices)
+    # Rows without a group are never paired, so they stay out of the shards
+    shard = parallel_analysis.device_shards(np.where(columns['group'] >= 0, device_codes, -1), shards)
+    # A shard has at most one execution per start toggle
+    capacity = np.bincount(shard, weights=columns['toggled'], minlength=shards + 1)[:shards].astype(np.int64)
+    results, shard_records = parallel_analysis.map_shards(
+        _shard_group_stats, columns, shard, shards,
+        out_dtype=execution_dtype(columns['times'].dtype, max_category_code(columns['device'], columns['event'])),
+        out_rows=capacity)
+    
+    group_stats = {}
+    for shard_stats, records in zip(results, shard_records):
+        lo = 0
+        for group_code, event_stats in shard_stats:
+            hi = lo + event_stats['count']
+            event_stats['executions'] = records[lo:hi]
+            group_stats[group_code] = event_stats
+            lo = hi
+    return group_stats
+
+
+def analyze_execution_timing(df, parallel=True):
+    """Analyze execution timing from hardware data (parallel=False never uses the process pool)"""
+    if df is None or df.empty:
+        return {}
+    
+    # Calculate execution times for each event, per device if device info exists
+    execution_stats = {}
+    
+    # Check if the DataFrame has Device_ID column
+    has_device_info = 'Device_ID' in df.columns
+    has_message_info = has_device_info and 'Message_ID' in df.columns
+    
+    # Encode the grouping keys once; executions are paired per (device, event)
+    # or per event when no device info exists
+    event_codes, events = pd.factorize(df['Event'])
+    if has_device_info:
+        device_codes, devices = pd.factorize(df['Device_ID'])
+        group = np.where((device_codes >= 0) & (event_codes >= 0),
+                         device_codes * len(events) + event_codes, -1)
+    else:
+        group = event_codes
+    
+    # Only pair events with the same Message_ID if available (NaN matches NaN)
+    columns = {
+        'group': group,
+        'toggled': df['Toggled'].astype(bool).to_numpy(),
+        'times': df['Time'].to_numpy(),
+        'message': category_codes(df['Message_ID']) if has_message_info else None,
+        'device': category_codes(df['Device_ID']) if has_device_info else None,
+        'event': category_codes(df['Event'])
+    }
+    
+    # Executions never span devices, so large multi-device traces are split
+    # by device across worker processes
+    if has_device_info and parallel and parallel_analysis.use_parallel(len(df), len(devices)):
+        group_stats = _execution_group_stats_by_device(columns, device_codes, len(devices))
+    else:
+        _, group_stats = execution_group_stats(**columns)
+    
+    # Keep devices and events in order of first appearance
+    seen_groups = pd.unique(group[group >= 0])
+    if has_device_info:
+        seen_groups = seen_groups[np.argsort(seen_groups // len(events), kind='stable')]
+    
+    for group_code in seen_groups:
+        if group_code not in group_stats:
+            continue
+        event_stats = group_stats[group_code]
+        
+        if has_device_info:
+            device = devices[group_code // len(events)]
+            event = events[group_code % len(events)]
+            execution_stats.setdefault(device, {})[event] = event_stats
+        else:
+            execution_stats[events[group_code]] = event_stats
+    
+    return execution_stats
+
+
+def analyze_synchronicity(df):
+    """Analyze the synchronicity of events across devices"""
+    if df is None or df.empty or 'Device_ID' not in df.columns:
+        return {}
+    
+    sync_stats = {}
+    
+    # Focus on sync events specifically
+    sync_df = df[df['Event'] == 'Sync_Pulse']
+    
+    if sync_df.empty:
+        return {}
+    
+    # Each SYNC_ Message_ID is one sync pulse; pulses keep order of first appearance
+    pulse_codes, pulse_ids = pd.factorize(sync_df['Message_ID'])
+    valid_pulses = np.array([str(message_id).startswith('SYNC_') for message_id in pulse_ids] + [False])
+    rows = sync_df['Toggled'].to_numpy(dtype=bool) & valid_pulses[pulse_codes]
+    
+    # Start time (Toggled = True) per device and pulse; a device's last start wins
+    device_ids = sync_df['Device_ID'].astype('category')
+    starts = pd.DataFrame({
+        'pulse': pulse_codes[rows],
+        'device': device_ids.cat.codes.to_numpy()[rows],
+        'time': sync_df['Time'].to_numpy()[rows]
+    })
+    starts = starts[~starts.duplicated(['pulse', 'device'], keep='last')]
+    
+    # Spread statistics per pulse without building every device pair
+    order, pulses, spread = pulse_spread(starts['pulse'].to_numpy(), starts['time'].to_numpy())
+    device_labels = np.append(device_ids.cat.categories.to_numpy(dtype=object), np.nan)
+    devices = device_labels[starts['device'].to_numpy()[order]]
+    bounds = np.append(0, np.cumsum(spread['count']))
+    
+    # Pulse codes come back ascending, i.e. in order of first appearance
+    for i, pulse in enumerate(pulses):
+        if spread['count'][i] <= 1:
+            continue
+        lo, hi = bounds[i], bounds[i + 1]
+        sync_stats[pulse_ids[pulse]] = {
+            'device_count': int(spread['count'][i]),
+            'max_diff_ns': spread['max_diff'][i],
+            'min_diff_ns': spread['min_diff'][i],
+            'mean_diff_ns': spread['mean_diff'][i],
+            'std_diff_ns': spread['std_diff'][i],
+            # Devices in order of arrival, with their offset from the pulse median
+            'devices': devices[lo:hi],
+            'offsets_ns': spread['offset'][lo:hi]
+        }
+    
+    return sync_stats
+
+
+def sync_pulse_pairs(pulse_stats):
+    """Pairwise device time differences for one sync pulse, built on request"""
+    first, second = np.triu_indices(pulse_stats['device_count'], k=1)
+    offsets = pulse_stats['offsets_ns']
+    return pd.DataFrame({
+        'device1': pulse_stats['devices'][first],
+        'device2': pulse_stats['devices'][second],
+        'time_diff_ns': np.abs(offsets[second] - offsets[first])
+    })
+
+
+COMMUNICATION_COLUMNS = ['message_id', 'from_device', 'to_device', 'from_position', 'to_position',
+                         'hops', 'time_ns', 'time_per_hop_ns']
+
+
+def analyze_communication_time(df):
+    """Analyze the communication time between devices in a chain.
+    
+    Returns one row per (message, receiving device) with the propagation
+    time from the message's first UART_Send start to that device's first
+    UART_Receive start, ordered by message and then by device appearance.
+    """
+    empty = pd.DataFrame(columns=COMMUNICATION_COLUMNS)
+    if df is None or df.empty or 'Device_ID' not in df.columns:
+        return empty
+    
+    # Focus on communication events (UART_Send and UART_Receive)
+    comm_df = df[(df['Event'] == 'UART_Send') | (df['Event'] == 'UART_Receive')]
+    
+    if comm_df.empty:
+        return empty
+    
+    # Messages keep order of first appearance; SYNC_ pulses and blank IDs are not messages
+    message_codes, message_ids = pd.factorize(comm_df['Message_ID'])
+    message_labels = pd.Index(message_ids).astype(str)
+    valid_messages = np.append((message_labels != '') & ~message_labels.str.startswith('SYNC_'), False)
+    rows = np.flatnonzero(valid_messages[message_codes])
+    
+    device_ids = comm_df['Device_ID'].astype('category')
+    message = message_codes[rows].astype(np.int64)
+    device = device_ids.cat.codes.to_numpy()[rows].astype(np.int64)
+    is_send = (comm_df['Event'] == 'UART_Send').to_numpy()[rows]
+    started = comm_df['Toggled'].to_numpy(dtype=bool)[rows]
+    times = comm_df['Time'].to_numpy()[rows]
+    positions = (comm_df['Position'].to_numpy()[rows] if 'Position' in comm_df.columns
+                 else np.full(len(rows), np.nan))
+    
+    # One integer key per (message, device); np.unique's index is the first occurrence
+    key = message * (len(device_ids.cat.categories) + 1) + device + 1
+    first_keys, first_rows = np.unique(key, return_index=True)
+    
+    # First UART_Send start per message, joined to the first UART_Receive start
+    # of every other device for that message
+    sends = np.flatnonzero(is_send & started)
+    _, first_send = np.unique(message[sends], return_index=True)
+    send_of_message = np.full(len(message_ids), -1, dtype=np.int64)
+    send_of_message[message[sends[first_send]]] = sends[first_send]
+    
+    receives = np.flatnonzero(~is_send & started & (device >= 0))
+    _, first_receive = np.unique(key[receives], return_index=True)
+    receives = receives[first_receive]
+    senders = send_of_message[message[receives]]
+    joined = senders >= 0
+    joined[joined] = device[receives[joined]] != device[senders[joined]]
+    receives, senders = receives[joined], senders[joined]
+    
+    if len(receives) == 0:
+        return empty
+    
+    # Destinations are listed in the order the devices first appear in the message
+    appearance = first_rows[np.searchsorted(first_keys, key[receives])]
+    order = np.lexsort((appearance, message[receives]))
+    receives, senders = receives[order], senders[order]
+    
+    prop_time = times[receives] - times[senders]
+    hops = np.abs(positions[receives] - positions[senders])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        time_per_hop = np.where(hops > 0, prop_time / hops, 0)
+    
+    device_categories = device_ids.cat.categories
+    return pd.DataFrame({
+        'message_id': pd.Categorical.from_codes(message[receives], message_labels)
+                      if message_labels.is_unique else message_labels[message[receives]],
+        'from_device': pd.Categorical.from_codes(device[senders], device_categories),
+        'to_device': pd.Categorical.from_codes(device[receives], device_categories),
+        'from_position': positions[senders],
+        'to_position': positions[receives],
+        'hops': hops,
+        'time_ns': prop_time,
+        'time_per_hop_ns': time_per_hop
+    })
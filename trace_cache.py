@@ -0,0 +1,97 @@
+"""
+Content-addressed cache of parsed timing traces.
+
+Traces are keyed by a hash of their decompressed CSV bytes and kept as Arrow
+IPC files in the dataset store, with Event and Device_ID dictionary-encoded.
+Loading a trace that has been seen before is a memory-mapped read instead of
+a CSV parse.
+"""
+import hashlib
+import os
+
+from dataset_store import _write_atomic
+from ingest import TRACE_SCHEMA_VERSION, iter_file_chunks, read_timing_csv
+
+
+class HashingChunks:
+    """Pass byte chunks through while hashing them"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._digest = hashlib.blake2b(digest_size=16)
+        # Parsed output depends on the ingest schema as well as the bytes
+        self._digest.update(f"trace-schema-{TRACE_SCHEMA_VERSION}".encode())
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            self._digest.update(chunk)
+            yield chunk
+
+    def handle(self):
+        return self._digest.hexdigest()
+
+
+def content_handle(chunks):
+    """Cache handle for a trace given its CSV bytes"""
+    hashing = HashingChunks(chunks)
+    for _ in hashing:
+        pass
+    return hashing.handle()
+
+
+def load_trace(store, open_chunks, total_bytes=None, progress=None):
+    """Load a trace from a re-readable source, parsing only on a cache miss.
+
+    open_chunks() must return a fresh iterator over the CSV bytes each time
+    it is called. Returns (df, handle).
+    """
+    handle = content_handle(open_chunks())
+    df = store.get_dataset(handle)
+    if df is None:
+        df = read_timing_csv(open_chunks(), total_bytes=total_bytes, progress=progress)
+        store.put_dataset(df, handle)
+    return df, handle
+
+
+def ingest_trace_stream(store, chunks, total_bytes=None, progress=None):
+    """Parse a one-shot stream and cache it under its content hash. Returns (df, handle)"""
+    hashing = HashingChunks(chunks)
+    df = read_timing_csv(hashing, total_bytes=total_bytes, progress=progress)
+    handle = hashing.handle()
+    store.put_dataset(df, handle)
+    return df, handle
+
+
+def _iter_path_chunks(path):
+    with open(path, 'rb') as f:
+        yield from iter_file_chunks(f)
+
+
+def _file_index_path(store, path):
+    """Index entry mapping a file's path, size and mtime to its content handle"""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{TRACE_SCHEMA_VERSION}"
+    index_dir = os.path.join(store.root, 'file-index')
+    os.makedirs(index_dir, exist_ok=True)
+    return os.path.join(index_dir, hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+
+def load_trace_file(store, path, progress=None):
+    """Load a timing CSV from disk through the cache. Returns (df, handle)"""
+    index_path = _file_index_path(store, path)
+
+    # An unchanged file skips even the hashing pass
+    try:
+        with open(index_path, 'r') as f:
+            handle = f.read().strip()
+        df = store.get_dataset(handle)
+        if df is not None:
+            return df, handle
+    except FileNotFoundError:
+        pass
+
+    total_bytes = os.path.getsize(path)
+    df, handle = load_trace(store, lambda: _iter_path_chunks(path), total_bytes=total_bytes, progress=progress)
+    _write_atomic(index_path, lambda f: f.write(handle.encode('utf-8')))
+    return df, handle
+